@@ -0,0 +1,105 @@
+"""
+Memory benchmark of loaded transactions, in bytes per transaction.
+
+Loads the transaction manager once per record representation and reports the memory
+it holds on to, as traced by `tracemalloc`:
+
+- "before slots": as default, with every record held in a `__dict__` object of
+  its class, as before the model classes were slotted
+- "default": records keep their raw row (`raw_rows="keep"`)
+- "compact": repeated strings interned, raw rows read again on demand
+  (`MoneywizApi(compact=True)`)
+- "compact, drop": as compact, with the raw rows dropped altogether
+
+    python benchmarks/memory.py <path_to_sqlite_file>
+"""
+
+import argparse
+import gc
+import sys
+import tracemalloc
+from dataclasses import fields
+from functools import lru_cache
+from pathlib import Path
+
+from moneywiz_api.database_accessor import DatabaseAccessor
+from moneywiz_api.managers.transaction_manager import TransactionManager
+
+MODES = {
+    "default": dict(raw_rows="keep", intern_strings=False),
+    "compact": dict(raw_rows="refetch", intern_strings=True),
+    "compact, drop": dict(raw_rows="drop", intern_strings=True),
+}
+
+
+def _traced(build):
+    gc.collect()
+    tracemalloc.start()
+    ret = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ret, size
+
+
+def _load(accessor: DatabaseAccessor) -> TransactionManager:
+    manager = TransactionManager()
+    manager.load(accessor, lazy=True)
+    return manager
+
+
+def bytes_per_transaction(db_path: Path, **options) -> tuple:
+    accessor = DatabaseAccessor(db_path, **options)
+    manager, size = _traced(lambda: _load(accessor))
+    count = len(manager.records())
+    return count, size / count
+
+
+@lru_cache(maxsize=None)
+def _unslotted(cls: type) -> type:
+    """
+    Plain class standing in for the non-slotted dataclass `cls` used to be: its
+    instances keep their attributes in a (key-sharing) `__dict__`.
+    """
+    return type(cls.__name__, (), {})
+
+
+def _unslotted_copy(record):
+    copy = _unslotted(type(record))()
+    for field in fields(record):
+        setattr(copy, field.name, getattr(record, field.name))
+    return copy
+
+
+def bytes_per_transaction_unslotted(db_path: Path) -> tuple:
+    """
+    Memory of the "default" layout, with the slotted records swapped for `__dict__`
+    copies of the same attribute values.
+    """
+    manager, size = _traced(lambda: _load(DatabaseAccessor(db_path)))
+    records = list(manager.records().values())
+    slotted = sum(sys.getsizeof(x) for x in records)
+    copies, copies_size = _traced(lambda: [_unslotted_copy(x) for x in records])
+    size += copies_size - sys.getsizeof(copies) - slotted
+    return len(records), size / len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("db_path", type=Path)
+    args = parser.parse_args()
+
+    results = {"before slots": bytes_per_transaction_unslotted(args.db_path)}
+    results.update(
+        (name, bytes_per_transaction(args.db_path, **options))
+        for name, options in MODES.items()
+    )
+    count = next(iter(results.values()))[0]
+    default = results["default"][1]
+    print(f"transactions: {count}")
+    for name, (_, size) in results.items():
+        print(f"{name + ':':15}{size:,.0f} bytes/transaction ({size / default:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Scaling benchmark suite on synthetic databases.
+
+For every size, a synthetic MoneyWiz database is generated (and kept in --db-dir for
+the next runs), then timed: the full `MoneywizApi` load, sequential, with
+--workers threads and with --processes decoding processes, the memory it holds, `get_all_for_account`, `get_name_chain`,
+and the `ShellHelper` tables.
+
+Results are written as JSON. Pass a previous results file with --compare to list the
+benchmarks that got slower by more than --threshold; the exit status is 1 if any did.
+
+    python benchmarks/suite.py --sizes 10000 100000 -o results.json
+    python benchmarks/suite.py --sizes 10000 100000 --compare results.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from moneywiz_api import MoneywizApi
+from moneywiz_api.cli.helpers import ShellHelper
+
+from synthetic_db import generate
+
+
+def _best_of(func: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def _per_call(func: Callable[[Any], Any], args: List[Any], repeat: int) -> float:
+    """
+    Median over `args` of the best time of `func(arg)`.
+    """
+    return statistics.median(_best_of(lambda: func(arg), repeat) for arg in args)
+
+
+def _result(name: str, transactions: int, value: float, unit: str) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "transactions": transactions,
+        "value": value,
+        "unit": unit,
+    }
+
+
+def run_size(
+    db_path: Path, transactions: int, repeat: int, workers: int, processes: int
+) -> List[Dict[str, Any]]:
+    load = _best_of(lambda: MoneywizApi(db_path), repeat)
+    load_parallel = _best_of(lambda: MoneywizApi(db_path, workers=workers), repeat)
+    load_processes = _best_of(lambda: MoneywizApi(db_path, processes=processes), repeat)
+    print(
+        f"Load speedup with {workers} workers: {load / load_parallel:.2f}x, "
+        f"with {processes} processes: {load / load_processes:.2f}x",
+        file=sys.stderr,
+    )
+    results = [
+        _result("load", transactions, load, "s"),
+        _result("load_parallel", transactions, load_parallel, "s"),
+        _result("load_processes", transactions, load_processes, "s"),
+    ]
+
+    gc.collect()
+    tracemalloc.start()
+    api = MoneywizApi(db_path)
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results.append(_result("load_memory", transactions, size, "bytes"))
+
+    transaction_manager = api.transaction_manager
+    accounts = list(api.account_manager.records())
+    results.append(
+        _result(
+            "get_all_for_account",
+            transactions,
+            _per_call(transaction_manager.get_all_for_account, accounts, repeat),
+            "s",
+        )
+    )
+    categories = list(api.category_manager.records())
+    results.append(
+        _result(
+            "get_name_chain",
+            transactions,
+            _per_call(api.category_manager.get_name_chain, categories, repeat),
+            "s",
+        )
+    )
+
+    helper = ShellHelper(api)
+    user_id = max(api.accessor.get_users())
+    busiest_account = max(
+        accounts, key=lambda x: len(transaction_manager.get_all_for_account(x))
+    )
+    holdings_account = next(
+        x.account for x in api.investment_holding_manager.records().values()
+    )
+    tables: Dict[str, Callable[[], Any]] = {
+        "users_table": helper.users_table,
+        "categories_table": lambda: helper.categories_table(user_id),
+        "accounts_table": lambda: helper.accounts_table(user_id),
+        "investment_holdings_table": lambda: helper.investment_holdings_table(
+            holdings_account
+        ),
+        "transactions_table": lambda: helper.transactions_table(busiest_account),
+    }
+    for name, func in tables.items():
+        results.append(_result(name, transactions, _best_of(func, repeat), "s"))
+    return results
+
+
+def compare(
+    previous: Dict[str, Any], current: Dict[str, Any], threshold: float
+) -> List[str]:
+    """
+    :return: a description of every benchmark more than `threshold` worse
+    """
+    before = {(x["name"], x["transactions"]): x for x in previous["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = before.get((result["name"], result["transactions"]))
+        if old is None or not old["value"]:
+            continue
+        ratio = result["value"] / old["value"]
+        if ratio > 1 + threshold:
+            regressions.append(
+                f"{result['name']} ({result['transactions']} transactions): "
+                f"{old['value']:.4g} -> {result['value']:.4g} {result['unit']} "
+                f"({ratio - 1:+.0%})"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000], metavar="N"
+    )
+    parser.add_argument(
+        "--db-dir",
+        type=Path,
+        default=Path(tempfile.gettempdir()) / "moneywiz-benchmarks",
+        help="where the generated databases are kept between runs",
+    )
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    parser.add_argument(
+        "--workers", type=int, default=4, help="threads of the parallel load"
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="processes decoding the transactions",
+    )
+    parser.add_argument("-o", "--output", type=Path)
+    parser.add_argument("--compare", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    args.db_dir.mkdir(parents=True, exist_ok=True)
+    report: Dict[str, Any] = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "workers": args.workers,
+            "processes": args.processes,
+            "cpus": os.cpu_count(),
+        },
+        "results": [],
+    }
+    for size in args.sizes:
+        db_path = args.db_dir / f"synthetic_{size}.db"
+        if not db_path.exists():
+            print(f"Generating {db_path}", file=sys.stderr)
+            generate(db_path, transactions=size)
+        print(f"Benchmarking {size} transactions", file=sys.stderr)
+        report["results"].extend(
+            run_size(db_path, size, args.repeat, args.workers, args.processes)
+        )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output, encoding="utf-8")
+    else:
+        print(output)
+
+    if args.compare:
+        previous = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(previous, report, args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
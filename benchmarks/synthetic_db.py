@@ -0,0 +1,559 @@
+"""
+Synthetic MoneyWiz database generator.
+
+Writes a SQLite file shaped like the MoneyWiz Core Data store (Z_PRIMARYKEY,
+ZSYNCOBJECT rows for every entity the managers load, ZCATEGORYASSIGMENT,
+ZWITHDRAWREFUNDTRANSACTIONLINK, Z_36TAGS and ZUSER), with enough consistent content
+for every manager to load it and for every model validation to pass. Rows are
+written in batches, so millions of transactions can be generated in bounded memory.
+
+    python benchmarks/synthetic_db.py <path> -n 1000000
+"""
+
+import argparse
+import plistlib
+import random
+import sqlite3
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List
+
+ENTITIES: Dict[int, str] = {
+    1: "SyncObject",
+    9: "Account",
+    10: "BankChequeAccount",
+    11: "BankSavingAccount",
+    12: "CashAccount",
+    13: "CreditCardAccount",
+    14: "LoanAccount",
+    15: "InvestmentAccount",
+    16: "ForexAccount",
+    19: "Category",
+    20: "CategoryAssigment",
+    24: "InvestmentHolding",
+    28: "Payee",
+    35: "Tag",
+    36: "Transaction",
+    37: "DepositTransaction",
+    38: "InvestmentExchangeTransaction",
+    39: "InvestmentTransaction",
+    40: "InvestmentBuyTransaction",
+    41: "InvestmentSellTransaction",
+    42: "ReconcileTransaction",
+    43: "RefundTransaction",
+    44: "TransferBudgetTransaction",
+    45: "TransferDepositTransaction",
+    46: "TransferWithdrawTransaction",
+    47: "WithdrawTransaction",
+    48: "WithdrawRefundTransactionLink",
+    49: "User",
+}
+ENT = {v: k for k, v in ENTITIES.items()}
+
+SYNCOBJECT_COLUMNS: List[str] = [
+    "Z_PK", "Z_ENT", "Z_OPT", "ZGID", "ZOBJECTCREATIONDATE",
+    # Account
+    "ZDISPLAYORDER", "ZGROUPID", "ZNAME", "ZCURRENCYNAME", "ZOPENINGBALANCE",
+    "ZINFO", "ZUSER", "ZSTATEMENTENDDAY", "ZBANKLOGOPRIMARYCOLOR",
+    # Category
+    "ZNAME2", "ZPARENTCATEGORY", "ZTYPE2", "ZUSER3",
+    # InvestmentHolding
+    "ZINVESTMENTACCOUNT", "ZOPENNINGNUMBEROFSHARES", "ZNUMBEROFSHARES",
+    "ZSYMBOL", "ZHOLDINGTYPE", "ZDESC", "ZISPRICEPERSHAREAVAILABLEONLINE",
+    "ZINVESTMENTOBJECTTYPE", "ZCOSTBASISOFMISSINGOBSHARES",
+    "ZMANUALHISTORICALPRICESPERSHARE",
+    # Payee / Tag
+    "ZNAME5", "ZUSER7", "ZNAME6", "ZUSER8",
+    # Transaction
+    "ZRECONCILED", "ZAMOUNT1", "ZDESC2", "ZDATE1", "ZNOTES1", "ZACCOUNT2",
+    "ZPAYEE2", "ZORIGINALCURRENCY", "ZORIGINALAMOUNT", "ZORIGINALEXCHANGERATE",
+    "ZFROMINVESTMENTHOLDING", "ZFROMSYMBOL", "ZTOINVESTMENTHOLDING",
+    "ZTOSYMBOL", "ZFROMNUMBEROFSHARES", "ZTONUMBEROFSHARES", "ZORIGINALFEE",
+    "ZORIGINALFEECURRENCY", "ZFEE2", "ZINVESTMENTHOLDING", "ZNUMBEROFSHARES1",
+    "ZPRICEPERSHARE1", "ZRECONCILEAMOUNT", "ZRECONCILENUMBEROFSHARES",
+    "ZSENDERACCOUNT", "ZSENDERTRANSACTION", "ZORIGINALSENDERAMOUNT",
+    "ZORIGINALSENDERCURRENCY", "ZRECIPIENTACCOUNT1", "ZRECIPIENTTRANSACTION",
+    "ZORIGINALRECIPIENTAMOUNT", "ZORIGINALRECIPIENTCURRENCY",
+    "ZIMPORTLINKIDARRAY", "ZIMPORTLINKIDARRAY2",
+    "Z9_ZACCOUNT2", "Z9_ZPAYEE2",
+]  # fmt: skip
+
+# Real stores carry well over a hundred mostly-NULL columns
+FILLER_COLUMNS: List[str] = [f"ZUNUSED{i}" for i in range(60)]
+
+DAY = 86400.0
+
+
+def _create_schema(con: sqlite3.Connection) -> None:
+    columns = ", ".join(
+        f'"{c}" INTEGER PRIMARY KEY' if c == "Z_PK" else f'"{c}"'
+        for c in SYNCOBJECT_COLUMNS + FILLER_COLUMNS
+    )
+    con.executescript(
+        f"""
+        CREATE TABLE Z_PRIMARYKEY (Z_ENT INTEGER PRIMARY KEY, Z_NAME VARCHAR,
+            Z_SUPER INTEGER, Z_MAX INTEGER);
+        CREATE TABLE ZSYNCOBJECT ({columns});
+        CREATE INDEX ZSYNCOBJECT_Z_ENT ON ZSYNCOBJECT (Z_ENT);
+        CREATE TABLE ZCATEGORYASSIGMENT (Z_PK INTEGER PRIMARY KEY, Z_ENT INTEGER,
+            Z_OPT INTEGER, ZCATEGORY INTEGER, ZTRANSACTION INTEGER,
+            ZAMOUNT FLOAT);
+        CREATE TABLE ZWITHDRAWREFUNDTRANSACTIONLINK (Z_PK INTEGER PRIMARY KEY,
+            Z_ENT INTEGER, Z_OPT INTEGER, ZREFUNDTRANSACTION INTEGER,
+            ZWITHDRAWTRANSACTION INTEGER);
+        CREATE TABLE Z_36TAGS (Z_36TRANSACTIONS INTEGER, Z_35TAGS INTEGER,
+            PRIMARY KEY (Z_36TRANSACTIONS, Z_35TAGS));
+        CREATE TABLE ZUSER (Z_PK INTEGER PRIMARY KEY, Z_ENT INTEGER,
+            Z_OPT INTEGER, ZSYNCLOGIN VARCHAR);
+        """
+    )
+
+
+# Rows kept in memory before they are written out
+_BATCH_SIZE = 10_000
+
+
+class _Builder:
+    def __init__(self, rng: random.Random, con: sqlite3.Connection):
+        self.rng = rng
+        self.con = con
+        self.next_pk = 1
+        self.rows: List[Dict] = []
+        self.assignments: List[tuple] = []
+        self.assignment_count = 0
+        self.refund_links: List[tuple] = []
+        self.refund_link_count = 0
+        self.tags: List[tuple] = []
+
+    def flush(self) -> None:
+        columns = SYNCOBJECT_COLUMNS
+        self.con.executemany(
+            "INSERT INTO ZSYNCOBJECT (%s) VALUES (%s)"
+            % (",".join(columns), ",".join("?" * len(columns))),
+            ([row.get(c) for c in columns] for row in self.rows),
+        )
+        self.con.executemany(
+            "INSERT INTO ZCATEGORYASSIGMENT VALUES (?, 20, 1, ?, ?, ?)",
+            [
+                (self.assignment_count + i + 1, *a)
+                for i, a in enumerate(self.assignments)
+            ],
+        )
+        self.con.executemany(
+            "INSERT INTO ZWITHDRAWREFUNDTRANSACTIONLINK VALUES (?, 48, 1, ?, ?)",
+            [
+                (self.refund_link_count + i + 1, *link)
+                for i, link in enumerate(self.refund_links)
+            ],
+        )
+        self.con.executemany("INSERT INTO Z_36TAGS VALUES (?, ?)", self.tags)
+        self.assignment_count += len(self.assignments)
+        self.refund_link_count += len(self.refund_links)
+        self.rows, self.assignments, self.refund_links, self.tags = [], [], [], []
+
+    def obj(self, typename: str, **values) -> int:
+        pk = self.next_pk
+        self.next_pk += 1
+        row = {
+            "Z_PK": pk,
+            "Z_ENT": ENT[typename],
+            "Z_OPT": 1,
+            "ZGID": str(uuid.UUID(int=self.rng.getrandbits(128))).upper(),
+            "ZOBJECTCREATIONDATE": 600000000.0 + pk,
+        }
+        row.update(values)
+        self.rows.append(row)
+        if len(self.rows) >= _BATCH_SIZE:
+            self.flush()
+        return pk
+
+
+def generate(
+    path: Path,
+    transactions: int = 10_000,
+    users: int = 2,
+    seed: int = 42,
+    years: int = 10,
+) -> Path:
+    """
+    Write a synthetic MoneyWiz database to `path` (overwriting it).
+
+    :param transactions: approximate number of ZSYNCOBJECT transaction rows
+    :param users: number of non-system users
+    :param years: span of transaction dates, ending 2023-12-31
+    :return: path
+    """
+    path = Path(path)
+    if path.exists():
+        path.unlink()
+    rng = random.Random(seed)
+    end = 725760000.0  # 2024-01-01 in seconds since 2001-01-01
+    start = end - years * 365 * DAY
+
+    con = sqlite3.connect(path)
+    con.execute("PRAGMA journal_mode = OFF")
+    con.execute("PRAGMA synchronous = OFF")
+    _create_schema(con)
+    b = _Builder(rng, con)
+    con.executemany(
+        "INSERT INTO ZUSER VALUES (?, 49, 1, ?)",
+        [(1, None)] + [(u, f"user{u}@example.com") for u in range(2, users + 2)],
+    )
+
+    per_user = max(transactions // users, 1)
+    for user in range(2, users + 2):
+        _generate_user(b, user, per_user, start, end)
+
+    b.flush()
+
+    maxima = {
+        "SyncObject": b.next_pk - 1,
+        "CategoryAssigment": b.assignment_count,
+        "WithdrawRefundTransactionLink": b.refund_link_count,
+        "User": users + 1,
+    }
+    con.executemany(
+        "INSERT INTO Z_PRIMARYKEY VALUES (?, ?, ?, ?)",
+        [
+            (ent, name, 0 if ent in (1, 20, 48, 49) else 1, maxima.get(name, 0))
+            for ent, name in ENTITIES.items()
+        ],
+    )
+    con.commit()
+    con.close()
+    return path
+
+
+def _price_archive(rng: random.Random, start: float, end: float) -> bytes:
+    """
+    Weekly prices per share as MoneyWiz archives them: an NSKeyedArchiver
+    NSMutableDictionary of NSDate -> NSNumber.
+    """
+    dates, prices = [], []
+    price = rng.uniform(5, 300)
+    date = start + rng.uniform(0, 30) * DAY
+    while date < end:
+        dates.append(date)
+        prices.append(round(price, 2))
+        price = max(1.0, price * rng.gauss(1, 0.03))
+        date += 7 * DAY
+    n = len(dates)
+    # "$null", the dictionary, n dates, n prices, then the two classes
+    date_class, dict_class = plistlib.UID(2 + 2 * n), plistlib.UID(3 + 2 * n)
+    objects = [
+        "$null",
+        {
+            "NS.keys": [plistlib.UID(2 + i) for i in range(n)],
+            "NS.objects": [plistlib.UID(2 + n + i) for i in range(n)],
+            "$class": dict_class,
+        },
+        *({"NS.time": x, "$class": date_class} for x in dates),
+        *prices,
+        {"$classname": "NSDate", "$classes": ["NSDate", "NSObject"]},
+        {
+            "$classname": "NSMutableDictionary",
+            "$classes": ["NSMutableDictionary", "NSDictionary", "NSObject"],
+        },
+    ]
+    return plistlib.dumps(
+        {
+            "$version": 100000,
+            "$archiver": "NSKeyedArchiver",
+            "$top": {"root": plistlib.UID(1)},
+            "$objects": objects,
+        },
+        fmt=plistlib.FMT_BINARY,
+    )
+
+
+def _generate_user(b: _Builder, user: int, n: int, start: float, end: float):
+    rng = b.rng
+
+    accounts = []
+    for order, (typename, currency) in enumerate(
+        [
+            ("BankChequeAccount", "GBP"),
+            ("BankChequeAccount", "EUR"),
+            ("BankSavingAccount", "GBP"),
+            ("CashAccount", "GBP"),
+            ("CreditCardAccount", "GBP"),
+            ("LoanAccount", "GBP"),
+            ("InvestmentAccount", "GBP"),
+            ("ForexAccount", "USD"),
+        ]
+    ):
+        pk = b.obj(
+            typename,
+            ZDISPLAYORDER=order,
+            ZGROUPID=order // 3,
+            ZNAME=f"{typename} {order}",
+            ZCURRENCYNAME=currency,
+            ZOPENINGBALANCE=float(rng.randint(0, 5000)),
+            ZINFO="",
+            ZUSER=user,
+            ZSTATEMENTENDDAY=(
+                rng.randint(1, 28)
+                if typename in ("CreditCardAccount", "LoanAccount")
+                else None
+            ),
+            ZBANKLOGOPRIMARYCOLOR=rng.randbytes(64),
+        )
+        accounts.append((pk, typename, currency))
+
+    cash = [a for a in accounts if a[1] not in ("InvestmentAccount", "ForexAccount")]
+    investment = [a for a in accounts if a[1] == "InvestmentAccount"]
+
+    categories = {1: [], 2: []}
+    for type_ in (1, 2):
+        for i in range(6 if type_ == 1 else 3):
+            parent = b.obj(
+                "Category",
+                ZNAME2=f"Cat {type_}.{i}",
+                ZTYPE2=type_,
+                ZUSER3=user,
+                ZPARENTCATEGORY=None,
+            )
+            categories[type_].append(parent)
+            for j in range(4):
+                child = b.obj(
+                    "Category",
+                    ZNAME2=f"Cat {type_}.{i}.{j}",
+                    ZTYPE2=type_,
+                    ZUSER3=user,
+                    ZPARENTCATEGORY=parent,
+                )
+                categories[type_].append(child)
+                if j == 0:
+                    categories[type_].append(
+                        b.obj(
+                            "Category",
+                            ZNAME2=f"Cat {type_}.{i}.{j}.0",
+                            ZTYPE2=type_,
+                            ZUSER3=user,
+                            ZPARENTCATEGORY=child,
+                        )
+                    )
+
+    payees = [b.obj("Payee", ZNAME5=f"Payee {i}", ZUSER7=user) for i in range(200)]
+    tags = [b.obj("Tag", ZNAME6=f"Tag {i}", ZUSER8=user) for i in range(10)]
+
+    holdings = []
+    for account, _, _ in investment:
+        for i in range(5):
+            holdings.append(
+                (
+                    b.obj(
+                        "InvestmentHolding",
+                        ZINVESTMENTACCOUNT=account,
+                        ZOPENNINGNUMBEROFSHARES=float(rng.choice([0, 0, 10])),
+                        ZNUMBEROFSHARES=0.0,
+                        ZSYMBOL=f"SYM{user}{i}",
+                        ZHOLDINGTYPE="Stock",
+                        ZDESC=f"Holding {i}",
+                        ZISPRICEPERSHAREAVAILABLEONLINE=rng.randint(0, 1),
+                        ZINVESTMENTOBJECTTYPE=0,
+                        ZCOSTBASISOFMISSINGOBSHARES=0.0,
+                        ZMANUALHISTORICALPRICESPERSHARE=_price_archive(rng, start, end),
+                    ),
+                    account,
+                    f"SYM{user}{i}",
+                )
+            )
+
+    def common(date: float, amount: float) -> Dict:
+        return {
+            "ZRECONCILED": rng.randint(0, 1),
+            "ZAMOUNT1": amount,
+            "ZDESC2": f"Transaction {rng.randint(0, 10_000)}",
+            "ZDATE1": date,
+            "ZNOTES1": None if rng.random() < 0.8 else "some notes",
+            "ZIMPORTLINKIDARRAY": rng.randbytes(128),
+        }
+
+    def money(lo: float, hi: float) -> float:
+        return round(rng.uniform(lo, hi), 2)
+
+    def categorise(pk: int, type_: int, amount: float):
+        if rng.random() < 0.1:
+            first = round(amount / 2, 2)
+            b.assignments.append((rng.choice(categories[type_]), pk, first))
+            b.assignments.append(
+                (rng.choice(categories[type_]), pk, round(amount - first, 2))
+            )
+        else:
+            b.assignments.append((rng.choice(categories[type_]), pk, amount))
+
+    def tag(pk: int):
+        if rng.random() < 0.2:
+            for t in rng.sample(tags, rng.randint(1, 3)):
+                b.tags.append((pk, t))
+
+    # Refunds point at one of the recent withdraws
+    withdraws: Deque[tuple] = deque(maxlen=1000)
+    dates = sorted(rng.uniform(start, end) for _ in range(n))
+    i = 0
+    while i < n:
+        date = dates[i]
+        roll = rng.random()
+        account, typename, currency = rng.choice(cash)
+        if roll < 0.60:
+            rate = 1.0 if rng.random() < 0.9 else 2.0
+            original = -money(1, 200)
+            amount = original * rate
+            pk = b.obj(
+                "WithdrawTransaction",
+                **common(date, amount),
+                ZACCOUNT2=account,
+                ZPAYEE2=rng.choice(payees + [None]),
+                ZORIGINALCURRENCY=currency if rate == 1.0 else "USD",
+                ZORIGINALAMOUNT=original,
+                ZORIGINALEXCHANGERATE=rate if rate != 1.0 else rng.choice([0.0, 1.0]),
+            )
+            categorise(pk, 1, amount)
+            withdraws.append((pk, account, amount, currency))
+        elif roll < 0.75:
+            amount = money(10, 3000)
+            pk = b.obj(
+                "DepositTransaction",
+                **common(date, amount),
+                ZACCOUNT2=account,
+                ZPAYEE2=rng.choice(payees + [None]),
+                ZORIGINALCURRENCY=currency,
+                ZORIGINALAMOUNT=amount,
+                ZORIGINALEXCHANGERATE=None,
+            )
+            categorise(pk, 2, amount)
+        elif roll < 0.85:
+            (to_account, _, to_currency) = rng.choice(
+                [a for a in accounts if a[0] != account]
+            )
+            rate = 1.0 if to_currency == currency else 1.25
+            amount = -money(10, 1000)
+            received = -amount * rate
+            withdraw_pk = b.next_pk
+            deposit_pk = b.next_pk + 1
+            b.obj(
+                "TransferWithdrawTransaction",
+                **common(date, amount),
+                ZACCOUNT2=account,
+                ZRECIPIENTACCOUNT1=to_account,
+                ZRECIPIENTTRANSACTION=deposit_pk,
+                ZORIGINALAMOUNT=amount,
+                ZORIGINALCURRENCY=currency,
+                ZORIGINALRECIPIENTAMOUNT=-received,
+                ZORIGINALRECIPIENTCURRENCY=to_currency,
+                ZORIGINALFEE=None,
+                ZORIGINALFEECURRENCY=None,
+                ZORIGINALEXCHANGERATE=rate,
+            )
+            b.obj(
+                "TransferDepositTransaction",
+                **common(date, received),
+                ZACCOUNT2=to_account,
+                ZSENDERACCOUNT=account,
+                ZSENDERTRANSACTION=withdraw_pk,
+                ZORIGINALAMOUNT=-received,
+                ZORIGINALCURRENCY=to_currency,
+                ZORIGINALSENDERAMOUNT=amount,
+                ZORIGINALSENDERCURRENCY=currency,
+                ZORIGINALFEE=0.0,
+                ZORIGINALFEECURRENCY=None,
+                ZORIGINALEXCHANGERATE=rate,
+            )
+            i += 1
+        elif roll < 0.88 and withdraws:
+            original_pk, w_account, w_amount, w_currency = rng.choice(withdraws)
+            amount = round(min(-w_amount, money(1, 50)), 2)
+            pk = b.obj(
+                "RefundTransaction",
+                **common(date, amount),
+                ZACCOUNT2=w_account,
+                ZPAYEE2=None,
+                ZORIGINALCURRENCY=w_currency,
+                ZORIGINALAMOUNT=amount,
+                ZORIGINALEXCHANGERATE=None,
+            )
+            categorise(pk, 1, amount)
+            b.refund_links.append((pk, original_pk))
+        elif roll < 0.95 and holdings:
+            holding, h_account, _ = rng.choice(holdings)
+            shares = float(rng.randint(1, 20))
+            price = money(5, 300)
+            fee = rng.choice([0.0, 1.5, 4.95])
+            if rng.random() < 0.65:
+                pk = b.obj(
+                    "InvestmentBuyTransaction",
+                    **common(date, -(shares * price + fee)),
+                    ZACCOUNT2=h_account,
+                    ZFEE2=fee,
+                    ZINVESTMENTHOLDING=holding,
+                    ZNUMBEROFSHARES1=shares,
+                    ZPRICEPERSHARE1=price,
+                )
+            else:
+                pk = b.obj(
+                    "InvestmentSellTransaction",
+                    **common(date, shares * price - fee),
+                    ZACCOUNT2=h_account,
+                    ZFEE2=fee,
+                    ZINVESTMENTHOLDING=holding,
+                    ZNUMBEROFSHARES1=shares,
+                    ZPRICEPERSHARE1=price,
+                )
+        elif roll < 0.96 and holdings:
+            (from_holding, h_account, from_symbol), (to_holding, _, to_symbol) = (
+                rng.sample(holdings, 2)
+            )
+            b.obj(
+                "InvestmentExchangeTransaction",
+                **common(date, 0.0),
+                ZACCOUNT2=h_account,
+                ZFROMINVESTMENTHOLDING=from_holding,
+                ZFROMSYMBOL=from_symbol,
+                ZTOINVESTMENTHOLDING=to_holding,
+                ZTOSYMBOL=to_symbol,
+                ZFROMNUMBEROFSHARES=-float(rng.randint(1, 5)),
+                ZTONUMBEROFSHARES=float(rng.randint(1, 5)),
+                ZORIGINALFEE=0.0,
+                ZORIGINALFEECURRENCY=from_symbol,
+            )
+        elif roll < 0.97:
+            b.obj(
+                "ReconcileTransaction",
+                **common(date, 0.0),
+                ZACCOUNT2=account,
+                ZRECONCILEAMOUNT=money(0, 1000),
+                ZRECONCILENUMBEROFSHARES=None,
+            )
+        elif roll < 0.98:
+            b.obj("TransferBudgetTransaction", **common(date, money(1, 100)))
+        else:
+            amount = -money(1, 100)
+            pk = b.obj(
+                "WithdrawTransaction",
+                **common(date, amount),
+                ZACCOUNT2=account,
+                ZPAYEE2=None,
+                ZORIGINALCURRENCY=currency,
+                ZORIGINALAMOUNT=-amount,  # stored with the wrong sign
+                ZORIGINALEXCHANGERATE=None,
+            )
+            categorise(pk, 1, amount)
+        tag(b.next_pk - 1)
+        i += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", type=Path)
+    parser.add_argument("-n", "--transactions", type=int, default=10_000)
+    parser.add_argument("-u", "--users", type=int, default=2)
+    parser.add_argument("-y", "--years", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    generate(args.path, args.transactions, args.users, args.seed, args.years)
+
+
+if __name__ == "__main__":
+    main()
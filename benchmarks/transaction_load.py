@@ -0,0 +1,105 @@
+"""
+Before/after benchmark of `TransactionManager.load`.
+
+"before" runs the package as of the git revision given with --before (e.g. the
+last revision building the models through their hand-written, name-keyed
+constructors from dict rows), checked out into a temporary directory and timed in a
+subprocess.
+"after" is the current `TransactionManager.load`, which builds models through the
+compiled per-entity row decoders.
+
+Both load the transactions alone (lazy=True: without the category, refund and tag
+maps). Run from the git checkout:
+
+    python benchmarks/transaction_load.py <path_to_sqlite_file> --before <git_ref>
+"""
+
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+from moneywiz_api.database_accessor import DatabaseAccessor
+from moneywiz_api.managers.transaction_manager import TransactionManager
+
+_TIMED = """
+import sys, time
+from pathlib import Path
+from moneywiz_api.database_accessor import DatabaseAccessor
+from moneywiz_api.managers.transaction_manager import TransactionManager
+
+db_path, repeat = Path(sys.argv[1]), int(sys.argv[2])
+timings = []
+for _ in range(repeat):
+    start = time.perf_counter()
+    manager = TransactionManager()
+    manager.load(DatabaseAccessor(db_path), lazy=True)
+    timings.append(time.perf_counter() - start)
+print(len(manager.records()), min(timings))
+"""
+
+
+def load_before(db_path: Path, repeat: int, ref: str) -> tuple:
+    """
+    :return: (transactions, best time) of the load of the package at `ref`
+    """
+    root = Path(__file__).resolve().parent.parent
+    archive = subprocess.run(
+        ["git", "archive", "--format=tar", ref, "src"],
+        cwd=root,
+        check=True,
+        capture_output=True,
+    ).stdout
+    with tempfile.TemporaryDirectory() as tmp:
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            tar.extractall(tmp, filter="data")
+        out = subprocess.run(
+            [sys.executable, "-c", _TIMED, str(db_path), str(repeat)],
+            env={**os.environ, "PYTHONPATH": str(Path(tmp) / "src")},
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+    count, seconds = out.split()
+    return int(count), float(seconds)
+
+
+def load_after(db_path: Path) -> int:
+    manager = TransactionManager()
+    manager.load(DatabaseAccessor(db_path), lazy=True)
+    return len(manager.records())
+
+
+def _best_of(func, db_path: Path, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = func(db_path)
+        timings.append(time.perf_counter() - start)
+    return count, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("db_path", type=Path)
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    parser.add_argument(
+        "--before", required=True, help="git revision (commit, tag) to compare with"
+    )
+    args = parser.parse_args()
+
+    count, before = load_before(args.db_path.resolve(), args.repeat, args.before)
+    _, after = _best_of(load_after, args.db_path, args.repeat)
+    print(f"transactions: {count}")
+    print(f"before: {before:.3f}s ({count / before:,.0f} rows/s)")
+    print(f"after:  {after:.3f}s ({count / after:,.0f} rows/s)")
+    print(f"speedup: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
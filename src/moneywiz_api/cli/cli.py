@@ -11,6 +11,7 @@ import click
 import pandas as pd
 
 from moneywiz_api.cli.helpers import ShellHelper
+from moneywiz_api.database_accessor import OPEN_MODES
 from moneywiz_api.moneywiz_api import MoneywizApi
 
 
@@ -42,7 +43,19 @@ def get_default_path() -> Path:
     ),
     help="Set the logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)",
 )
-def main(db_file_path, demo_dump, log_level):
+@click.option(
+    "--open-mode",
+    default="ro",
+    type=click.Choice(OPEN_MODES),
+    help="Open the database read-only and memory-mapped (ro), also without "
+    "locking for backup copies (immutable), or as a regular client (default)",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Print load timings, rows and memory per manager and per query",
+)
+def main(db_file_path, demo_dump, log_level, open_mode, profile):
     """
     Interactive shell to access MoneyWiz (Read-only)
     """
@@ -57,7 +70,13 @@ def main(db_file_path, demo_dump, log_level):
     root_logger = logging.getLogger()
     root_logger.setLevel(numeric_level)
 
-    moneywiz_api = MoneywizApi(db_file_path)
+    moneywiz_api = MoneywizApi(db_file_path, profile=profile, open_mode=open_mode)
+
+    if profile:
+        click.secho("Load Profile", fg="yellow")
+        click.secho("--------------------------------", fg="yellow")
+        click.secho(str(moneywiz_api.stats()))
+        click.secho("--------------------------------\n", fg="yellow")
 
     (
         accessor,
@@ -19,12 +19,12 @@ class ShellHelper:
         self._mw_api = moneywiz_api
 
     def view_id(self, record_id: ID):
-        record = self._mw_api.accessor.get_record(record_id)
+        record = self._mw_api.accessor.get_record(record_id, full_row=True)
         click.echo(self._mw_api.accessor.typename_for(record.ent()))
         click.echo(json.dumps(record.filtered(), sort_keys=True, indent=4))
 
     def view_gid(self, record_gid: GID):
-        record = self._mw_api.accessor.get_record_by_gid(record_gid)
+        record = self._mw_api.accessor.get_record_by_gid(record_gid, full_row=True)
         click.echo(self._mw_api.accessor.typename_for(record.ent()))
         click.echo(json.dumps(record.filtered(), sort_keys=True, indent=4))
 
@@ -1,40 +1,213 @@
+import copy
 import sqlite3
+import time
 from collections import defaultdict
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Callable, Tuple
+from typing import (
+    Dict,
+    List,
+    Any,
+    Callable,
+    Tuple,
+    Iterable,
+    Iterator,
+    Optional,
+    Sequence,
+)
 from decimal import Decimal
 
+from moneywiz_api.model.decoder import DecodeOptions, RawRowSource
 from moneywiz_api.model.record import Record
 from moneywiz_api.model.raw_data_handler import RawDataHandler as RDH
+from moneywiz_api.stats import QueryEvent, QueryStats
 from moneywiz_api.types import ENT_ID, ID, GID
+from moneywiz_api.utils import get_date, get_date_offset
 
+# Keeps "IN (...)" lists below SQLITE_MAX_VARIABLE_NUMBER on old SQLite builds
+_MAX_PARAMS = 500
+# Rows fetched per round trip by the streaming queries
+_BATCH_SIZE = 1000
 
-class DatabaseAccessor:
-    def __init__(self, db_path: Path):
-        self._con = sqlite3.connect(db_path, uri=True)
+OPEN_MODES = ("default", "ro", "immutable")
+# Start of the period of a transaction date (local time, "YYYY-MM-DD") by
+# granularity, `?` standing for the offset from ZDATE1 to a Unix timestamp
+_PERIOD_STARTS: Dict[Optional[str], str] = {
+    None: "NULL",
+    "day": "date(t.ZDATE1 + ?, 'unixepoch', 'localtime')",
+    # Weeks start on Monday
+    "week": "date(t.ZDATE1 + ?, 'unixepoch', 'localtime', 'weekday 0', '-6 days')",
+    "month": "date(t.ZDATE1 + ?, 'unixepoch', 'localtime', 'start of month')",
+    "year": "date(t.ZDATE1 + ?, 'unixepoch', 'localtime', 'start of year')",
+}
+# Tuning of the read-only modes: map the file instead of read() calls, keep a large
+# page cache and temporary b-trees (sorts) in memory
+_READ_ONLY_PRAGMAS = (
+    "PRAGMA query_only = ON",
+    f"PRAGMA mmap_size = {1 << 30}",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA temp_store = MEMORY",
+)
 
-        def dict_factory(cursor, row):
-            record = {}
-            for idx, col in enumerate(cursor.description):
-                record[col[0]] = row[idx]
-            return record
 
-        self._con.row_factory = dict_factory
+class DatabaseAccessor:
+    def __init__(
+        self,
+        db_path: Path,
+        full_rows: bool = False,
+        raw_rows: str = "keep",
+        intern_strings: bool = False,
+        validation: str = "strict",
+        open_mode: str = "default",
+    ):
+        """
+        :param db_path: path to the MoneyWiz sqlite file
+        :param full_rows: fetch every column of ZSYNCOBJECT instead of only the
+            columns the models read, e.g. to inspect `Record.filtered()`
+        :param raw_rows: whether the loaded records keep their row ("keep"), drop
+            it ("drop"), or read it again when `Record.filtered()` needs it
+            ("refetch")
+        :param intern_strings: intern repeated strings such as currency codes
+        :param validation: how many of the loaded records are checked with
+            `validate()`: "strict" (all), "sampled" or "off"
+        :param open_mode: "default" opens the file like any SQLite client. "ro"
+            opens it read-only, tuned for reading (memory-mapped, large cache).
+            "immutable" also tells SQLite the file cannot change, so it skips all
+            locking; only use it on a copy nothing else writes to, such as a backup.
+        """
+        if open_mode not in OPEN_MODES:
+            raise ValueError(f"open_mode must be one of {OPEN_MODES}, not {open_mode}")
+        self.full_rows = full_rows
+        self.open_mode = open_mode
+        # Calls, rows and time of every query, by accessor method
+        self.query_stats: Dict[str, QueryStats] = defaultdict(QueryStats)
+        self._before_hooks: List[Callable[[str, str, Sequence[Any]], None]] = []
+        self._after_hooks: List[Callable[[QueryEvent], None]] = []
+        self.decode_options = DecodeOptions(
+            raw_rows=raw_rows,
+            raw_source=RawRowSource(self) if raw_rows == "refetch" else None,
+            intern_strings=intern_strings,
+            validation=validation,
+        )
+        self._db_path = db_path
+        self._con = self._connect(open_mode)
 
         self._ent_to_typename: Dict[ENT_ID, str] = self._load_primarykey()
         self._typename_to_ent: Dict[str, ENT_ID] = {
             v: k for k, v in self._ent_to_typename.items()
         }
 
-    def _load_primarykey(self) -> Dict[int, str]:
+    def _connect(self, open_mode: str) -> sqlite3.Connection:
+        database = str(self._db_path)
+        if open_mode != "default":
+            if not database.startswith("file:"):
+                database = Path(database).resolve().as_uri()
+            separator = "&" if "?" in database else "?"
+            parameter = "immutable=1" if open_mode == "immutable" else "mode=ro"
+            database = f"{database}{separator}{parameter}"
+        con = sqlite3.connect(database, uri=True)
+        if open_mode != "default":
+            for pragma in _READ_ONLY_PRAGMAS:
+                con.execute(pragma)
+        # Rows support access by position (used by the model decoders) and by name
+        con.row_factory = sqlite3.Row
+        return con
+
+    def reader(self) -> "DatabaseAccessor":
+        """
+        A copy of this accessor on a new read-only connection, to query from another
+        thread (a connection stays on the thread that opened it). It shares the
+        decode options and query hooks of this accessor, but keeps its own
+        `query_stats`. Close it when done.
+        """
+        reader = copy.copy(self)
+        reader.query_stats = defaultdict(QueryStats)
+        reader._con = self._connect(
+            "ro" if self.open_mode == "default" else self.open_mode
+        )
+        return reader
+
+    def process_kwargs(self) -> Dict[str, Any]:
+        """
+        Arguments opening an equivalent accessor in another process: read-only, and
+        dropping raw rows, which cannot be sent back (see `detached_raw`).
+        """
+        return {
+            "db_path": self._db_path,
+            "full_rows": self.full_rows,
+            "raw_rows": "drop",
+            "intern_strings": self.decode_options.intern_strings,
+            "validation": self.decode_options.validation,
+            "open_mode": "ro" if self.open_mode == "default" else self.open_mode,
+        }
+
+    def detached_raw(self) -> Optional[RawRowSource]:
+        """
+        What records decoded elsewhere (a snapshot, another process) hold in place of
+        their row: a source reading it again, unless raw rows are dropped.
+        """
+        if self.decode_options.raw_rows == "drop":
+            return None
+        return self.decode_options.raw_source or RawRowSource(self)
+
+    def close(self) -> None:
+        self._con.close()
+
+    def add_query_hook(
+        self,
+        before: Optional[Callable[[str, str, Sequence[Any]], None]] = None,
+        after: Optional[Callable[[QueryEvent], None]] = None,
+    ) -> None:
+        """
+        Register callbacks run around every query, e.g. to feed a metrics system.
+
+        :param before: called with (name, sql, params) before the query runs
+        :param after: called with a `QueryEvent` once its rows are fetched
+        """
+        if before is not None:
+            self._before_hooks.append(before)
+        if after is not None:
+            self._after_hooks.append(after)
+
+    def _query_started(self, name: str, sql: str, params: Sequence[Any]) -> None:
+        for hook in self._before_hooks:
+            hook(name, sql, params)
+
+    def _query_done(
+        self, name: str, sql: str, params: Sequence[Any], seconds: float, rows: int
+    ) -> None:
+        event = QueryEvent(name, sql, params, seconds, rows)
+        self.query_stats[name].add(event)
+        for hook in self._after_hooks:
+            hook(event)
+
+    def _fetch(
+        self, name: str, sql: str, params: Sequence[Any] = (), tuples: bool = False
+    ) -> List[Any]:
+        """
+        Run a query and fetch all its rows, keeping stats and calling the hooks.
+
+        :param name: reported in the stats and hooks
+        :param tuples: plain tuple rows rather than `sqlite3.Row`
+        """
         cur = self._con.cursor()
-        res = cur.execute(
+        if tuples:
+            cur.row_factory = None
+        self._query_started(name, sql, params)
+        start = time.perf_counter()
+        rows = cur.execute(sql, params).fetchall()
+        self._query_done(name, sql, params, time.perf_counter() - start, len(rows))
+        return rows
+
+    def _load_primarykey(self) -> Dict[int, str]:
+        rows = self._fetch(
+            "load_primarykey",
             """
         SELECT * FROM  "Z_PRIMARYKEY" ORDER BY "Z_ENT" LIMIT 1000 OFFSET 0;
-        """
+        """,
         )
         ent_to_typename: Dict[int, str] = {}
-        for row in res.fetchall():
+        for row in rows:
             ent_to_typename[row["Z_ENT"]] = row["Z_NAME"]
         return ent_to_typename
 
@@ -49,91 +222,494 @@ class DatabaseAccessor:
     def ent_for(self, typename: str) -> ENT_ID:
         return self._typename_to_ent.get(typename)
 
-    def query_objects(self, typenames: List[str]) -> List[Any]:
-        cur = self._con.cursor()
-        res = cur.execute(
+    def _projection(
+        self, columns: Optional[Iterable[str]], full_row: bool = False
+    ) -> str:
+        if columns is None or full_row or self.full_rows:
+            return "*"
+        return ", ".join(f'"{column}"' for column in columns)
+
+    @staticmethod
+    def _columns_for(constructor: Callable) -> Optional[Tuple[str, ...]]:
+        columns = getattr(constructor, "columns", None)
+        return columns() if callable(columns) else None
+
+    @staticmethod
+    def _chunks(ids: Iterable[ID]) -> Iterator[List[ID]]:
+        ids = list(ids)
+        for idx in range(0, len(ids), _MAX_PARAMS):
+            yield ids[idx : idx + _MAX_PARAMS]
+
+    def _ents_for(self, typenames: Iterable[str]) -> List[ENT_ID]:
+        return [self.ent_for(x) for x in typenames]
+
+    def query_objects(
+        self,
+        typenames: Iterable[str],
+        columns: Optional[Iterable[str]] = None,
+        after_pk: Optional[ID] = None,
+        pk_range: Optional[Tuple[ID, ID]] = None,
+    ) -> List[Any]:
+        """
+        :param typenames:
+        :param columns: ZSYNCOBJECT columns to fetch, all of them if None
+        :param after_pk: only fetch rows with a greater Z_PK
+        :param pk_range: only fetch rows with a Z_PK in this range, inclusive
+        :return:
+        """
+        ents = self._ents_for(typenames)
+        where, params = "", []
+        if after_pk is not None:
+            where, params = "AND Z_PK > ?", [after_pk]
+        if pk_range is not None:
+            where, params = f"{where} AND Z_PK BETWEEN ? AND ?", [*params, *pk_range]
+        return self._fetch(
+            "query_objects",
             """
-        SELECT * FROM ZSYNCOBJECT WHERE Z_ENT in (%s)
+        SELECT %s FROM ZSYNCOBJECT WHERE Z_ENT in (%s) %s
         """
-            % (",".join("?" * len(typenames))),
-            [self.ent_for(x) for x in typenames],
+            % (self._projection(columns), ",".join("?" * len(ents)), where),
+            [*ents, *params],
         )
-        return res.fetchall()
 
-    def get_record(self, pk_id: ID, constructor: Callable = Record):
+    def get_pk_ranges(
+        self, typenames: Iterable[str], parts: int
+    ) -> List[Tuple[ID, ID]]:
+        """
+        :return: up to `parts` inclusive Z_PK ranges, in order, splitting the rows of
+            `typenames` in parts of (nearly) the same size
+        """
+        ents = self._ents_for(typenames)
+        rows = self._fetch(
+            "get_pk_ranges",
+            """
+        SELECT MIN(Z_PK), MAX(Z_PK) FROM (
+            SELECT Z_PK, NTILE(?) OVER (ORDER BY Z_PK) AS part
+            FROM ZSYNCOBJECT WHERE Z_ENT in (%s)
+        ) GROUP BY part ORDER BY part
+        """
+            % ",".join("?" * len(ents)),
+            [parts, *ents],
+            tuples=True,
+        )
+        return [(low, high) for low, high in rows]
+
+    def iter_transactions(
+        self,
+        typenames: Iterable[str],
+        columns: Optional[Iterable[str]] = None,
+        account_id: Optional[ID] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        batch_size: int = _BATCH_SIZE,
+    ) -> Iterator[Any]:
+        """
+        Stream transaction rows in date order (ZDATE1, then Z_PK), filtered in SQL
+        and fetched `batch_size` rows at a time, so only one batch is held in memory.
+
+        :param account_id: only rows of this account (ZACCOUNT2)
+        :param since: inclusive
+        :param until: inclusive
+        """
+        ents = self._ents_for(typenames)
+        where, params = [], []
+        if account_id is not None:
+            where.append("AND ZACCOUNT2 = ?")
+            params.append(account_id)
+        if since is not None:
+            where.append("AND ZDATE1 >= ?")
+            params.append(get_date(since))
+        if until is not None:
+            where.append("AND ZDATE1 <= ?")
+            params.append(get_date(until))
+        sql = """
+        SELECT %s FROM ZSYNCOBJECT WHERE Z_ENT in (%s) %s ORDER BY ZDATE1, Z_PK
+        """ % (self._projection(columns), ",".join("?" * len(ents)), " ".join(where))
+        params = [*ents, *params]
+        # A cursor of its own, the connection may be used while the rows stream
         cur = self._con.cursor()
-        res = cur.execute(
+        self._query_started("iter_transactions", sql, params)
+        # Only the time spent in SQLite counts, not the consumer's
+        seconds, count = 0.0, 0
+        try:
+            start = time.perf_counter()
+            cur.execute(sql, params)
+            while rows := cur.fetchmany(batch_size):
+                seconds += time.perf_counter() - start
+                count += len(rows)
+                yield from rows
+                start = time.perf_counter()
+            seconds += time.perf_counter() - start
+        finally:
+            cur.close()
+            self._query_done("iter_transactions", sql, params, seconds, count)
+
+    def query_columns(
+        self, typenames: Iterable[str], columns: Iterable[str]
+    ) -> Dict[str, Tuple[Any, ...]]:
+        """
+        Column-wise rows of the given entities, ordered by Z_PK.
+
+        :return: column name -> the values of that column, aligned across columns
+        """
+        columns = list(columns)
+        ents = self._ents_for(typenames)
+        rows = self._fetch(
+            "query_columns",
             """
-        SELECT * FROM ZSYNCOBJECT WHERE Z_PK = ?
-        
+        SELECT %s FROM ZSYNCOBJECT WHERE Z_ENT in (%s) ORDER BY Z_PK
+        """
+            % (
+                ", ".join(f'"{column}"' for column in columns),
+                ",".join("?" * len(ents)),
+            ),
+            ents,
+            tuples=True,
+        )
+        values = list(zip(*rows)) or [()] * len(columns)
+        return dict(zip(columns, values))
+
+    def query_objects_by_ids(
+        self,
+        typenames: Iterable[str],
+        ids: Iterable[ID],
+        columns: Optional[Iterable[str]] = None,
+    ) -> List[Any]:
+        ents = self._ents_for(typenames)
+        rows: List[Any] = []
+        for chunk in self._chunks(ids):
+            rows += self._fetch(
+                "query_objects_by_ids",
+                """
+            SELECT %s FROM ZSYNCOBJECT WHERE Z_ENT in (%s) AND Z_PK in (%s)
+            """
+                % (
+                    self._projection(columns),
+                    ",".join("?" * len(ents)),
+                    ",".join("?" * len(chunk)),
+                ),
+                [*ents, *chunk],
+            )
+        return rows
+
+    def get_sync_state(
+        self, typenames: Iterable[str], up_to_pk: Optional[ID] = None
+    ) -> Tuple[int, int, int]:
+        """
+        Cheap fingerprint of the rows of the given entities: (row count, max Z_PK,
+        sum of Z_OPT). Core Data bumps Z_OPT on every update and never reuses a Z_PK,
+        so any insert, update or delete changes the fingerprint.
+
+        :param typenames:
+        :param up_to_pk: only consider rows with Z_PK <= up_to_pk
+        :return:
+        """
+        ents = self._ents_for(typenames)
+        where, params = "", []
+        if up_to_pk is not None:
+            where, params = "AND Z_PK <= ?", [up_to_pk]
+        rows = self._fetch(
+            "get_sync_state",
+            """
+        SELECT COUNT(*), COALESCE(MAX(Z_PK), 0), COALESCE(SUM(Z_OPT), 0)
+        FROM ZSYNCOBJECT WHERE Z_ENT in (%s) %s
+        """
+            % (",".join("?" * len(ents)), where),
+            [*ents, *params],
+            tuples=True,
+        )
+        return rows[0]
+
+    def get_versions(self, typenames: Iterable[str]) -> Dict[ID, int]:
+        """
+        :return: Z_PK -> Z_OPT for every row of the given entities
+        """
+        ents = self._ents_for(typenames)
+        rows = self._fetch(
+            "get_versions",
+            """
+        SELECT Z_PK, Z_OPT FROM ZSYNCOBJECT WHERE Z_ENT in (%s)
+        """
+            % ",".join("?" * len(ents)),
+            ents,
+            tuples=True,
+        )
+        return dict(rows)
+
+    def get_primarykey_max(self) -> Dict[str, int]:
+        """
+        :return: Z_PRIMARYKEY.Z_MAX for each entity name
+        """
+        rows = self._fetch(
+            "get_primarykey_max",
+            """
+        SELECT Z_NAME, Z_MAX FROM "Z_PRIMARYKEY"
         """,
+        )
+        return {row["Z_NAME"]: row["Z_MAX"] for row in rows}
+
+    def entity_for_table(self, table: str) -> Optional[str]:
+        """
+        Core Data names the table of entity `Foo` `ZFOO`.
+        """
+        for typename in self._typename_to_ent:
+            if f"Z{typename.upper()}" == table:
+                return typename
+        return None
+
+    def get_rows_after(
+        self, table: str, columns: Iterable[str], after_pk: ID
+    ) -> List[Any]:
+        """
+        :return: rows of `table` with a Z_PK greater than `after_pk`
+        """
+        return self._fetch(
+            "get_rows_after",
+            f"""
+        SELECT {", ".join(columns)} FROM "{table}" WHERE Z_PK > ?
+        """,
+            [after_pk],
+        )
+
+    def get_record(
+        self,
+        pk_id: ID,
+        constructor: Callable = Record,
+        full_row: Optional[bool] = None,
+    ):
+        """
+        :param pk_id:
+        :param constructor:
+        :param full_row: fetch every column rather than the constructor's projection;
+            by default, only for the base `Record`, whose projection is just its
+            identifying columns
+        :return:
+        """
+        if full_row is None:
+            full_row = constructor is Record
+        rows = self._fetch(
+            "get_record",
+            """
+        SELECT %s FROM ZSYNCOBJECT WHERE Z_PK = ?
+        
+        """
+            % self._projection(self._columns_for(constructor), full_row),
             [pk_id],
         )
 
-        return constructor(res.fetchone())
+        return constructor(rows[0] if rows else None)
 
-    def get_record_by_gid(self, gid: GID, constructor: Callable = Record):
-        cur = self._con.cursor()
-        res = cur.execute(
+    def get_record_by_gid(
+        self,
+        gid: GID,
+        constructor: Callable = Record,
+        full_row: Optional[bool] = None,
+    ):
+        """
+        :param gid:
+        :param constructor:
+        :param full_row: as for `get_record`
+        :return:
+        """
+        if full_row is None:
+            full_row = constructor is Record
+        rows = self._fetch(
+            "get_record_by_gid",
             """
-        SELECT * FROM ZSYNCOBJECT WHERE ZGID = ?
+        SELECT %s FROM ZSYNCOBJECT WHERE ZGID = ?
         
-        """,
+        """
+            % self._projection(self._columns_for(constructor), full_row),
             [gid],
         )
 
-        return constructor(res.fetchone())
+        return constructor(rows[0] if rows else None)
+
+    def get_historical_prices(self, holding_ids: Iterable[ID]) -> Dict[ID, bytes]:
+        """
+        :return: the ZMANUALHISTORICALPRICESPERSHARE blob of the given investment
+            holdings that have one
+        """
+        ret: Dict[ID, bytes] = {}
+        for chunk in self._chunks(holding_ids):
+            rows = self._fetch(
+                "get_historical_prices",
+                """
+            SELECT Z_PK, ZMANUALHISTORICALPRICESPERSHARE FROM ZSYNCOBJECT
+            WHERE Z_PK in (%s) AND ZMANUALHISTORICALPRICESPERSHARE IS NOT NULL
+            """
+                % ",".join("?" * len(chunk)),
+                chunk,
+                tuples=True,
+            )
+            ret.update(rows)
+        return ret
 
-    def get_category_assignment(self) -> Dict[ID, List[Tuple[ID, Decimal]]]:
+    def _query_for_transactions(
+        self,
+        name: str,
+        sql: str,
+        conditions: List[str],
+        transaction_ids: Optional[Iterable[ID]],
+    ) -> Iterator[Any]:
+        """
+        Run `sql`, restricted to `transaction_ids` when given: each of `conditions`
+        is a column that should be matched against the ids, OR-ed together.
+        """
+        if transaction_ids is None:
+            yield from self._fetch(name, sql)
+            return
+        keyword = "AND" if " WHERE " in sql else "WHERE"
+        for chunk in self._chunks(transaction_ids):
+            placeholders = ",".join("?" * len(chunk))
+            where = " OR ".join(
+                f"{column} in ({placeholders})" for column in conditions
+            )
+            yield from self._fetch(
+                name, f"{sql} {keyword} ({where})", chunk * len(conditions)
+            )
+
+    def get_category_assignment(
+        self, transaction_ids: Optional[Iterable[ID]] = None
+    ) -> Dict[ID, List[Tuple[ID, Decimal]]]:
+        """
+        :param transaction_ids: only load the assignments of these transactions
+        :return:
+        """
         transaction_map: Dict[ID, List[Tuple[ID, Decimal]]] = defaultdict(list)
-        cur = self._con.cursor()
-        res = cur.execute(
+        res = self._query_for_transactions(
+            "get_category_assignment",
             """
         SELECT ZCATEGORY, ZTRANSACTION, ZAMOUNT  FROM ZCATEGORYASSIGMENT WHERE ZTRANSACTION IS NOT NULL
-        
-        """
+        """,
+            ["ZTRANSACTION"],
+            transaction_ids,
         )
-        for row in res.fetchall():
+        for row in res:
             transaction_map[row["ZTRANSACTION"]].append(
                 (row["ZCATEGORY"], RDH.get_decimal(row, "ZAMOUNT"))
             )
         return transaction_map
 
-    def get_refund_maps(self) -> Dict[ID, ID]:
+    def get_refund_maps(
+        self, transaction_ids: Optional[Iterable[ID]] = None
+    ) -> Dict[ID, ID]:
+        """
+        :param transaction_ids: only load the links involving these transactions,
+            either as the refund or as the withdraw
+        :return:
+        """
         refund_to_withdraw: Dict[ID, ID] = {}
-        cur = self._con.cursor()
-        res = cur.execute(
+        res = self._query_for_transactions(
+            "get_refund_maps",
             """
         SELECT ZREFUNDTRANSACTION, ZWITHDRAWTRANSACTION  FROM ZWITHDRAWREFUNDTRANSACTIONLINK
-        
-        """
+        """,
+            ["ZREFUNDTRANSACTION", "ZWITHDRAWTRANSACTION"],
+            transaction_ids,
         )
-        for row in res.fetchall():
+        for row in res:
             refund_to_withdraw[row["ZREFUNDTRANSACTION"]] = row["ZWITHDRAWTRANSACTION"]
         return refund_to_withdraw
 
-    def get_tags_map(self) -> Dict[ID, List[ID]]:
+    def get_tags_map(
+        self, transaction_ids: Optional[Iterable[ID]] = None
+    ) -> Dict[ID, List[ID]]:
+        """
+        :param transaction_ids: only load the tags of these transactions
+        :return:
+        """
         transactions_to_tags: Dict[ID, List[ID]] = defaultdict(list)
-        cur = self._con.cursor()
-        res = cur.execute(
+        res = self._query_for_transactions(
+            "get_tags_map",
             """
         SELECT Z_36TRANSACTIONS, Z_35TAGS FROM  Z_36TAGS
-        
-        """
+        """,
+            ["Z_36TRANSACTIONS"],
+            transaction_ids,
         )
-        for row in res.fetchall():
+        for row in res:
             transactions_to_tags[row["Z_36TRANSACTIONS"]].append(row["Z_35TAGS"])
         return transactions_to_tags
 
+    def get_category_totals(
+        self,
+        user_id: Optional[ID] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        granularity: Optional[str] = "month",
+        rollup: bool = True,
+    ) -> List[Tuple[ID, Optional[str], float]]:
+        """
+        Sum of the category assignment amounts (each split on its own) by category
+        and period, joined and grouped by SQLite.
+
+        :param user_id: only the categories of this user
+        :param since: inclusive, on the transaction date
+        :param until: inclusive
+        :param granularity: "day", "week", "month", "year", or None for one total
+            over the whole range
+        :param rollup: add the totals of the subcategories, at any depth, to their
+            parent categories
+        :return: (category id, period start as "YYYY-MM-DD" or None, amount), by
+            category then period
+        """
+        if granularity not in _PERIOD_STARTS:
+            raise ValueError(
+                f"granularity must be one of {list(_PERIOD_STARTS)}, not {granularity}"
+            )
+        period = _PERIOD_STARTS[granularity]
+        params: List[Any] = [get_date_offset()] if granularity else []
+        where = ""
+        if since is not None:
+            where += " AND t.ZDATE1 >= ?"
+            params.append(get_date(since))
+        if until is not None:
+            where += " AND t.ZDATE1 <= ?"
+            params.append(get_date(until))
+        join = ""
+        if user_id is not None:
+            # Only joined when needed, it costs a row lookup per assignment
+            join = "JOIN ZSYNCOBJECT c ON c.Z_PK = a.ZCATEGORY"
+            where += " AND c.ZUSER3 = ?"
+            params.append(user_id)
+        totals = f"""
+        SELECT a.ZCATEGORY AS category, {period} AS period, SUM(a.ZAMOUNT) AS amount
+        FROM ZCATEGORYASSIGMENT a
+        JOIN ZSYNCOBJECT t ON t.Z_PK = a.ZTRANSACTION
+        {join}
+        WHERE a.ZTRANSACTION IS NOT NULL{where}
+        GROUP BY 1, 2
+        """
+        if not rollup:
+            sql = f"{totals} ORDER BY 1, 2"
+        else:
+            # Every category with a total, paired with itself and its ancestors.
+            # UNION rather than UNION ALL stops on a cycle of parents.
+            sql = f"""
+        WITH RECURSIVE totals AS ({totals}),
+        closure(ancestor, category) AS (
+            SELECT DISTINCT category, category FROM totals
+            UNION
+            SELECT p.ZPARENTCATEGORY, closure.category
+            FROM closure JOIN ZSYNCOBJECT p ON p.Z_PK = closure.ancestor
+            WHERE p.ZPARENTCATEGORY IS NOT NULL
+        )
+        SELECT closure.ancestor, totals.period, SUM(totals.amount)
+        FROM totals JOIN closure ON closure.category = totals.category
+        GROUP BY 1, 2 ORDER BY 1, 2
+        """
+        return self._fetch("get_category_totals", sql, params, tuples=True)
+
     def get_users(self) -> Dict[ID, str]:
         users_map: Dict[ID, str] = {}
-        cur = self._con.cursor()
-        res = cur.execute(
+        rows = self._fetch(
+            "get_users",
             """
         SELECT Z_PK, ZSYNCLOGIN FROM  "ZUSER"
         
-        """
+        """,
         )
-        for row in res.fetchall():
+        for row in rows:
             users_map[row["Z_PK"]] = row["ZSYNCLOGIN"]
         return users_map
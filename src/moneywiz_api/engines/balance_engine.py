@@ -0,0 +1,114 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from moneywiz_api.types import ID
+
+if TYPE_CHECKING:
+    from moneywiz_api.managers.account_manager import AccountManager
+    from moneywiz_api.managers.transaction_manager import TransactionManager
+
+
+class BalanceEngine:
+    """
+    Per-account running balances.
+
+    Every account gets a timeline of its transaction datetimes, in order, with the
+    prefix sums of their amounts. A balance at any point in time is then the
+    opening balance plus one prefix sum found by binary search.
+    """
+
+    def __init__(
+        self,
+        account_manager: "AccountManager",
+        transaction_manager: "TransactionManager",
+    ):
+        self._account_manager = account_manager
+
+        self._timelines: Dict[ID, Tuple[List[datetime], List[Decimal]]] = {}
+        for account_id in transaction_manager.account_ids():
+            # Already in date order, from the account index
+            transactions = transaction_manager.get_all_for_account(account_id)
+            self._timelines[account_id] = (
+                [x.datetime for x in transactions],
+                list(accumulate(x.amount for x in transactions)),
+            )
+        # NumPy copies of the timelines, made on first use by `balances_at`
+        self._arrays: Dict[ID, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _opening_balance(self, account_id: ID) -> Decimal:
+        account = self._account_manager.get(account_id)
+        return account.opening_balance if account else Decimal(0)
+
+    def balance(self, account_id: ID, at: Optional[datetime] = None) -> Decimal:
+        """
+        Balance of an account, in the account currency.
+
+        :param account_id:
+        :param at: inclusive, latest balance if None
+        :return:
+        """
+        balance = self._opening_balance(account_id)
+        timeline = self._timelines.get(account_id)
+        if timeline is None:
+            return balance
+        times, sums = timeline
+        idx = len(times) if at is None else bisect_right(times, at)
+        return balance + sums[idx - 1] if idx else balance
+
+    def balances_at(self, account_id: ID, points: np.ndarray) -> np.ndarray:
+        """
+        Vectorised `balance`, as float64.
+
+        :param points: datetime64 array, each point inclusive
+        :return: the balance of the account at each point
+        """
+        opening = float(self._opening_balance(account_id))
+        if account_id not in self._timelines:
+            return np.full(points.shape, opening)
+        if account_id not in self._arrays:
+            times, sums = self._timelines[account_id]
+            self._arrays[account_id] = (
+                np.array(times, dtype="datetime64[us]"),
+                np.array(sums, dtype="float64"),
+            )
+        times64, sums64 = self._arrays[account_id]
+        idx = np.searchsorted(times64, points, side="right")
+        return opening + np.where(idx > 0, sums64[np.maximum(idx - 1, 0)], 0.0)
+
+    def daily_balances(
+        self, account_ids: List[ID], start: date, end: date
+    ) -> Tuple[List[date], Dict[ID, List[Decimal]]]:
+        """
+        End of day balances of the given accounts for every day from start to end
+        (inclusive), in one forward pass over each timeline.
+
+        :return: the days, and the balances of each account aligned with them
+        """
+        days = [start + timedelta(days=x) for x in range((end - start).days + 1)]
+        series: Dict[ID, List[Decimal]] = {}
+        for account_id in account_ids:
+            opening = self._opening_balance(account_id)
+            times, sums = self._timelines.get(account_id, ([], []))
+            balances: List[Decimal] = []
+            idx = bisect_left(times, datetime.combine(start, time.min))
+            for day in days:
+                next_midnight = datetime.combine(day + timedelta(days=1), time.min)
+                while idx < len(times) and times[idx] < next_midnight:
+                    idx += 1
+                balances.append(opening + sums[idx - 1] if idx else opening)
+            series[account_id] = balances
+        return days, series
+
+    def daily_balances_for_user(
+        self, user_id: ID, start: date, end: date
+    ) -> Tuple[List[date], Dict[ID, List[Decimal]]]:
+        """
+        `daily_balances` of every account of a user.
+        """
+        accounts = self._account_manager.get_accounts_for_user(user_id)
+        return self.daily_balances([x.id for x in accounts], start, end)
@@ -0,0 +1,93 @@
+import logging
+from typing import Dict, FrozenSet, List, Mapping, Set, Tuple
+
+from moneywiz_api.model.category import Category
+from moneywiz_api.types import ID
+
+logger = logging.getLogger(__name__)
+
+
+class CategoryTree:
+    """
+    Closure of the category hierarchy: the ancestors, name path and descendants of
+    every category, computed once so that lookups do not walk parent pointers.
+
+    A parent that is not loaded ends the chain, like a root. So does a parent
+    already in the chain (corrupt data): the chain stops before repeating it.
+    """
+
+    def __init__(self, categories: Mapping[ID, Category]):
+        # Root first, the category itself excluded
+        self._ancestors: Dict[ID, Tuple[ID, ...]] = {}
+        # Root first, the category itself included
+        self._names: Dict[ID, Tuple[str, ...]] = {}
+        self._descendants: Dict[ID, FrozenSet[ID]] = {}
+
+        for category_id in categories:
+            self._resolve(category_id, categories)
+
+        descendants: Dict[ID, Set[ID]] = {x: set() for x in categories}
+        for category_id, ancestors in self._ancestors.items():
+            for ancestor in ancestors:
+                descendants[ancestor].add(category_id)
+        self._descendants = {k: frozenset(v) for k, v in descendants.items()}
+
+    def _resolve(self, category_id: ID, categories: Mapping[ID, Category]) -> None:
+        # Climb to the first resolved (or root) category, then fill in downwards
+        chain: List[ID] = []
+        current = category_id
+        while current not in self._ancestors:
+            if current in chain:
+                logger.warning("Cycle in the parents of category %s", category_id)
+                break
+            chain.append(current)
+            parent_id = categories[current].parent_id
+            if not parent_id or parent_id not in categories:
+                break
+            current = parent_id
+        else:
+            # Stopped on a resolved category: it is the parent of the top of chain
+            chain.append(current)
+
+        for idx in range(len(chain) - 1, -1, -1):
+            current = chain[idx]
+            if current in self._ancestors:
+                continue
+            if idx + 1 < len(chain):
+                parent_id = chain[idx + 1]
+                self._ancestors[current] = self._ancestors[parent_id] + (parent_id,)
+                parent_names = self._names[parent_id]
+            else:
+                self._ancestors[current] = ()
+                parent_names = ()
+            self._names[current] = parent_names + (categories[current].name,)
+
+    def __contains__(self, category_id: ID) -> bool:
+        return category_id in self._ancestors
+
+    def names(self, category_id: ID) -> Tuple[str, ...]:
+        """
+        :return: names from the root down to the category, empty if unknown
+        """
+        return self._names.get(category_id, ())
+
+    def ancestors(self, category_id: ID) -> Tuple[ID, ...]:
+        """
+        :return: ids from the root down to the parent of the category
+        """
+        return self._ancestors.get(category_id, ())
+
+    def depth(self, category_id: ID) -> int:
+        """
+        :return: 0 for a root category
+        """
+        return len(self.ancestors(category_id))
+
+    def descendants(self, category_id: ID) -> FrozenSet[ID]:
+        """
+        :return: ids of the children of the category, their children, and so on
+        """
+        return self._descendants.get(category_id, frozenset())
+
+    def is_descendant(self, category_id: ID, ancestor_id: ID) -> bool:
+        return category_id in self.descendants(ancestor_id)
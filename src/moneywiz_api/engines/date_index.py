@@ -0,0 +1,83 @@
+from bisect import bisect_left, bisect_right, insort_right
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Generic, Hashable, Iterable, List, Optional, TypeVar
+
+from moneywiz_api.model.transaction import Transaction
+
+K = TypeVar("K", bound=Hashable)
+
+
+def _by_datetime(transaction: Transaction) -> datetime:
+    return transaction.datetime
+
+
+class DateIndex(Generic[K]):
+    """
+    Transactions grouped by a key, each group kept in date order.
+
+    Transactions with the same datetime stay in the order they were added, like a
+    stable sort over the records would give. While `bulk` is set, additions are
+    appended and only sorted by `end_bulk`.
+    """
+
+    def __init__(self):
+        self._groups: Dict[K, List[Transaction]] = defaultdict(list)
+        self.bulk = False
+
+    def add(self, key: K, transaction: Transaction) -> None:
+        if self.bulk:
+            self._groups[key].append(transaction)
+        else:
+            insort_right(self._groups[key], transaction, key=_by_datetime)
+
+    def groups(self) -> Dict[K, List[Transaction]]:
+        """
+        The group of every key, created on first access: while `bulk` is set,
+        callers adding many transactions can append to them directly.
+        """
+        return self._groups
+
+    def end_bulk(self) -> None:
+        for group in self._groups.values():
+            group.sort(key=_by_datetime)
+        self.bulk = False
+
+    def remove(self, key: K, transaction: Transaction) -> None:
+        group = self._groups.get(key)
+        if not group:
+            return
+        idx = bisect_left(group, transaction.datetime, key=_by_datetime)
+        while idx < len(group) and group[idx].datetime == transaction.datetime:
+            if group[idx] is transaction:
+                del group[idx]
+                break
+            idx += 1
+        if not group:
+            del self._groups[key]
+
+    def get(
+        self,
+        key: K,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Transaction]:
+        """
+        :param key:
+        :param since: inclusive
+        :param until: inclusive
+        :return: a new list, in date order
+        """
+        group = self._groups.get(key)
+        if not group:
+            return []
+        start = 0 if since is None else bisect_left(group, since, key=_by_datetime)
+        end = (
+            len(group)
+            if until is None
+            else bisect_right(group, until, key=_by_datetime)
+        )
+        return group[start:end]
+
+    def keys(self) -> Iterable[K]:
+        return self._groups.keys()
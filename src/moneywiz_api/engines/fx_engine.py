@@ -0,0 +1,178 @@
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    TYPE_CHECKING,
+)
+
+import numpy as np
+
+from moneywiz_api.model.transaction import (
+    DepositTransaction,
+    RefundTransaction,
+    TransferDepositTransaction,
+    TransferWithdrawTransaction,
+    WithdrawTransaction,
+)
+
+if TYPE_CHECKING:
+    from moneywiz_api.managers.account_manager import AccountManager
+    from moneywiz_api.managers.transaction_manager import TransactionManager
+
+Dates = Union[datetime, np.ndarray, Iterable[datetime]]
+
+
+def _as_dates(dates: Dates) -> np.ndarray:
+    if isinstance(dates, datetime):
+        dates = [dates]
+    return np.asarray(dates, dtype="datetime64[us]")
+
+
+class FxEngine:
+    """
+    Exchange rates observed in the transactions, by currency pair and date.
+
+    Deposits, withdraws and refunds in a foreign currency give the rate from their
+    original currency to the account currency, transfers the rate between the
+    currencies of their two accounts. Each observation is kept for both directions
+    of its pair, as date-sorted NumPy arrays, so a rate at any dates is one binary
+    search. Pairs never observed together are triangulated through the `pivot`
+    currency.
+
+    Rates are as of each date: the latest observation on or before it, the first
+    observation for earlier dates. NaN when no rate is known.
+    """
+
+    def __init__(
+        self,
+        account_manager: "AccountManager",
+        transaction_manager: "TransactionManager",
+        pivot: Optional[str] = None,
+    ):
+        """
+        :param pivot: the currency to triangulate through, by default the one
+            with the most observations
+        """
+        observed: Dict[Tuple[str, str], List[Tuple[datetime, float]]] = defaultdict(
+            list
+        )
+
+        def observe(when: datetime, base: Any, quote: Any, rate: Any) -> None:
+            # 1 `base` is worth `rate` `quote`
+            if not base or not quote or base == quote or not rate or rate <= 0:
+                return
+            observed[(base, quote)].append((when, float(rate)))
+            observed[(quote, base)].append((when, 1 / float(rate)))
+
+        for transaction_type in (
+            DepositTransaction,
+            WithdrawTransaction,
+            RefundTransaction,
+        ):
+            for transaction in transaction_manager.get_all_of_type(transaction_type):
+                account = account_manager.get(transaction.account)
+                if account is not None:
+                    observe(
+                        transaction.datetime,
+                        transaction.original_currency,
+                        account.currency,
+                        transaction.original_exchange_rate,
+                    )
+        for transaction in transaction_manager.get_all_of_type(
+            TransferWithdrawTransaction
+        ):
+            observe(
+                transaction.datetime,
+                transaction.original_currency,
+                transaction.recipient_currency,
+                transaction.original_exchange_rate,
+            )
+        for transaction in transaction_manager.get_all_of_type(
+            TransferDepositTransaction
+        ):
+            observe(
+                transaction.datetime,
+                transaction.sender_currency,
+                transaction.original_currency,
+                transaction.original_exchange_rate,
+            )
+
+        self._pairs: Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray]] = {}
+        counts: Counter = Counter()
+        for pair, observations in observed.items():
+            dates = np.array([x for x, _ in observations], dtype="datetime64[us]")
+            rates = np.array([x for _, x in observations], dtype="float64")
+            order = np.argsort(dates, kind="stable")
+            self._pairs[pair] = (dates[order], rates[order])
+            counts[pair[0]] += len(observations)
+
+        if pivot is None and counts:
+            pivot = counts.most_common(1)[0][0]
+        self.pivot = pivot
+
+    def currencies(self) -> Set[str]:
+        """
+        :return: the currencies with at least one observed rate
+        """
+        return {base for base, _ in self._pairs}
+
+    def _direct(self, base: str, quote: str, dates: np.ndarray) -> Optional[np.ndarray]:
+        pair = self._pairs.get((base, quote))
+        if pair is None:
+            return None
+        known, rates = pair
+        idx = np.searchsorted(known, dates, side="right") - 1
+        return rates[np.maximum(idx, 0)]
+
+    def rates(self, base: str, quote: str, dates: Dates) -> np.ndarray:
+        """
+        :return: float64 value of 1 `base` in `quote` at each of `dates`
+        """
+        dates = _as_dates(dates)
+        if base == quote:
+            return np.ones(dates.shape)
+        ret = self._direct(base, quote, dates)
+        if ret is None and self.pivot is not None:
+            to_pivot = self._direct(base, self.pivot, dates)
+            from_pivot = self._direct(self.pivot, quote, dates)
+            if to_pivot is not None and from_pivot is not None:
+                ret = to_pivot * from_pivot
+        return np.full(dates.shape, np.nan) if ret is None else ret
+
+    def rate(
+        self, base: str, quote: str, at: Optional[datetime] = None
+    ) -> Optional[float]:
+        """
+        :param at: latest rate if None
+        :return: value of 1 `base` in `quote`, None when unknown
+        """
+        ret = self.rates(base, quote, datetime.max if at is None else at)[0]
+        return None if np.isnan(ret) else float(ret)
+
+    def convert(
+        self, amounts: Iterable[Any], currencies: Iterable[str], dates: Dates, base: str
+    ) -> np.ndarray:
+        """
+        Convert amounts in mixed currencies to `base` at their dates, one
+        vectorised lookup per currency.
+
+        :param amounts: numbers or Decimals
+        :param currencies: the currency of each amount
+        :param dates: the date of each amount
+        :return: float64 amounts in `base`, NaN where no rate is known
+        """
+        values = np.asarray([float(x) for x in amounts], dtype="float64")
+        currencies = np.asarray(list(currencies), dtype=object)
+        dates = _as_dates(dates)
+        ret = np.full(values.shape, np.nan)
+        for currency in set(currencies.tolist()):
+            mask = currencies == currency
+            ret[mask] = values[mask] * self.rates(currency, base, dates[mask])
+        return ret
@@ -0,0 +1,255 @@
+from bisect import bisect_right
+from collections import deque
+from datetime import datetime
+from decimal import Decimal
+from heapq import merge
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TYPE_CHECKING,
+)
+
+import numpy as np
+
+from moneywiz_api.model.investment_holding import InvestmentHolding
+from moneywiz_api.model.transaction import (
+    InvestmentBuyTransaction,
+    InvestmentExchangeTransaction,
+    InvestmentSellTransaction,
+    InvestmentTransaction,
+    Transaction,
+)
+from moneywiz_api.types import ID
+
+if TYPE_CHECKING:
+    from moneywiz_api.managers.investment_holding_manager import (
+        InvestmentHoldingManager,
+    )
+    from moneywiz_api.managers.transaction_manager import TransactionManager
+
+
+class Position(NamedTuple):
+    """
+    Shares of a holding and what they cost, fees included, in the account currency.
+    """
+
+    number_of_shares: Decimal
+    # Cost of the shares held, sales removing the average cost per share
+    cost_basis: Decimal
+    # Cost of the shares held, sales removing the oldest shares first
+    fifo_cost_basis: Decimal
+
+    @property
+    def average_cost(self) -> Optional[Decimal]:
+        """
+        :return: cost basis per share, None without shares
+        """
+        if not self.number_of_shares:
+            return None
+        return self.cost_basis / self.number_of_shares
+
+
+_EMPTY = Position(Decimal(0), Decimal(0), Decimal(0))
+
+
+def _decimal(value: Any) -> Decimal:
+    # The share counts of exchanges are stored, and decoded, as floats
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+class _Book:
+    """
+    Running position of one holding: the average cost basis, and the FIFO lots of
+    [shares, cost] with their total cost.
+
+    Shares sold without being held (missing history) leave a negative number of
+    shares at no cost; later purchases cover them first.
+    """
+
+    __slots__ = ("shares", "cost", "fifo_cost", "lots")
+
+    def __init__(self, holding: Optional[InvestmentHolding]):
+        self.shares = Decimal(0)
+        self.cost = Decimal(0)
+        self.fifo_cost = Decimal(0)
+        self.lots: Deque[List[Decimal]] = deque()
+        if holding is not None and (holding.opening_number_of_shares or 0) > 0:
+            self.add(
+                holding.opening_number_of_shares,
+                holding._cost_basis_of_missing_ob_shares or Decimal(0),
+            )
+
+    def add(
+        self, shares: Decimal, cost: Decimal, fifo_cost: Optional[Decimal] = None
+    ) -> None:
+        """
+        :param fifo_cost: when the FIFO cost of the shares differs from `cost`
+        """
+        fifo_cost = cost if fifo_cost is None else fifo_cost
+        held = shares if self.shares >= 0 else max(self.shares + shares, Decimal(0))
+        self.shares += shares
+        if held <= 0:
+            return
+        if held != shares:
+            cost, fifo_cost = cost * held / shares, fifo_cost * held / shares
+        self.lots.append([held, fifo_cost])
+        self.cost += cost
+        self.fifo_cost += fifo_cost
+
+    def remove(self, shares: Decimal) -> Tuple[Decimal, Decimal]:
+        """
+        :return: the cost of the removed shares, average and FIFO
+        """
+        average = Decimal(0)
+        if self.shares > 0:
+            held = min(shares, self.shares)
+            average = (
+                self.cost if held == self.shares else self.cost * held / self.shares
+            )
+        fifo, left = Decimal(0), shares
+        while left > 0 and self.lots:
+            lot = self.lots[0]
+            if lot[0] <= left:
+                fifo += lot[1]
+                left -= lot[0]
+                self.lots.popleft()
+            else:
+                taken = lot[1] * left / lot[0]
+                fifo += taken
+                lot[0] -= left
+                lot[1] -= taken
+                left = Decimal(0)
+        self.shares -= shares
+        self.cost -= average
+        self.fifo_cost -= fifo
+        if not self.lots:
+            # Exactly nothing left, whatever the rounding of the partial lots
+            self.cost = self.fifo_cost = Decimal(0)
+        return average, fifo
+
+    def position(self) -> Position:
+        return Position(self.shares, self.cost, self.fifo_cost)
+
+
+class PositionEngine:
+    """
+    Per-holding positions over time.
+
+    All investment transactions are replayed once in date order, starting from the
+    opening shares of every holding (`opening_number_of_shares`, at a cost of
+    `_cost_basis_of_missing_ob_shares`). Buys add shares at their cost, sells
+    remove them, and exchanges move shares and their cost basis from one holding
+    to the other. Every holding gets a timeline of datetimes and positions, so a
+    position at any point in time is found by binary search.
+
+    The positions come from the transactions only, the stored
+    `InvestmentHolding.number_of_shares` can disagree with them.
+    """
+
+    def __init__(
+        self,
+        investment_holding_manager: "InvestmentHoldingManager",
+        transaction_manager: "TransactionManager",
+    ):
+        self._holdings = investment_holding_manager
+        self._timelines: Dict[ID, Tuple[List[datetime], List[Position]]] = {}
+        # NumPy copies of the timelines (times, shares), made on first use by
+        # `shares_at`
+        self._arrays: Dict[ID, Tuple[np.ndarray, np.ndarray]] = {}
+
+        books: Dict[ID, _Book] = {}
+
+        def book(holding_id: ID) -> _Book:
+            if holding_id not in books:
+                books[holding_id] = _Book(investment_holding_manager.get(holding_id))
+            return books[holding_id]
+
+        transactions: Iterable[Transaction] = merge(
+            transaction_manager.get_all_of_type(InvestmentTransaction),
+            transaction_manager.get_all_of_type(InvestmentExchangeTransaction),
+            key=lambda x: x.datetime,
+        )
+        for transaction in transactions:
+            if isinstance(transaction, InvestmentBuyTransaction):
+                book(transaction.investment_holding).add(
+                    transaction.number_of_shares, -transaction.amount
+                )
+                self._record(transaction.investment_holding, transaction, books)
+            elif isinstance(transaction, InvestmentSellTransaction):
+                book(transaction.investment_holding).remove(
+                    transaction.number_of_shares
+                )
+                self._record(transaction.investment_holding, transaction, books)
+            elif isinstance(transaction, InvestmentExchangeTransaction):
+                source = book(transaction.from_investment_holding)
+                average, fifo = source.remove(
+                    -_decimal(transaction.from_number_of_shares)
+                )
+                target = book(transaction.to_investment_holding)
+                shares = _decimal(transaction.to_number_of_shares)
+                if shares:
+                    target.add(shares, average, fifo)
+                for holding_id in (
+                    transaction.from_investment_holding,
+                    transaction.to_investment_holding,
+                ):
+                    self._record(holding_id, transaction, books)
+
+    def _record(
+        self, holding_id: ID, transaction: Transaction, books: Dict[ID, _Book]
+    ) -> None:
+        times, positions = self._timelines.setdefault(holding_id, ([], []))
+        times.append(transaction.datetime)
+        positions.append(books[holding_id].position())
+
+    def position(self, holding_id: ID, at: Optional[datetime] = None) -> Position:
+        """
+        :param holding_id:
+        :param at: inclusive, latest position if None
+        :return:
+        """
+        timeline = self._timelines.get(holding_id)
+        if timeline is not None:
+            times, positions = timeline
+            idx = len(times) if at is None else bisect_right(times, at)
+            if idx:
+                return positions[idx - 1]
+        holding = self._holdings.get(holding_id)
+        return _Book(holding).position() if holding is not None else _EMPTY
+
+    def shares_at(self, holding_id: ID, points: np.ndarray) -> np.ndarray:
+        """
+        Vectorised `position(...).number_of_shares`, as float64.
+
+        :param points: datetime64 array, each point inclusive
+        """
+        opening = float(self.position(holding_id, datetime.min).number_of_shares)
+        timeline = self._timelines.get(holding_id)
+        if timeline is None:
+            return np.full(points.shape, opening)
+        if holding_id not in self._arrays:
+            times, positions = timeline
+            self._arrays[holding_id] = (
+                np.array(times, dtype="datetime64[us]"),
+                np.array([x.number_of_shares for x in positions], dtype="float64"),
+            )
+        times64, shares64 = self._arrays[holding_id]
+        idx = np.searchsorted(times64, points, "right")
+        return np.where(idx > 0, shares64[np.maximum(idx - 1, 0)], opening)
+
+    def positions_for_account(
+        self, account_id: ID, at: Optional[datetime] = None
+    ) -> Dict[ID, Position]:
+        """
+        :return: the position of every holding of the account, by holding id
+        """
+        return {
+            x.id: self.position(x.id, at)
+            for x in self._holdings.get_holdings_for_account(account_id)
+        }
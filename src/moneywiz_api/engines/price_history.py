@@ -0,0 +1,155 @@
+"""
+Manual historical prices of investment holdings, see
+`InvestmentHoldingManager.price_history`.
+
+ZMANUALHISTORICALPRICESPERSHARE holds a binary property list, usually written by
+NSKeyedArchiver, mapping dates (NSDate, seconds since 2001) to prices per share.
+Lists of date and price entries are read as well; anything else decodes to an
+empty history.
+"""
+
+import logging
+import plistlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from moneywiz_api.utils import get_datetime64
+
+logger = logging.getLogger(__name__)
+
+_REFERENCE_DATE = datetime(2001, 1, 1)
+
+
+class PriceHistory:
+    """
+    Prices per share by date: `dates` (datetime64[us], increasing, as stored
+    transaction dates) and `prices` (float64) are aligned arrays.
+    """
+
+    __slots__ = ("dates", "prices")
+
+    def __init__(self, dates: np.ndarray, prices: np.ndarray):
+        self.dates = dates
+        self.prices = prices
+
+    @classmethod
+    def empty(cls) -> "PriceHistory":
+        return cls(np.empty(0, dtype="datetime64[us]"), np.empty(0, dtype="float64"))
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[Tuple[float, float]]) -> "PriceHistory":
+        """
+        :param pairs: (stored date, price), in any order; the last price of a date
+            wins
+        """
+        by_date = dict(pairs)
+        if not by_date:
+            return cls.empty()
+        raw_dates = np.fromiter(by_date.keys(), dtype="float64", count=len(by_date))
+        prices = np.fromiter(by_date.values(), dtype="float64", count=len(by_date))
+        order = np.argsort(raw_dates, kind="stable")
+        return cls(get_datetime64(raw_dates[order]), prices[order])
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def price_at(
+        self, dates: Union[datetime, np.ndarray, Iterable[datetime]]
+    ) -> np.ndarray:
+        """
+        Vectorised lookup of the latest price on or before each date.
+
+        :param dates: a datetime, or datetimes / a datetime64 array
+        :return: float64 prices aligned with `dates`, NaN before the first price
+        """
+        if isinstance(dates, datetime):
+            dates = [dates]
+        wanted = np.asarray(dates, dtype="datetime64[us]")
+        idx = np.searchsorted(self.dates, wanted, side="right") - 1
+        if not len(self.prices):
+            return np.full(wanted.shape, np.nan)
+        return np.where(idx >= 0, self.prices[np.maximum(idx, 0)], np.nan)
+
+
+def _unarchive(archive: Dict[str, Any]) -> Any:
+    """
+    Rebuild the object graph of an NSKeyedArchiver plist into plain values:
+    dictionaries, lists, strings, numbers and NSDates as stored dates.
+    """
+    objects: List[Any] = archive["$objects"]
+
+    def resolve(value: Any, depth: int = 0) -> Any:
+        if depth > 32:
+            raise ValueError("Archive nested too deep")
+        if isinstance(value, plistlib.UID):
+            value = objects[value.data]
+        if isinstance(value, str) and value == "$null":
+            return None
+        if not isinstance(value, dict):
+            return value
+        if "NS.time" in value:
+            return float(value["NS.time"])
+        if "NS.string" in value:
+            return value["NS.string"]
+        if "NS.keys" in value:
+            return {
+                resolve(k, depth + 1): resolve(v, depth + 1)
+                for k, v in zip(value["NS.keys"], value["NS.objects"])
+            }
+        if "NS.objects" in value:
+            return [resolve(x, depth + 1) for x in value["NS.objects"]]
+        return {
+            k: resolve(v, depth + 1) for k, v in value.items() if not k.startswith("$")
+        }
+
+    return resolve(archive["$top"]["root"])
+
+
+def _stored_date(value: Any) -> Optional[float]:
+    if isinstance(value, datetime):
+        # Plain plists hold UTC dates, NSKeyedArchiver ones seconds since 2001
+        return (value - _REFERENCE_DATE).total_seconds()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
+def _entry(entry: Any) -> Optional[Tuple[float, float]]:
+    if isinstance(entry, dict):
+        date = next((v for k, v in entry.items() if "date" in str(k).lower()), None)
+        price = next((v for k, v in entry.items() if "price" in str(k).lower()), None)
+    elif isinstance(entry, (list, tuple)) and len(entry) == 2:
+        date, price = entry
+    else:
+        return None
+    date = _stored_date(date)
+    if date is None or not isinstance(price, (int, float)):
+        return None
+    return date, float(price)
+
+
+def decode_price_history(blob: Optional[bytes]) -> PriceHistory:
+    """
+    :param blob: ZMANUALHISTORICALPRICESPERSHARE of a holding
+    :return: the decoded history, empty when there is none or it is unreadable
+    """
+    if not blob:
+        return PriceHistory.empty()
+    try:
+        value = plistlib.loads(blob)
+        if isinstance(value, dict) and value.get("$archiver") == "NSKeyedArchiver":
+            value = _unarchive(value)
+    except Exception:  # pylint: disable=broad-except
+        logger.debug("Ignoring unreadable historical prices", exc_info=True)
+        return PriceHistory.empty()
+
+    # A dictionary of prices by date, or a list of entries
+    if isinstance(value, dict):
+        entries: List[Any] = list(value.items())
+    elif isinstance(value, list):
+        entries = value
+    else:
+        return PriceHistory.empty()
+    return PriceHistory.from_pairs(x for x in map(_entry, entries) if x is not None)
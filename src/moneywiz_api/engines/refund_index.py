@@ -0,0 +1,54 @@
+from decimal import Decimal
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+from moneywiz_api.types import ID
+
+if TYPE_CHECKING:
+    from moneywiz_api.managers.transaction_manager import TransactionManager
+
+
+class RefundIndex:
+    """
+    Both directions of the refund links: the withdraw of every refund, and the
+    refunds of every withdraw in date order with their cumulated amount.
+
+    Links to transactions that are not loaded are left out.
+    """
+
+    def __init__(self, transaction_manager: "TransactionManager"):
+        self._withdraw_for: Dict[ID, ID] = {}
+        self._refunds: Dict[ID, List[ID]] = {}
+        self._refunded: Dict[ID, Decimal] = {}
+
+        links = transaction_manager.refund_maps
+        refunds = []
+        for refund_id, withdraw_id in links.items():
+            refund = transaction_manager.get(refund_id)
+            if refund is not None and transaction_manager.get(withdraw_id) is not None:
+                refunds.append(refund)
+        refunds.sort(key=lambda x: x.datetime)
+        for refund in refunds:
+            withdraw_id = links[refund.id]
+            self._withdraw_for[refund.id] = withdraw_id
+            self._refunds.setdefault(withdraw_id, []).append(refund.id)
+            self._refunded[withdraw_id] = (
+                self._refunded.get(withdraw_id, Decimal(0)) + refund.amount
+            )
+
+    def withdraw_for(self, refund_id: ID) -> Optional[ID]:
+        return self._withdraw_for.get(refund_id)
+
+    def refunds_for(self, withdraw_id: ID) -> List[ID]:
+        """
+        :return: ids of the refunds of the withdraw, in date order
+        """
+        return self._refunds.get(withdraw_id, [])
+
+    def refunded_amount(self, withdraw_id: ID) -> Decimal:
+        """
+        :return: total amount refunded (positive), 0 without refunds
+        """
+        return self._refunded.get(withdraw_id, Decimal(0))
+
+    def is_linked_refund(self, transaction_id: ID) -> bool:
+        return transaction_id in self._withdraw_for
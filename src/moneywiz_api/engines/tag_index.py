@@ -0,0 +1,106 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from moneywiz_api.types import ID
+
+if TYPE_CHECKING:
+    from moneywiz_api.managers.transaction_manager import TransactionManager
+
+
+class TagIndex:
+    """
+    Inverted index of the transaction tags: the ids of the transactions of every
+    tag as a sorted int64 array, so combining tags is a merge of sorted arrays
+    rather than a scan of every transaction.
+
+    The dates of the transactions of `TransactionManager.get_all` are kept aligned
+    with their sorted ids, for date ranges and date ordering. Like there, budget
+    transfers are left out, as are the tags of transactions that are not loaded.
+    """
+
+    def __init__(self, transaction_manager: "TransactionManager"):
+        transactions = transaction_manager.get_all()
+        ids = np.fromiter((x.id for x in transactions), dtype="int64")
+        dates = pd.to_datetime([x.datetime for x in transactions]).values
+        order = np.argsort(ids, kind="stable")
+        self._ids = ids[order]
+        self._dates = dates.astype("datetime64[us]")[order]
+
+        by_tag: Dict[ID, List[ID]] = {}
+        for transaction_id, tag_ids in transaction_manager.tags_map.items():
+            for tag_id in tag_ids:
+                by_tag.setdefault(tag_id, []).append(transaction_id)
+        self._by_tag: Dict[ID, np.ndarray] = {}
+        for tag_id, transaction_ids in by_tag.items():
+            tagged = np.unique(np.array(transaction_ids, dtype="int64"))
+            tagged = tagged[np.isin(tagged, self._ids)]
+            if len(tagged):
+                self._by_tag[tag_id] = tagged
+
+    def tag_ids(self) -> List[ID]:
+        """
+        :return: the tags with at least one indexed transaction
+        """
+        return list(self._by_tag)
+
+    def ids_for(self, tag_id: ID) -> np.ndarray:
+        """
+        :return: sorted ids of the transactions with the tag
+        """
+        return self._by_tag.get(tag_id, np.empty(0, dtype="int64"))
+
+    def query(
+        self,
+        all_of: Iterable[ID] = (),
+        any_of: Iterable[ID] = (),
+        none_of: Iterable[ID] = (),
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> np.ndarray:
+        """
+        Transactions with every tag of `all_of`, at least one of `any_of` and none
+        of `none_of`, within the dates. Without `all_of` nor `any_of`, every
+        transaction is a candidate.
+
+        :param since: inclusive
+        :param until: inclusive
+        :return: sorted transaction ids
+        """
+        all_of, any_of = list(all_of), list(any_of)
+        ret: Optional[np.ndarray] = None
+        for tag_id in all_of:
+            ids = self.ids_for(tag_id)
+            ret = ids if ret is None else np.intersect1d(ret, ids, assume_unique=True)
+        if any_of:
+            ids = np.unique(np.concatenate([self.ids_for(x) for x in any_of]))
+            ret = ids if ret is None else np.intersect1d(ret, ids, assume_unique=True)
+        if ret is None:
+            ret = self._ids
+        for tag_id in none_of:
+            ret = np.setdiff1d(ret, self.ids_for(tag_id), assume_unique=True)
+        if since is not None or until is not None:
+            dates = self.dates_for(ret)
+            keep = np.ones(len(ret), dtype=bool)
+            if since is not None:
+                keep &= dates >= np.datetime64(since, "us")
+            if until is not None:
+                keep &= dates <= np.datetime64(until, "us")
+            ret = ret[keep]
+        return ret
+
+    def dates_for(self, ids: np.ndarray) -> np.ndarray:
+        """
+        :param ids: sorted ids of loaded transactions
+        :return: their datetime64 dates
+        """
+        return self._dates[np.searchsorted(self._ids, ids)]
+
+    def isin(self, ids: Iterable[ID], **query) -> np.ndarray:
+        """
+        Boolean mask of the `ids` (e.g. the id column of `transactions_frame()`)
+        matching `query(**query)`.
+        """
+        return np.isin(np.asarray(ids, dtype="int64"), self.query(**query))
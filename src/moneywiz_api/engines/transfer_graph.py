@@ -0,0 +1,196 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    TYPE_CHECKING,
+)
+
+import numpy as np
+import pandas as pd
+
+from moneywiz_api.model.transaction import (
+    Transaction,
+    TransferDepositTransaction,
+    TransferWithdrawTransaction,
+)
+from moneywiz_api.types import ID
+
+if TYPE_CHECKING:
+    from moneywiz_api.managers.transaction_manager import TransactionManager
+
+# Pandas periods of the granularities of `DatabaseAccessor.get_category_totals`
+_PERIODS: Dict[Optional[str], Optional[str]] = {
+    None: None,
+    "day": "D",
+    # Weeks start on Monday
+    "week": "W-SUN",
+    "month": "M",
+    "year": "Y",
+}
+
+
+class TransferPair(NamedTuple):
+    """
+    The two legs of a transfer between accounts. A leg is None when its
+    counterpart does not exist or does not point back at the other leg.
+    """
+
+    withdraw: Optional[TransferWithdrawTransaction]
+    deposit: Optional[TransferDepositTransaction]
+
+    @property
+    def complete(self) -> bool:
+        return self.withdraw is not None and self.deposit is not None
+
+    @property
+    def sender_account(self) -> ID:
+        if self.withdraw is not None:
+            return self.withdraw.account
+        return self.deposit.sender_account
+
+    @property
+    def recipient_account(self) -> ID:
+        if self.deposit is not None:
+            return self.deposit.account
+        return self.withdraw.recipient_account
+
+    @property
+    def datetime(self) -> datetime:
+        return (self.withdraw or self.deposit).datetime
+
+    @property
+    def sent(self) -> Decimal:
+        """
+        Positive amount leaving the sender account, in its currency.
+        """
+        if self.withdraw is not None:
+            return -self.withdraw.amount
+        return -self.deposit.sender_amount
+
+    @property
+    def received(self) -> Decimal:
+        """
+        Positive amount reaching the recipient account, in its currency.
+        """
+        if self.deposit is not None:
+            return self.deposit.amount
+        return self.withdraw.recipient_amount
+
+
+class TransferGraph:
+    """
+    Transfers resolved into pairs of withdraw and deposit legs, in date order,
+    with the outbound and inbound transfers of every account.
+
+    A withdraw and a deposit are paired when each references the other
+    (`recipient_transaction`, `sender_transaction`); legs without such a
+    counterpart make pairs of their own, listed by `unmatched`.
+    """
+
+    def __init__(self, transaction_manager: "TransactionManager"):
+        self._pairs: List[TransferPair] = []
+        self._by_transaction: Dict[ID, TransferPair] = {}
+        self._outbound: Dict[ID, List[TransferPair]] = {}
+        self._inbound: Dict[ID, List[TransferPair]] = {}
+
+        # Both lists are in date order, so are the pairs of the merge below
+        withdraws = transaction_manager.get_all_of_type(TransferWithdrawTransaction)
+        deposits = transaction_manager.get_all_of_type(TransferDepositTransaction)
+        paired: Set[ID] = set()
+        for withdraw in withdraws:
+            deposit = transaction_manager.get(withdraw.recipient_transaction)
+            if (
+                isinstance(deposit, TransferDepositTransaction)
+                and deposit.sender_transaction == withdraw.id
+            ):
+                paired.add(deposit.id)
+                self._pairs.append(TransferPair(withdraw, deposit))
+            else:
+                self._pairs.append(TransferPair(withdraw, None))
+        unpaired = [TransferPair(None, x) for x in deposits if x.id not in paired]
+        if unpaired:
+            self._pairs = sorted(self._pairs + unpaired, key=lambda x: x.datetime)
+
+        for pair in self._pairs:
+            for leg in pair[:2]:
+                if leg is not None:
+                    self._by_transaction[leg.id] = pair
+            self._outbound.setdefault(pair.sender_account, []).append(pair)
+            self._inbound.setdefault(pair.recipient_account, []).append(pair)
+
+    def pairs(self) -> List[TransferPair]:
+        return self._pairs
+
+    def pair_for(self, transaction_id: ID) -> Optional[TransferPair]:
+        """
+        :return: the transfer a withdraw or deposit leg belongs to
+        """
+        return self._by_transaction.get(transaction_id)
+
+    def is_transfer(self, transaction_id: ID) -> bool:
+        return transaction_id in self._by_transaction
+
+    def external(self, transactions: Iterable[Transaction]) -> List[Transaction]:
+        """
+        :return: the transactions that are not a leg of a transfer between accounts
+        """
+        by_transaction = self._by_transaction
+        return [x for x in transactions if x.id not in by_transaction]
+
+    def outbound(self, account_id: ID) -> List[TransferPair]:
+        return self._outbound.get(account_id, [])
+
+    def inbound(self, account_id: ID) -> List[TransferPair]:
+        return self._inbound.get(account_id, [])
+
+    def unmatched(self) -> List[TransferPair]:
+        """
+        :return: transfers missing a leg, or whose legs do not reference each other
+        """
+        return [x for x in self._pairs if not x.complete]
+
+    def flows(self, granularity: Optional[str] = "month") -> pd.DataFrame:
+        """
+        Money moved from account to account per period.
+
+        :param granularity: "day", "week", "month", "year", or None for all time
+        :return: columns period (datetime64 of the period start, NaT without
+            granularity), sender_account, recipient_account (int64), sent,
+            received (float64, in the currency of each account) and transfers
+            (int64), by period, sender then recipient
+        """
+        if granularity not in _PERIODS:
+            raise ValueError(
+                f"granularity must be one of {list(_PERIODS)}, not {granularity}"
+            )
+        pairs = self._pairs
+        frame = pd.DataFrame(
+            {
+                "period": np.array([x.datetime for x in pairs], dtype="datetime64[us]"),
+                "sender_account": np.array(
+                    [x.sender_account for x in pairs], dtype="int64"
+                ),
+                "recipient_account": np.array(
+                    [x.recipient_account for x in pairs], dtype="int64"
+                ),
+                "sent": np.array([x.sent for x in pairs], dtype="float64"),
+                "received": np.array([x.received for x in pairs], dtype="float64"),
+                "transfers": np.ones(len(pairs), dtype="int64"),
+            }
+        )
+        period = _PERIODS[granularity]
+        if period is None:
+            frame["period"] = pd.NaT
+        else:
+            frame["period"] = frame["period"].dt.to_period(period).dt.start_time
+        return frame.groupby(
+            ["period", "sender_account", "recipient_account"],
+            as_index=False,
+            sort=True,
+            dropna=False,
+        ).sum()
@@ -0,0 +1,134 @@
+"""
+Columnar pandas views of the MoneyWiz records, built straight from ZSYNCOBJECT
+columns without decoding `Record` objects.
+
+The columns follow the field plans of the model classes (one column per public
+attribute), typed by their converter:
+
+- ids and other integers: int64 (nullable Int64 when some are missing), other
+  numbers float64
+- amounts (Decimal fields): float64, or int64 scaled by 10**decimal_scale
+- dates: naive local datetime64, as `Record` datetimes
+- booleans: bool
+- currency codes, symbols (`Column.intern`), and the entity `type`: categorical
+
+Values are the stored ones: the per-model `_fix()` corrections are not applied
+and nothing is validated.
+"""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from moneywiz_api.database_accessor import DatabaseAccessor
+from moneywiz_api.model.decoder import Column, field_plan
+from moneywiz_api.model.raw_data_handler import RawDataHandler as RDH
+from moneywiz_api.types import ID
+from moneywiz_api.utils import get_datetime64
+
+_DECIMALS = (RDH.to_decimal, RDH.to_nullable_decimal)
+
+
+def _columns(ents: Dict[str, Callable]) -> List[Column]:
+    """
+    Public columns of all the entities, a converter winning over a plain column.
+    """
+    plan: Dict[str, Column] = {}
+    for constructor in ents.values():
+        for column in field_plan(constructor):
+            if column.attr.startswith("_"):
+                continue
+            if column.attr not in plan or plan[column.attr].convert is None:
+                plan[column.attr] = column
+    return list(plan.values())
+
+
+def _integers(values: np.ndarray) -> Any:
+    """
+    :param values: float64 array of whole numbers, NaN for missing ones
+    """
+    missing = np.isnan(values)
+    if missing.any():
+        return pd.arrays.IntegerArray(
+            np.where(missing, 0, values).astype("int64"), missing
+        )
+    return values.astype("int64")
+
+
+def _series_values(
+    column: Column, values: Tuple[Any, ...], decimal_scale: Optional[int]
+) -> Any:
+    if column.convert in _DECIMALS:
+        amounts = np.array(values, dtype="float64")
+        if decimal_scale is None:
+            return amounts
+        return _integers(np.round(amounts * 10**decimal_scale))
+    if column.convert is RDH.to_datetime:
+        return get_datetime64(np.array(values, dtype="float64"))
+    if column.convert is RDH.to_bool:
+        return np.array(values, dtype="float64") == 1
+    if column.intern:
+        return pd.Categorical(values)
+    # SQLite types every value on its own: integers only when all of them are
+    types = {type(x) for x in values if x is not None}
+    if types == {int}:
+        return _integers(np.array(values, dtype="float64"))
+    if types <= {int, float}:
+        return np.array(values, dtype="float64")
+    return np.array(values, dtype="object")
+
+
+def records_frame(
+    db_accessor: DatabaseAccessor,
+    ents: Dict[str, Callable],
+    decimal_scale: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    :param db_accessor:
+    :param ents: entity name -> model class, e.g. `TransactionManager().ents`
+    :param decimal_scale: return amounts as int64 in units of 10**-decimal_scale
+        rather than float64
+    :return: one row per record, ordered by id
+    """
+    columns = _columns(ents)
+    raw = db_accessor.query_columns(
+        ents.keys(), ["Z_ENT", *dict.fromkeys(x.column for x in columns)]
+    )
+    data: Dict[str, Any] = {
+        "type": pd.Categorical(
+            [db_accessor.typename_for(x) for x in raw["Z_ENT"]],
+            categories=list(ents.keys()),
+        )
+    }
+    for column in columns:
+        data[column.attr] = _series_values(column, raw[column.column], decimal_scale)
+    return pd.DataFrame(data)
+
+
+def category_totals_frame(
+    db_accessor: DatabaseAccessor,
+    user_id: Optional[ID] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    granularity: Optional[str] = "month",
+    rollup: bool = True,
+) -> pd.DataFrame:
+    """
+    Category totals aggregated by SQLite, see `DatabaseAccessor.get_category_totals`.
+
+    :return: columns category (int64), period (datetime64 of the period start, NaT
+        without granularity) and amount (float64), by category then period
+    """
+    rows = db_accessor.get_category_totals(user_id, since, until, granularity, rollup)
+    categories, periods, amounts = zip(*rows) if rows else ((), (), ())
+    return pd.DataFrame(
+        {
+            "category": np.array(categories, dtype="int64"),
+            "period": pd.to_datetime(
+                pd.Series(periods, dtype="object"), format="%Y-%m-%d"
+            ),
+            "amount": np.array(amounts, dtype="float64"),
+        }
+    )
@@ -1,5 +1,7 @@
-from typing import Dict, Callable, List
+from typing import Dict, Callable, FrozenSet, List, Optional
 
+from moneywiz_api.database_accessor import DatabaseAccessor
+from moneywiz_api.engines.category_tree import CategoryTree
 from moneywiz_api.model.category import Category
 from moneywiz_api.managers.record_manager import RecordManager
 from moneywiz_api.types import ID, GID
@@ -8,6 +10,8 @@ from moneywiz_api.types import ID, GID
 class CategoryManager(RecordManager[Category]):
     def __init__(self):
         super().__init__()
+        # Built with the records, and again on first use after they change
+        self._tree: Optional[CategoryTree] = None
 
     @property
     def ents(self) -> Dict[str, Callable]:
@@ -15,21 +19,52 @@ class CategoryManager(RecordManager[Category]):
             "Category": Category,
         }
 
+    def load(self, db_accessor: DatabaseAccessor, processes: int = 1) -> None:
+        super().load(db_accessor, processes)
+        self._tree = CategoryTree(self.records())
+
+    def add(self, record: Category) -> None:
+        super().add(record)
+        self._tree = None
+
+    def remove(self, record_id: ID) -> Category | None:
+        self._tree = None
+        return super().remove(record_id)
+
+    def tree(self) -> CategoryTree:
+        if self._tree is None:
+            self._tree = CategoryTree(self.records())
+        return self._tree
+
     def get_name_chain(self, category_id: ID) -> List[str]:
-        ret: List[str] = []
-        current = self.get(category_id)
-        while current:
-            ret.insert(0, current.name)
-            if not current.parent_id:
-                break
-            else:
-                current = self.get(current.parent_id)
-        return ret
+        return list(self.tree().names(category_id))
 
     def get_name_chain_by_gid(self, category_gid: GID) -> List[str]:
         current = self.get_by_gid(category_gid)
         return self.get_name_chain(current.id)
 
+    def get_depth(self, category_id: ID) -> int:
+        return self.tree().depth(category_id)
+
+    def get_ancestors(self, category_id: ID) -> List[ID]:
+        """
+        :return: ids from the root category down to the parent of the category
+        """
+        return list(self.tree().ancestors(category_id))
+
+    def descendants(self, category_id: ID) -> FrozenSet[ID]:
+        """
+        :return: ids of the subcategories of the category, at any depth
+        """
+        return self.tree().descendants(category_id)
+
+    def is_descendant(self, category_id: ID, ancestor_id: ID) -> bool:
+        """
+        :return: whether `category_id` is a subcategory, at any depth, of
+            `ancestor_id`
+        """
+        return self.tree().is_descendant(category_id, ancestor_id)
+
     def get_categories_for_user(self, user_id: ID) -> List[Category]:
         return sorted(
             [x for _, x in self.records().items() if x.user == user_id],
@@ -1,6 +1,11 @@
-from typing import Dict, Callable, List
+from datetime import datetime
+from typing import Dict, Callable, Iterable, List, Optional, Union
 from decimal import Decimal
 
+import numpy as np
+
+from moneywiz_api.database_accessor import DatabaseAccessor
+from moneywiz_api.engines.price_history import PriceHistory, decode_price_history
 from moneywiz_api.model.investment_holding import InvestmentHolding
 from moneywiz_api.managers.record_manager import RecordManager
 from moneywiz_api.types import ID
@@ -9,6 +14,9 @@ from moneywiz_api.types import ID
 class InvestmentHoldingManager(RecordManager[InvestmentHolding]):
     def __init__(self):
         super().__init__()
+        self._db_accessor: Optional[DatabaseAccessor] = None
+        # Decoded on first access, see `price_history`
+        self._price_histories: Dict[ID, PriceHistory] = {}
 
     @property
     def ents(self) -> Dict[str, Callable]:
@@ -16,9 +24,63 @@ class InvestmentHoldingManager(RecordManager[InvestmentHolding]):
             "InvestmentHolding": InvestmentHolding,
         }
 
+    def load(self, db_accessor: DatabaseAccessor, processes: int = 1) -> None:
+        super().load(db_accessor, processes)
+        self._db_accessor = db_accessor
+        self._price_histories = {}
+
+    def __getstate__(self):
+        # Snapshots hold no connection, see `attach`; the prices are decoded on use
+        state = self.__dict__.copy()
+        state["_db_accessor"] = None
+        state["_price_histories"] = {}
+        return state
+
+    def attach(self, db_accessor: DatabaseAccessor) -> None:
+        self._db_accessor = db_accessor
+
+    def add(self, record: InvestmentHolding) -> None:
+        super().add(record)
+        self._price_histories.pop(record.id, None)
+
+    def remove(self, record_id: ID) -> InvestmentHolding | None:
+        self._price_histories.pop(record_id, None)
+        return super().remove(record_id)
+
     def get_holdings_for_account(self, account_id: ID) -> List[InvestmentHolding]:
         return [x for _, x in self.records().items() if x.account == account_id]
 
+    def price_histories(self, holding_ids: Iterable[ID]) -> Dict[ID, PriceHistory]:
+        """
+        The manual historical prices of the holdings, read and decoded on first
+        access (all the missing ones in one query), then cached.
+
+        :return: by holding id, empty histories for holdings without prices
+        """
+        holding_ids = list(holding_ids)
+        missing = [x for x in holding_ids if x not in self._price_histories]
+        if missing:
+            blobs: Dict[ID, bytes] = {}
+            if self._db_accessor is not None:
+                blobs = self._db_accessor.get_historical_prices(missing)
+            for holding_id in missing:
+                self._price_histories[holding_id] = decode_price_history(
+                    blobs.get(holding_id)
+                )
+        return {x: self._price_histories[x] for x in holding_ids}
+
+    def price_history(self, holding_id: ID) -> PriceHistory:
+        return self.price_histories([holding_id])[holding_id]
+
+    def price_at(
+        self, holding_id: ID, dates: Union[datetime, np.ndarray, Iterable[datetime]]
+    ) -> np.ndarray:
+        """
+        :return: float64 price per share of the holding at each date, from its
+            manual historical prices, NaN before the first one
+        """
+        return self.price_history(holding_id).price_at(dates)
+
     def update_last_price(self, latest_price: Decimal):
         raise NotImplementedError()
 
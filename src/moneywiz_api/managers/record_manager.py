@@ -1,32 +1,228 @@
+import gc
 from abc import ABC, abstractmethod
-from typing import Dict, Generic, TypeVar, Callable
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    TypeVar,
+    Callable,
+    List,
+    Set,
+    Tuple,
+)
 
 from moneywiz_api.database_accessor import DatabaseAccessor
+from moneywiz_api.model.decoder import row_decoder
 from moneywiz_api.model.record import Record
-from moneywiz_api.types import ID, GID
+from moneywiz_api.types import ENT_ID, ID, GID
 
 
 T = TypeVar("T", bound=Record)
 
+# Z_PK ranges queued per worker process, so a slow range does not hold up the rest
+_RANGES_PER_PROCESS = 2
+
+
+class RefreshResult(NamedTuple):
+    inserted: Set[ID]
+    updated: Set[ID]
+    deleted: Set[ID]
+
+    def changed(self) -> Set[ID]:
+        return self.inserted | self.updated | self.deleted
+
 
 class RecordManager(ABC, Generic[T]):
     def __init__(self):
         self._records: Dict[ID, T] = {}
         self._gid_to_id: Dict[GID, ID] = {}
+        # Z_OPT of every loaded record, and the sync state they were loaded at
+        self._versions: Dict[ID, int] = {}
+        self._sync_state: Tuple[int, int, int] = (0, 0, 0)
 
     @property
     @abstractmethod
     def ents(self) -> Dict[str, Callable]:
         raise NotImplementedError()
 
-    def load(self, db_accessor: DatabaseAccessor) -> None:
-        records = db_accessor.query_objects(self.ents.keys())
+    def columns(self) -> Tuple[str, ...]:
+        """
+        Union of the column projections of every entity this manager loads, plus
+        the Z_OPT version column used by `refresh`.
+        """
+        ret: List[str] = []
+        for constructor in self.ents.values():
+            for column in constructor.columns():
+                if column not in ret:
+                    ret.append(column)
+        ret.append("Z_OPT")
+        return tuple(ret)
+
+    def load(self, db_accessor: DatabaseAccessor, processes: int = 1) -> None:
+        """
+        :param processes: with more than one, the rows are split in Z_PK ranges
+            decoded by a pool of that many processes, see `_load_in_processes`
+        """
+        self._sync_state = db_accessor.get_sync_state(self.ents.keys())
+        if processes > 1:
+            self._load_in_processes(db_accessor, processes)
+        else:
+            rows = db_accessor.query_objects(self.ents.keys(), self.columns())
+            self._add_loaded(self._decode_rows(db_accessor, rows))
+
+    def _load_in_processes(self, db_accessor: DatabaseAccessor, processes: int) -> None:
+        """
+        Each worker process queries its Z_PK ranges on its own read-only connection
+        and sends the decoded records back. They are added here, by entity then
+        Z_PK, so the duplicate gid check and the indexes work as usual.
+        Records arrive without their raw row, see `DatabaseAccessor.detached_raw`.
+
+        On platforms starting processes with "spawn" (Windows, macOS), the calling
+        script needs an `if __name__ == "__main__":` guard.
+        """
+        ranges = db_accessor.get_pk_ranges(
+            self.ents.keys(), processes * _RANGES_PER_PROCESS
+        )
+        # Collections would keep walking the records being received, for nothing
+        gc.disable()
+        try:
+            with ProcessPoolExecutor(processes) as pool:
+                chunks = list(
+                    pool.map(
+                        _decode_range,
+                        repeat(type(self)),
+                        repeat(db_accessor.process_kwargs()),
+                        ranges,
+                    )
+                )
+        finally:
+            gc.enable()
 
-        for record in records:
-            typename = db_accessor.typename_for(record["Z_ENT"])
-            if typename in self.ents:
-                obj = self.ents[typename](record)
-                self.add(obj)
+        # By entity, then Z_PK. The single query has no ORDER BY; this is merely the
+        # order SQLite usually returns it in, scanning the Z_ENT index
+        by_ent: Dict[ENT_ID, List[Tuple[T, int]]] = defaultdict(list)
+        for chunk, query_stats in chunks:
+            for ent, decoded in chunk.items():
+                by_ent[ent] += decoded
+            for name, stats in query_stats.items():
+                db_accessor.query_stats[name].merge(stats)
+        raw = db_accessor.detached_raw()
+        for decoded in by_ent.values():
+            for record, _ in decoded:
+                record._raw = raw
+        self._add_loaded(decoded for ent in sorted(by_ent) for decoded in by_ent[ent])
+
+    def _decode_rows(
+        self, db_accessor: DatabaseAccessor, rows: List[Any]
+    ) -> Iterator[Tuple[T, int]]:
+        """
+        :return: the record and Z_OPT of every row of the entities of this manager
+        """
+        if not rows:
+            return
+
+        # Resolve column positions once, then decode every row by position
+        columns = tuple(rows[0].keys())
+        ent_idx = columns.index("Z_ENT")
+        opt_idx = columns.index("Z_OPT")
+        decoders = self._decoders(db_accessor, columns)
+        for row in rows:
+            decoder = decoders.get(row[ent_idx])
+            if decoder is not None:
+                yield decoder(row), row[opt_idx]
+
+    def _add_rows(self, db_accessor: DatabaseAccessor, rows: List[Any]) -> None:
+        add = self.add
+        versions = self._versions
+        for record, version in self._decode_rows(db_accessor, rows):
+            add(record)
+            versions[record.id] = version
+
+    def _add_loaded(self, decoded: Iterable[Tuple[T, int]]) -> None:
+        """
+        Add the records of a load, with their Z_OPT. Managers with indexes to keep
+        up override it with a bulk path; `add` stays the path of `refresh`.
+        """
+        add = self.add
+        versions = self._versions
+        for record, version in decoded:
+            add(record)
+            versions[record.id] = version
+
+    def _decoders(
+        self, db_accessor: DatabaseAccessor, columns: Tuple[str, ...]
+    ) -> Dict[ENT_ID, Callable[[Any], T]]:
+        """
+        :return: the compiled row decoder of every entity, keyed by Z_ENT
+        """
+        return {
+            db_accessor.ent_for(typename): row_decoder(
+                constructor, columns, db_accessor.decode_options
+            )
+            for typename, constructor in self.ents.items()
+        }
+
+    def refresh(self, db_accessor: DatabaseAccessor) -> RefreshResult:
+        """
+        Apply the rows inserted, updated or deleted since the last load or refresh.
+
+        The common cases stay proportional to the change: an unchanged table costs
+        one aggregate query, and when only new rows were appended (the old rows
+        still fingerprint the same below the previous Z_PK high-water mark) only
+        those rows are fetched. Otherwise the Z_OPT of every row is compared to
+        find the updated and deleted ones.
+
+        :param db_accessor:
+        :return: ids of the inserted, updated and deleted records
+        """
+        ret = RefreshResult(set(), set(), set())
+        typenames = self.ents.keys()
+        sync_state = db_accessor.get_sync_state(typenames)
+        if sync_state == self._sync_state:
+            return ret
+
+        high_water = self._sync_state[1]
+        if db_accessor.get_sync_state(typenames, up_to_pk=high_water) == (
+            self._sync_state
+        ):
+            rows = db_accessor.query_objects(
+                typenames, self.columns(), after_pk=high_water
+            )
+            for row in rows:
+                # Rows written while the previous refresh was running may be known
+                known = row["Z_PK"] in self._versions
+                (ret.updated if known else ret.inserted).add(row["Z_PK"])
+        else:
+            versions = db_accessor.get_versions(typenames)
+            for record_id, version in versions.items():
+                known = self._versions.get(record_id)
+                if known is None:
+                    ret.inserted.add(record_id)
+                elif known != version:
+                    ret.updated.add(record_id)
+            ret.deleted.update(self._versions.keys() - versions.keys())
+            rows = db_accessor.query_objects_by_ids(
+                typenames, ret.inserted | ret.updated, self.columns()
+            )
+
+        for record_id in ret.updated | ret.deleted:
+            self.remove(record_id)
+        self._add_rows(db_accessor, rows)
+        self._sync_state = sync_state
+        return ret
+
+    def attach(self, db_accessor: DatabaseAccessor) -> None:
+        """
+        Called when the manager was loaded through another accessor (a snapshot, see
+        `snapshot.py`, or a worker connection), for managers reading from the
+        database after their load.
+        """
 
     def add(self, record: T) -> None:
         self._records[record.id] = record
@@ -37,6 +233,13 @@ class RecordManager(ABC, Generic[T]):
 
         self._gid_to_id[record.gid] = record.id
 
+    def remove(self, record_id: ID) -> T | None:
+        record = self._records.pop(record_id, None)
+        if record is not None:
+            self._gid_to_id.pop(record.gid, None)
+        self._versions.pop(record_id, None)
+        return record
+
     def get(self, record_id: ID) -> T | None:
         return self._records.get(record_id)
 
@@ -48,3 +251,28 @@ class RecordManager(ABC, Generic[T]):
 
     def __repr__(self):
         return "\n".join(f"{key}: {value}" for key, value in self.records().items())
+
+
+def _decode_range(
+    manager_type: type, accessor_kwargs: Dict[str, Any], pk_range: Tuple[ID, ID]
+) -> Tuple[Dict[ENT_ID, List[Tuple[Record, int]]], Dict[str, Any]]:
+    """
+    Worker of `RecordManager._load_in_processes`.
+
+    :return: the records of the range with their Z_OPT, by entity in Z_PK order,
+        and the query stats
+    """
+    db_accessor = DatabaseAccessor(**accessor_kwargs)
+    try:
+        manager = manager_type()
+        rows = db_accessor.query_objects(
+            manager.ents.keys(), manager.columns(), pk_range=pk_range
+        )
+        by_ent: Dict[ENT_ID, List[Tuple[Record, int]]] = defaultdict(list)
+        for record, version in manager._decode_rows(db_accessor, rows):
+            by_ent[record._ent].append((record, version))
+        for decoded in by_ent.values():
+            decoded.sort(key=lambda x: x[0].id)
+        return dict(by_ent), db_accessor.query_stats
+    finally:
+        db_accessor.close()
@@ -1,8 +1,29 @@
+from collections import defaultdict
 from datetime import datetime
-from typing import Dict, Callable, List, Tuple
+from heapq import merge
+from typing import (
+    Dict,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Tuple,
+    Optional,
+    Set,
+    Type,
+)
 from decimal import Decimal
 
+import numpy as np
+
 from moneywiz_api.database_accessor import DatabaseAccessor
+from moneywiz_api.engines.balance_engine import BalanceEngine
+from moneywiz_api.engines.date_index import DateIndex
+from moneywiz_api.engines.fx_engine import FxEngine
+from moneywiz_api.engines.position_engine import PositionEngine
+from moneywiz_api.engines.refund_index import RefundIndex
+from moneywiz_api.engines.tag_index import TagIndex
+from moneywiz_api.engines.transfer_graph import TransferGraph
 from moneywiz_api.model.transaction import (
     Transaction,
     DepositTransaction,
@@ -16,16 +37,46 @@ from moneywiz_api.model.transaction import (
     TransferWithdrawTransaction,
     WithdrawTransaction,
 )
-from moneywiz_api.managers.record_manager import RecordManager
+from moneywiz_api.managers.account_manager import AccountManager
+from moneywiz_api.managers.investment_holding_manager import (
+    InvestmentHoldingManager,
+)
+from moneywiz_api.managers.record_manager import RecordManager, RefreshResult
 from moneywiz_api.types import ID
 
 
+# Attributes of the transactions indexed by `_by_investment_holding`
+_HOLDING_ATTRS = (
+    "investment_holding",
+    "from_investment_holding",
+    "to_investment_holding",
+)
+
+
 class TransactionManager(RecordManager[Transaction]):
     def __init__(self):
         super().__init__()
-        self.category_assignment: Dict[ID, List[Tuple[ID, Decimal]]] = {}
-        self.refund_maps: Dict[ID, ID] = {}
-        self.tags_map: Dict[ID, ID] = {}
+        self._db_accessor: Optional[DatabaseAccessor] = None
+        self._category_assignment: Optional[Dict[ID, List[Tuple[ID, Decimal]]]] = None
+        self._refund_maps: Optional[Dict[ID, ID]] = None
+        self._tags_map: Optional[Dict[ID, List[ID]]] = None
+        # Z_PRIMARYKEY.Z_MAX when the maps were loaded, to spot new link rows
+        self._primarykey_max: Dict[str, int] = {}
+        self._balance_engine: Optional[BalanceEngine] = None
+        self._position_engine: Optional[PositionEngine] = None
+        self._fx_engine: Optional[FxEngine] = None
+        self._transfer_graph: Optional[TransferGraph] = None
+        self._refund_index: Optional[RefundIndex] = None
+        self._tag_index: Optional[TagIndex] = None
+
+        # Secondary indexes, each group in date order
+        self._by_date: DateIndex[None] = DateIndex()
+        self._by_account: DateIndex[ID] = DateIndex()
+        self._by_payee: DateIndex[ID] = DateIndex()
+        self._by_investment_holding: DateIndex[ID] = DateIndex()
+        self._by_type: DateIndex[Type[Transaction]] = DateIndex()
+        # Needs the category assignment map, so it is built with it
+        self._by_category: Optional[DateIndex[ID]] = None
 
     @property
     def ents(self) -> Dict[str, Callable]:
@@ -42,13 +93,312 @@ class TransactionManager(RecordManager[Transaction]):
             "WithdrawTransaction": WithdrawTransaction,
         }
 
-    def load(self, db_accessor: DatabaseAccessor) -> None:
-        super().load(db_accessor)
-        self.category_assignment: Dict[ID, List[Tuple[ID, Decimal]]] = (
-            db_accessor.get_category_assignment()
-        )
-        self.refund_maps: Dict[ID, ID] = db_accessor.get_refund_maps()
-        self.tags_map: Dict[ID, ID] = db_accessor.get_tags_map()
+    def load(
+        self, db_accessor: DatabaseAccessor, lazy: bool = False, processes: int = 1
+    ) -> None:
+        """
+        :param lazy: defer loading the category assignment, refund and tag maps
+            until they are first accessed
+        :param processes: decode the transactions in that many processes, see
+            `RecordManager.load`
+        """
+        indexes = self._indexes()
+        for index in indexes:
+            index.bulk = True
+        super().load(db_accessor, processes)
+        for index in indexes:
+            index.end_bulk()
+        self._db_accessor = db_accessor
+        self._primarykey_max = db_accessor.get_primarykey_max()
+        self._category_assignment = None
+        self._refund_maps = None
+        self._tags_map = None
+        self._by_category = None
+        if not lazy:
+            self.load_maps()
+
+    def __getstate__(self):
+        # Snapshots hold no connection, see `attach`; the engine is rebuilt on use
+        state = self.__dict__.copy()
+        state["_db_accessor"] = None
+        state["_balance_engine"] = None
+        state["_position_engine"] = None
+        state["_fx_engine"] = None
+        state["_transfer_graph"] = None
+        state["_refund_index"] = None
+        state["_tag_index"] = None
+        return state
+
+    def attach(self, db_accessor: DatabaseAccessor) -> None:
+        self._db_accessor = db_accessor
+
+    def load_maps(
+        self,
+        category_assignment: Optional[Dict[ID, List[Tuple[ID, Decimal]]]] = None,
+        refund_maps: Optional[Dict[ID, ID]] = None,
+        tags_map: Optional[Dict[ID, List[ID]]] = None,
+    ) -> None:
+        """
+        Load the category assignment, refund and tag maps. Maps already fetched
+        (e.g. by the parallel load of `MoneywizApi`) can be passed in.
+        """
+        if category_assignment is not None:
+            self._category_assignment = category_assignment
+        if refund_maps is not None:
+            self._refund_maps = refund_maps
+        if tags_map is not None:
+            self._tags_map = tags_map
+        # Touching the properties populates the others
+        _ = self.category_assignment, self.refund_maps, self.tags_map
+        self._category_index()
+        self.refund_index()
+
+    def _indexes(self) -> List[DateIndex]:
+        return [
+            self._by_date,
+            self._by_account,
+            self._by_payee,
+            self._by_investment_holding,
+            self._by_type,
+        ]
+
+    @staticmethod
+    def _index_keys(record: Transaction) -> List[Tuple[str, object]]:
+        """
+        :return: (index attribute, key) for every index entry of the record
+        """
+        keys: List[Tuple[str, object]] = [("_by_type", type(record))]
+        if isinstance(record, TransferBudgetTransaction):
+            return keys
+        keys += [("_by_date", None), ("_by_account", record.account)]
+        if getattr(record, "payee", None) is not None:
+            keys.append(("_by_payee", record.payee))
+        for attr in _HOLDING_ATTRS:
+            if getattr(record, attr, None) is not None:
+                keys.append(("_by_investment_holding", getattr(record, attr)))
+        return keys
+
+    def _category_index(self) -> DateIndex[ID]:
+        if self._by_category is None:
+            index: DateIndex[ID] = DateIndex()
+            index.bulk = True
+            for transaction_id, assignments in self.category_assignment.items():
+                transaction = self.get(transaction_id)
+                if transaction is None:
+                    continue
+                for category_id in dict.fromkeys(x for x, _ in assignments):
+                    index.add(category_id, transaction)
+            index.end_bulk()
+            self._by_category = index
+        return self._by_category
+
+    def _add_loaded(self, decoded: Iterable[Tuple[Transaction, int]]) -> None:
+        """
+        Bulk path of `load`, keyed like `_index_keys`: the index groups are
+        appended to directly (the indexes are in bulk mode, sorted afterwards) and
+        the engines are dropped once.
+        """
+        add = super().add
+        versions = self._versions
+        by_date = self._by_date.groups()[None]
+        by_type = self._by_type.groups()
+        by_account = self._by_account.groups()
+        by_payee = self._by_payee.groups()
+        by_investment_holding = self._by_investment_holding.groups()
+        # Per class: whether it is indexed beyond its type, and its payee and
+        # investment holding attributes
+        plans: Dict[type, Tuple[bool, bool, Tuple[str, ...]]] = {}
+        for record, version in decoded:
+            add(record)
+            versions[record.id] = version
+            cls = type(record)
+            plan = plans.get(cls)
+            if plan is None:
+                plan = plans[cls] = (
+                    not issubclass(cls, TransferBudgetTransaction),
+                    hasattr(cls, "payee"),
+                    tuple(x for x in _HOLDING_ATTRS if hasattr(cls, x)),
+                )
+            by_type[cls].append(record)
+            indexed, has_payee, holding_attrs = plan
+            if not indexed:
+                continue
+            by_date.append(record)
+            by_account[record.account].append(record)
+            if has_payee and record.payee is not None:
+                by_payee[record.payee].append(record)
+            for attr in holding_attrs:
+                holding = getattr(record, attr)
+                if holding is not None:
+                    by_investment_holding[holding].append(record)
+        self.invalidate_engines()
+
+    def add(self, record: Transaction) -> None:
+        super().add(record)
+        for attr, key in self._index_keys(record):
+            getattr(self, attr).add(key, record)
+        if self._by_category is not None:
+            assignments = self.category_assignment.get(record.id, [])
+            for category_id in dict.fromkeys(x for x, _ in assignments):
+                self._by_category.add(category_id, record)
+        self.invalidate_engines()
+
+    def remove(self, record_id: ID) -> Transaction | None:
+        record = super().remove(record_id)
+        if record is not None:
+            for attr, key in self._index_keys(record):
+                getattr(self, attr).remove(key, record)
+            # Assignments may have changed as well, rebuild on next use
+            self._by_category = None
+        self.invalidate_engines()
+        return record
+
+    def invalidate_engines(self) -> None:
+        """
+        Drop the balance, position and FX engines, the transfer graph and the refund
+        and tag indexes, e.g. when their inputs changed; they are rebuilt on next
+        use.
+        """
+        self._balance_engine = None
+        self._position_engine = None
+        self._fx_engine = None
+        self._transfer_graph = None
+        self._refund_index = None
+        self._tag_index = None
+
+    def balance_engine(self, account_manager: AccountManager) -> BalanceEngine:
+        """
+        Running balances of every account, built on first use and kept until the
+        transactions change.
+        """
+        if self._balance_engine is None:
+            self._balance_engine = BalanceEngine(account_manager, self)
+        return self._balance_engine
+
+    def position_engine(
+        self, investment_holding_manager: InvestmentHoldingManager
+    ) -> PositionEngine:
+        """
+        Shares and cost basis of every holding over time, built on first use and
+        kept until the transactions change.
+        """
+        if self._position_engine is None:
+            self._position_engine = PositionEngine(investment_holding_manager, self)
+        return self._position_engine
+
+    def fx_engine(self, account_manager: AccountManager) -> FxEngine:
+        """
+        Exchange rates observed in the transactions, built on first use and kept
+        until the transactions change.
+        """
+        if self._fx_engine is None:
+            self._fx_engine = FxEngine(account_manager, self)
+        return self._fx_engine
+
+    def transfer_graph(self) -> TransferGraph:
+        """
+        Transfers paired by their withdraw and deposit legs, built on first use and
+        kept until the transactions change.
+        """
+        if self._transfer_graph is None:
+            self._transfer_graph = TransferGraph(self)
+        return self._transfer_graph
+
+    def refund_index(self) -> RefundIndex:
+        """
+        Refunds by withdraw and withdraws by refund, built with the maps (or on
+        first use when lazy) and kept until the transactions or refund links change.
+        """
+        if self._refund_index is None:
+            self._refund_index = RefundIndex(self)
+        return self._refund_index
+
+    def tag_index(self) -> TagIndex:
+        """
+        Transactions by tag, built on first use and kept until the transactions or
+        their tags change.
+        """
+        if self._tag_index is None:
+            self._tag_index = TagIndex(self)
+        return self._tag_index
+
+    # Link tables feeding the maps, with their columns referencing transactions
+    _LINK_TABLES: Dict[str, List[str]] = {
+        "ZCATEGORYASSIGMENT": ["ZTRANSACTION"],
+        "ZWITHDRAWREFUNDTRANSACTIONLINK": [
+            "ZREFUNDTRANSACTION",
+            "ZWITHDRAWTRANSACTION",
+        ],
+    }
+
+    def refresh(self, db_accessor: DatabaseAccessor) -> RefreshResult:
+        """
+        Besides the transactions themselves, the entries of the loaded maps are
+        reloaded for every changed transaction, and for the transactions referenced
+        by link rows inserted since the last load (above the previous Z_MAX).
+
+        Link rows deleted or edited in place (at or below the previous Z_MAX) in
+        ZCATEGORYASSIGMENT and ZWITHDRAWREFUNDTRANSACTIONLINK, and rows of Z_36TAGS
+        (which has no Z_PK), are only picked up along with a change of the
+        transaction they belong to (its Z_OPT); load again to pick them up otherwise.
+        """
+        ret = super().refresh(db_accessor)
+        affected: Set[ID] = ret.changed()
+
+        primarykey_max = db_accessor.get_primarykey_max()
+        for table, columns in self._LINK_TABLES.items():
+            entity = db_accessor.entity_for_table(table)
+            previous = self._primarykey_max.get(entity)
+            if previous is not None and primarykey_max.get(entity, 0) > previous:
+                for row in db_accessor.get_rows_after(table, columns, previous):
+                    affected.update(x for x in row if x is not None)
+        self._primarykey_max = primarykey_max
+
+        if affected:
+            self._refresh_maps(db_accessor, affected)
+            self._by_category = None
+        return ret
+
+    def _refresh_maps(self, db_accessor: DatabaseAccessor, ids: Set[ID]) -> None:
+        if self._category_assignment is not None:
+            for transaction_id in ids:
+                self._category_assignment.pop(transaction_id, None)
+            self._category_assignment.update(db_accessor.get_category_assignment(ids))
+        if self._refund_maps is not None:
+            for refund, withdraw in list(self._refund_maps.items()):
+                if refund in ids or withdraw in ids:
+                    del self._refund_maps[refund]
+            self._refund_maps.update(db_accessor.get_refund_maps(ids))
+            self._refund_index = None
+        if self._tags_map is not None:
+            for transaction_id in ids:
+                self._tags_map.pop(transaction_id, None)
+            self._tags_map.update(db_accessor.get_tags_map(ids))
+            self._tag_index = None
+
+    @property
+    def category_assignment(self) -> Dict[ID, List[Tuple[ID, Decimal]]]:
+        if self._category_assignment is None:
+            if self._db_accessor is None:
+                return {}
+            self._category_assignment = self._db_accessor.get_category_assignment()
+        return self._category_assignment
+
+    @property
+    def refund_maps(self) -> Dict[ID, ID]:
+        if self._refund_maps is None:
+            if self._db_accessor is None:
+                return {}
+            self._refund_maps = self._db_accessor.get_refund_maps()
+        return self._refund_maps
+
+    @property
+    def tags_map(self) -> Dict[ID, List[ID]]:
+        if self._tags_map is None:
+            if self._db_accessor is None:
+                return {}
+            self._tags_map = self._db_accessor.get_tags_map()
+        return self._tags_map
 
     def category_for_transaction(
         self, transaction_id: ID
@@ -63,32 +413,194 @@ class TransactionManager(RecordManager[Transaction]):
     ) -> ID | None:
         return self.refund_maps.get(transaction_id)
 
+    def _net_amount(
+        self, transaction: Transaction, refund_index: Optional[RefundIndex]
+    ) -> Optional[Decimal]:
+        """
+        :return: the amount of the transaction, net of its refunds with an index,
+            None for a refund counted with its withdraw
+        """
+        if refund_index is None:
+            return transaction.amount
+        if refund_index.is_linked_refund(transaction.id):
+            return None
+        return transaction.amount + refund_index.refunded_amount(transaction.id)
+
+    def totals_by_payee(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        net_of_refunds: bool = False,
+    ) -> Dict[ID, Decimal]:
+        """
+        Sum of the amounts of the transactions of each payee, in one pass.
+
+        :param since: inclusive
+        :param until: inclusive
+        :param net_of_refunds: count the linked refunds with their withdraw (and
+            its date) rather than on their own, see `refund_index`
+        """
+        refund_index = self.refund_index() if net_of_refunds else None
+        totals: Dict[ID, Decimal] = defaultdict(Decimal)
+        for transaction in self._by_date.get(None, since, until):
+            payee = getattr(transaction, "payee", None)
+            if payee is None:
+                continue
+            amount = self._net_amount(transaction, refund_index)
+            if amount is not None:
+                totals[payee] += amount
+        return dict(totals)
+
+    def totals_by_category(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        net_of_refunds: bool = False,
+    ) -> Dict[ID, Decimal]:
+        """
+        Sum of the category assignments of the transactions, splits counted apart,
+        in one pass. Net of refunds, the splits of a refunded withdraw shrink in
+        proportion.
+
+        :param since: inclusive
+        :param until: inclusive
+        :param net_of_refunds: count the linked refunds with their withdraw (and
+            its date) rather than on their own, see `refund_index`
+        """
+        refund_index = self.refund_index() if net_of_refunds else None
+        category_assignment = self.category_assignment
+        totals: Dict[ID, Decimal] = defaultdict(Decimal)
+        for transaction in self._by_date.get(None, since, until):
+            assignments = category_assignment.get(transaction.id)
+            if not assignments:
+                continue
+            amount = self._net_amount(transaction, refund_index)
+            if amount is None:
+                continue
+            if amount == transaction.amount or not transaction.amount:
+                for category_id, assigned in assignments:
+                    totals[category_id] += assigned
+            else:
+                for category_id, assigned in assignments:
+                    totals[category_id] += assigned * amount / transaction.amount
+        return dict(totals)
+
     def get_all_for_account(
-        self, account_id: ID, until: datetime = datetime.now()
+        self, account_id: ID, until: Optional[datetime] = None
     ) -> List[Transaction]:
         """
         Get all transactions for a given account
         :param account_id:
+        :param until: inclusive, no limit if None
+        :return:
+        """
+        return self._by_account.get(account_id, until=until)
+
+    def get_all(self, until: Optional[datetime] = None) -> List[Transaction]:
+        return self._by_date.get(None, until=until)
+
+    def get_all_for_payee(
+        self,
+        payee_id: ID,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Transaction]:
+        return self._by_payee.get(payee_id, since, until)
+
+    def get_all_for_investment_holding(
+        self,
+        investment_holding_id: ID,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Transaction]:
+        """
+        Buy and sell transactions of a holding, and the exchanges from or to it
+        """
+        return self._by_investment_holding.get(investment_holding_id, since, until)
+
+    def get_all_for_category(
+        self,
+        category_id: ID,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Transaction]:
+        """
+        Transactions with (a split of) their amount assigned to the category
+        """
+        return self._category_index().get(category_id, since, until)
+
+    def get_all_with_tags(
+        self,
+        all_of: Iterable[ID] = (),
+        any_of: Iterable[ID] = (),
+        none_of: Iterable[ID] = (),
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Transaction]:
+        """
+        Transactions with every tag of `all_of`, at least one of `any_of` and none
+        of `none_of`, see `TagIndex.query`
+
+        :param since: inclusive
+        :param until: inclusive
+        :return: in date order
+        """
+        tag_index = self.tag_index()
+        ids = tag_index.query(all_of, any_of, none_of, since, until)
+        order = np.argsort(tag_index.dates_for(ids), kind="stable")
+        return [self._records[x] for x in ids[order].tolist()]
+
+    def get_all_of_type(
+        self,
+        transaction_type: Type[Transaction],
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Transaction]:
+        """
+        :param transaction_type: a transaction class, subclasses included
+        :return:
+        """
+        groups = [
+            self._by_type.get(x, since, until)
+            for x in self._by_type.keys()
+            if issubclass(x, transaction_type)
+        ]
+        if len(groups) == 1:
+            return groups[0]
+        return list(merge(*groups, key=lambda x: x.datetime))
+
+    def iter_transactions(
+        self,
+        db_accessor: DatabaseAccessor,
+        account: Optional[ID] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Transaction]:
+        """
+        Stream transactions in date order straight from the database, decoding them
+        one batch at a time. Nothing is kept in (or read from) the manager, so memory
+        stays flat however many transactions match; it does not need to be loaded.
+
+        Like `get_all`, budget transfers are left out.
+
+        :param account: only the transactions of this account
+        :param since: inclusive
         :param until: inclusive
         :return:
         """
-        return sorted(
-            [
-                x
-                for _, x in self.records().items()
-                if not isinstance(x, TransferBudgetTransaction)
-                and x.account == account_id
-                and x.datetime <= until
-            ],
-            key=lambda x: x.datetime,
+        typenames = [x for x in self.ents if x != "TransferBudgetTransaction"]
+        rows = db_accessor.iter_transactions(
+            typenames, self.columns(), account, since, until, batch_size
         )
+        decoders = None
+        for row in rows:
+            if decoders is None:
+                decoders = self._decoders(db_accessor, tuple(row.keys()))
+            yield decoders[row["Z_ENT"]](row)
 
-    def get_all(self, until: datetime = datetime.now()) -> List[Transaction]:
-        return sorted(
-            [
-                x
-                for _, x in self.records().items()
-                if not isinstance(x, TransferBudgetTransaction) and x.datetime <= until
-            ],
-            key=lambda x: x.datetime,
-        )
+    def account_ids(self) -> List[ID]:
+        """
+        Accounts with at least one transaction
+        """
+        return list(self._by_account.keys())
@@ -3,11 +3,12 @@ from dataclasses import dataclass, field
 from decimal import Decimal
 
 from moneywiz_api.types import ID
+from moneywiz_api.model.decoder import Column
 from moneywiz_api.model.raw_data_handler import RawDataHandler as RDH
 from moneywiz_api.model.record import Record
 
 
-@dataclass
+@dataclass(init=False, slots=True)
 class Account(Record, ABC):
     """
     ENT: 9
@@ -22,21 +23,18 @@ class Account(Record, ABC):
     info: str
     user: ID
 
-    def __init__(self, row):
-        super().__init__(row)
-        self.display_order = row["ZDISPLAYORDER"]
-        self.group_id = row["ZGROUPID"]
-
-        self.name = row["ZNAME"]
-        self.currency = row["ZCURRENCYNAME"]
-        self.opening_balance = RDH.get_decimal(row, "ZOPENINGBALANCE")
-        self.info = row["ZINFO"]
-
-        self.user = row["ZUSER"]
-
-        # Fixes
-
-        # Validate
+    FIELDS = (
+        Column("display_order", "ZDISPLAYORDER"),
+        Column("group_id", "ZGROUPID"),
+        Column("name", "ZNAME"),
+        Column("currency", "ZCURRENCYNAME", intern=True),
+        Column("opening_balance", "ZOPENINGBALANCE", RDH.to_decimal),
+        Column("info", "ZINFO"),
+        Column("user", "ZUSER"),
+    )
+
+    def validate(self):
+        super(Account, self).validate()
         assert self.display_order is not None, self.as_dict()
         assert self.group_id is not None, self.as_dict()
         assert self.name is not None, self.as_dict()
@@ -46,37 +44,28 @@ class Account(Record, ABC):
         assert self.user is not None, self.as_dict()
 
 
-@dataclass
+@dataclass(init=False, slots=True)
 class BankChequeAccount(Account):
     """
     ENT: 10
     """
 
-    def __init__(self, row):
-        super().__init__(row)
-
 
-@dataclass
+@dataclass(init=False, slots=True)
 class BankSavingAccount(Account):
     """
     ENT: 11
     """
 
-    def __init__(self, row):
-        super().__init__(row)
 
-
-@dataclass
+@dataclass(init=False, slots=True)
 class CashAccount(Account):
     """
     ENT: 12
     """
 
-    def __init__(self, row):
-        super().__init__(row)
-
 
-@dataclass
+@dataclass(init=False, slots=True)
 class CreditCardAccount(Account):
     """
     ENT: 13
@@ -84,39 +73,29 @@ class CreditCardAccount(Account):
 
     statement_day: int  # day in the month
 
-    def __init__(self, row):
-        super().__init__(row)
-        self.statement_day = row["ZSTATEMENTENDDAY"]
+    FIELDS = (Column("statement_day", "ZSTATEMENTENDDAY"),)
 
-        # Validate
+    def validate(self):
+        super(CreditCardAccount, self).validate()
         assert self.statement_day is not None
 
 
-@dataclass
+@dataclass(init=False, slots=True)
 class LoanAccount(CreditCardAccount):
     """
     ENT: 14
     """
 
-    def __init__(self, row):
-        super().__init__(row)
-
 
-@dataclass
+@dataclass(init=False, slots=True)
 class InvestmentAccount(Account):
     """
     ENT: 15
     """
 
-    def __init__(self, row):
-        super().__init__(row)
 
-
-@dataclass
+@dataclass(init=False, slots=True)
 class ForexAccount(InvestmentAccount):
     """
     ENT: 16
     """
-
-    def __init__(self, row):
-        super().__init__(row)
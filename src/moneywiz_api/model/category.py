@@ -1,11 +1,12 @@
 from dataclasses import dataclass
 from typing import Optional
 
+from moneywiz_api.model.decoder import Column
 from moneywiz_api.model.record import Record
 from moneywiz_api.types import CategoryType, ID
 
 
-@dataclass
+@dataclass(init=False, slots=True)
 class Category(Record):
     """
     ENT: 19
@@ -16,22 +17,21 @@ class Category(Record):
     type: CategoryType
     user: ID
 
-    def __init__(self, row):
-        super().__init__(row)
-        self.name = row["ZNAME2"]
-        self.parent_id = row["ZPARENTCATEGORY"]
-        self.type = self._convert_type(row["ZTYPE2"])
-        self.user = row["ZUSER3"]
-
-        # Fixes
-
-        # Validate
-        assert self.name is not None, self.as_dict()
-        assert self.type is not None, self.as_dict()
-        assert self.user is not None, self.as_dict()
-
     @staticmethod
     def _convert_type(type_: Optional[int]) -> CategoryType:
         if type_ and type_ in [1, 2]:
             return "Expenses" if type_ == 1 else "Income"
         raise RuntimeError(f"Invalid type {type_}")
+
+    FIELDS = (
+        Column("name", "ZNAME2"),
+        Column("parent_id", "ZPARENTCATEGORY"),
+        Column("type", "ZTYPE2", _convert_type),
+        Column("user", "ZUSER3"),
+    )
+
+    def validate(self):
+        super(Category, self).validate()
+        assert self.name is not None, self.as_dict()
+        assert self.type is not None, self.as_dict()
+        assert self.user is not None, self.as_dict()
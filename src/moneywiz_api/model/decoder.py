@@ -0,0 +1,216 @@
+"""
+Row decoders for the model classes.
+
+Every model class declares a field plan (`FIELDS`): which ZSYNCOBJECT column feeds
+which attribute, and how the raw value is converted. A decoder turns that plan into
+a small Python function, compiled once per (class, column layout), that reads the
+values of a row by position and builds the model object without any per-row dict.
+"""
+
+import sys
+import weakref
+from dataclasses import fields
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from moneywiz_api.model.raw_data_handler import RawDataHandler as RDH
+
+
+class Column(NamedTuple):
+    attr: str
+    column: str
+    convert: Optional[Callable[[Any], Any]] = None
+    # Values repeat across many rows (currency codes, symbols), interned when compact
+    intern: bool = False
+
+
+RAW_ROWS = ("keep", "drop", "refetch")
+VALIDATIONS = ("strict", "sampled", "off")
+# With "sampled" validation, one record out of this many (by Z_PK) is validated
+SAMPLE_EVERY = 20
+
+
+class RawRowSource:
+    """
+    Stands in for the raw row of records decoded with `raw_rows="refetch"`: the
+    row is read again, in full, from the database when it is asked for.
+    """
+
+    __slots__ = ("_accessor", "__weakref__")
+
+    def __init__(self, accessor: Any):
+        # Weak, the records must not keep the database connection open
+        self._accessor = weakref.ref(accessor)
+
+    def fetch(self, record_id: Any) -> Any:
+        accessor = self._accessor()
+        if accessor is None:
+            raise RuntimeError("The database the record was loaded from is closed")
+        return accessor.get_record(record_id, full_row=True)._raw
+
+
+class DecodeOptions(NamedTuple):
+    """
+    :param raw_rows: what `Record._raw` holds once a record is decoded: the row
+        ("keep"), nothing ("drop"), or a `RawRowSource` ("refetch")
+    :param raw_source: the source set on the records with "refetch"
+    :param intern_strings: intern the values of the `Column.intern` columns
+    :param validation: run `validate()` on every record ("strict"), on one record
+        out of `SAMPLE_EVERY` ("sampled"), or never ("off")
+    """
+
+    raw_rows: str = "keep"
+    raw_source: Optional[RawRowSource] = None
+    intern_strings: bool = False
+    validation: str = "strict"
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+def field_plan(cls: type) -> Tuple[Column, ...]:
+    """
+    Field plan of a model class, including the fields of all its bases.
+    A field redeclared by a subclass replaces the one of its base.
+
+    :param cls:
+    :return:
+    """
+    plan: Dict[str, Column] = {}
+    for klass in reversed(cls.__mro__):
+        for column in klass.__dict__.get("FIELDS", ()):
+            plan[column.attr] = column
+    return tuple(plan.values())
+
+
+def _raise_with_row(row: Any, error: AssertionError):
+    context = RDH.filter_row(row) if hasattr(row, "keys") else row
+    raise AssertionError(f"{error}, where row is: {context}") from error
+
+
+def _compile(
+    cls: type, columns: Optional[Sequence[str]], name: str, options: DecodeOptions
+) -> Callable:
+    """
+    Generate the decoding function for `cls`.
+
+    With `columns`, values are read by position in that column layout (tuples,
+    `sqlite3.Row`), otherwise by column name (any mapping).
+    """
+    if options.raw_rows not in RAW_ROWS:
+        raise ValueError(f"raw_rows must be one of {RAW_ROWS}, not {options.raw_rows}")
+    if options.validation not in VALIDATIONS:
+        raise ValueError(
+            f"validation must be one of {VALIDATIONS}, not {options.validation}"
+        )
+    namespace: Dict[str, Any] = {
+        "_cls": cls,
+        "_new": object.__new__,
+        "_raise_with_row": _raise_with_row,
+        "_intern": _intern,
+        "_raw_source": options.raw_source,
+    }
+    lines: List[str] = []
+    for idx, (attr, column, convert, intern) in enumerate(field_plan(cls)):
+        if columns is None:
+            key = repr(column)
+        else:
+            if column not in columns:
+                raise KeyError(f"Column {column} of {cls.__name__} was not fetched")
+            key = str(columns.index(column))
+        if convert is None:
+            value = f"row[{key}]"
+        else:
+            namespace[f"_c{idx}"] = convert
+            value = f"_c{idx}(row[{key}])"
+        if intern and options.intern_strings:
+            value = f"_intern({value})"
+        lines.append(f"obj.{attr} = {value}")
+    lines.append("obj._fix()")
+    if options.validation == "strict":
+        lines.append("obj.validate()")
+    elif options.validation == "sampled":
+        lines.append(f"if obj.id % {SAMPLE_EVERY} == 0: obj.validate()")
+    # The row stays available to `validate` and to the error context either way
+    if options.raw_rows == "drop":
+        lines.append("obj._raw = None")
+    elif options.raw_rows == "refetch":
+        lines.append("obj._raw = _raw_source")
+
+    if name == "decode":
+        signature, head, tail = "decode(row)", ["obj = _new(_cls)"], ["return obj"]
+    else:
+        signature, head, tail = "fill(obj, row)", [], []
+    body = "\n".join(
+        f"        {line}" for line in head + ["obj._raw = row"] + lines + tail
+    )
+    source = (
+        f"def {signature}:\n"
+        f"    try:\n{body}\n"
+        f"    except AssertionError as e:\n"
+        f"        _raise_with_row(row, e)\n"
+    )
+    exec(source, namespace)
+    return namespace[name]
+
+
+@lru_cache(maxsize=None)
+def row_decoder(
+    cls: type, columns: Tuple[str, ...], options: DecodeOptions = DecodeOptions()
+) -> Callable[[Any], Any]:
+    """
+    Decoder building `cls` objects from rows laid out as `columns`.
+
+    :param cls: model class
+    :param columns: column names of the rows, in order
+    :param options:
+    :return: function taking a row (tuple or sqlite3.Row) and returning the object
+    """
+    return _compile(cls, columns, "decode", options)
+
+
+@lru_cache(maxsize=None)
+def mapping_filler(cls: type) -> Callable[[Any, Any], None]:
+    """
+    Initializer populating a `cls` object from a row accessed by column name.
+
+    :param cls: model class
+    :return: function taking (obj, row)
+    """
+    return _compile(cls, None, "fill", DecodeOptions())
+
+
+def _state_fields(cls: type) -> Tuple[str, ...]:
+    return tuple(f.name for f in fields(cls) if f.name != "_raw")
+
+
+@lru_cache(maxsize=None)
+def state_getter(cls: type) -> Callable[[Any], Tuple[Any, ...]]:
+    """
+    :param cls: model class
+    :return: function returning the attribute values of a `cls` object, but its
+        raw row, as restored by `state_builder`
+    """
+    return attrgetter(*_state_fields(cls))
+
+
+@lru_cache(maxsize=None)
+def state_builder(cls: type) -> Callable[[Tuple[Any, ...]], Any]:
+    """
+    :param cls: model class
+    :return: function building a `cls` object, without raw row, from the values
+        returned by `state_getter`
+    """
+    targets = ", ".join(f"obj.{name}" for name in _state_fields(cls))
+    source = (
+        "def build(values):\n"
+        "    obj = _new(_cls)\n"
+        "    obj._raw = None\n"
+        f"    {targets}, = values\n"
+        "    return obj\n"
+    )
+    namespace: Dict[str, Any] = {"_cls": cls, "_new": object.__new__}
+    exec(source, namespace)
+    return namespace["build"]
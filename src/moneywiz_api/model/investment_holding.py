@@ -2,12 +2,13 @@ from dataclasses import dataclass, field
 from typing import Dict, Any, Optional
 from decimal import Decimal
 
+from moneywiz_api.model.decoder import Column
 from moneywiz_api.model.raw_data_handler import RawDataHandler as RDH
 from moneywiz_api.model.record import Record
 from moneywiz_api.types import ID
 
 
-@dataclass
+@dataclass(init=False, slots=True)
 class InvestmentHolding(Record):
     """
     ENT: 24
@@ -41,32 +42,32 @@ class InvestmentHolding(Record):
     """
     _cost_basis_of_missing_ob_shares: Decimal = field(repr=False)
 
-    def __init__(self, row):
-        super().__init__(row)
-        self.account = row["ZINVESTMENTACCOUNT"]
-        self.opening_number_of_shares = RDH.get_nullable_decimal(
-            row, "ZOPENNINGNUMBEROFSHARES"
-        )
-        self.number_of_shares = RDH.get_decimal(row, "ZNUMBEROFSHARES")
-        # self.price_per_share = row["ZPRICEPERSHARE"]
-        self.symbol = row["ZSYMBOL"]
-        self.holding_type = row["ZHOLDINGTYPE"]
-        self.description = row["ZDESC"]
-        self.price_per_share_available_online = (
-            row["ZISPRICEPERSHAREAVAILABLEONLINE"] == 1
-        )
-
-        self._investment_object_type = row["ZINVESTMENTOBJECTTYPE"]
-        self._cost_basis_of_missing_ob_shares = RDH.get_decimal(
-            row, "ZCOSTBASISOFMISSINGOBSHARES"
-        )
-
-        # Fixes
-
-        # Validate
-        self.validate()
+    FIELDS = (
+        Column("account", "ZINVESTMENTACCOUNT"),
+        Column(
+            "opening_number_of_shares",
+            "ZOPENNINGNUMBEROFSHARES",
+            RDH.to_nullable_decimal,
+        ),
+        Column("number_of_shares", "ZNUMBEROFSHARES", RDH.to_decimal),
+        Column("symbol", "ZSYMBOL", intern=True),
+        Column("holding_type", "ZHOLDINGTYPE", intern=True),
+        Column("description", "ZDESC"),
+        Column(
+            "price_per_share_available_online",
+            "ZISPRICEPERSHAREAVAILABLEONLINE",
+            RDH.to_bool,
+        ),
+        Column("_investment_object_type", "ZINVESTMENTOBJECTTYPE"),
+        Column(
+            "_cost_basis_of_missing_ob_shares",
+            "ZCOSTBASISOFMISSINGOBSHARES",
+            RDH.to_decimal,
+        ),
+    )
 
     def validate(self):
+        super(InvestmentHolding, self).validate()
         assert self.account is not None, self.as_dict()
         assert self.number_of_shares is not None, self.as_dict()
         # assert self.price_per_share is not None
@@ -77,7 +78,7 @@ class InvestmentHolding(Record):
         assert self._cost_basis_of_missing_ob_shares is not None, self.as_dict()
 
     def as_dict(self) -> Dict[str, Any]:
-        original = super().as_dict()
+        original = super(InvestmentHolding, self).as_dict()
         del original["_investment_object_type"]
         del original["_cost_basis_of_missing_ob_shares"]
         return original
@@ -32,13 +32,39 @@ class RawDataHandler:
         )
         return Decimal(str(raw_value))
 
+    # Value converters, used by the field plans of the models
+
+    @staticmethod
+    def to_datetime(raw_value: Any) -> datetime:
+        assert isinstance(raw_value, (float, int)), (
+            f"{raw_value!r} is not a float or int"
+        )
+        return get_datetime(raw_value)
+
+    @staticmethod
+    def to_decimal(raw_value: Any) -> Decimal:
+        assert isinstance(raw_value, (float, int)), (
+            f"{raw_value!r} is not a float or int"
+        )
+        return Decimal(str(raw_value))
+
+    @staticmethod
+    def to_nullable_decimal(raw_value: Any) -> Optional[Decimal]:
+        if raw_value is None:
+            return None
+        return RawDataHandler.to_decimal(raw_value)
+
+    @staticmethod
+    def to_bool(raw_value: Any) -> bool:
+        return raw_value == 1
+
     @staticmethod
     def filter_row(row: Dict[str, Any]) -> Dict[str, Any]:
-        copy = {k: v for k, v in row.items()}
-        del copy["ZMANUALHISTORICALPRICESPERSHARE"]
-        del copy["ZIMPORTLINKIDARRAY2"]
-        del copy["ZIMPORTLINKIDARRAY"]
-        del copy["ZBANKLOGOPRIMARYCOLOR"]
+        copy = dict(row)
+        copy.pop("ZMANUALHISTORICALPRICESPERSHARE", None)
+        copy.pop("ZIMPORTLINKIDARRAY2", None)
+        copy.pop("ZIMPORTLINKIDARRAY", None)
+        copy.pop("ZBANKLOGOPRIMARYCOLOR", None)
         return {
             k: v
             for k, v in copy.items()
@@ -1,35 +1,66 @@
-from dataclasses import dataclass, asdict, field
-from typing import Dict, Any
+from dataclasses import dataclass, field, fields
+from typing import ClassVar, Dict, Any, Tuple
 from datetime import datetime
 
 from moneywiz_api.types import ID, ENT_ID
+from moneywiz_api.model.decoder import (
+    Column,
+    RawRowSource,
+    field_plan,
+    mapping_filler,
+    state_builder,
+    state_getter,
+)
 from moneywiz_api.model.raw_data_handler import RawDataHandler as RDH
 
 
-@dataclass
+@dataclass(init=False, slots=True)
 class Record:
-    _raw: Dict[str, Any] = field(repr=False)
+    # The row, None or a RawRowSource, see DecodeOptions.raw_rows
+    _raw: Any = field(repr=False)
     _ent: ENT_ID = field(repr=False)
     _created_at: datetime = field(repr=False)
     gid: str = field(repr=False)
     id: ID
 
+    # Field plan: ZSYNCOBJECT column feeding each attribute declared by this class
+    FIELDS: ClassVar[Tuple[Column, ...]] = (
+        Column("_ent", "Z_ENT"),
+        Column("_created_at", "ZOBJECTCREATIONDATE", RDH.to_datetime),
+        Column("gid", "ZGID"),
+        Column("id", "Z_PK"),
+    )
+
     def __init__(self, row):
-        self._raw = row
-        self._ent = row["Z_ENT"]
-        self._created_at = RDH.get_datetime(row, "ZOBJECTCREATIONDATE")
-        self.gid = row["ZGID"]
-        self.id = row["Z_PK"]
+        mapping_filler(type(self))(self, row)
+
+    def __reduce__(self):
+        # Rows cannot be pickled, so records are pickled without theirs
+        return _unpickle_record, (type(self), state_getter(type(self))(self))
 
-        # Fixes
+    def _fix(self) -> None:
+        """
+        Hook to correct known inconsistencies of the raw data, run before `validate`.
+        """
 
-        # Validate
-        assert self._raw
+    def validate(self) -> None:
+        # Records decoded with raw_rows="drop" have no row left to check
+        if self._raw is not None:
+            assert self._raw
         assert self._ent
         assert self._created_at
         assert self.gid
         assert self.id
 
+    @classmethod
+    def columns(cls) -> Tuple[str, ...]:
+        """
+        Column projection for this class, including the columns of all its bases.
+
+        :return:
+        """
+        return tuple(dict.fromkeys(column.column for column in field_plan(cls)))
+
     def ent(self) -> ENT_ID:
         return self._ent
 
@@ -38,20 +69,21 @@ class Record:
         Utility function to return cleaned up entities.
         it will exclude fields like binary, Z9_
 
+        Only the columns that were fetched are available, so load the record with
+        a full row (see `DatabaseAccessor.get_record`) to inspect everything.
+        Records decoded with `raw_rows="refetch"` read their full row again.
+
         :return:
         """
-        return RDH.filter_row(self._raw)
-        # copy = {k: v for k, v in self._raw.items()}
-        # # del copy["ZGID"]
-        # del copy["ZMANUALHISTORICALPRICESPERSHARE"]
-        # del copy["ZIMPORTLINKIDARRAY2"]
-        # del copy["ZIMPORTLINKIDARRAY"]
-        # del copy["ZBANKLOGOPRIMARYCOLOR"]
-        # return {
-        #     k: v
-        #     for k, v in copy.items()
-        #     if (v is not None) and (not k.startswith("Z9_"))
-        # }
+        raw = self._raw
+        if isinstance(raw, RawRowSource):
+            raw = raw.fetch(self.id)
+        elif raw is None:
+            raise RuntimeError(
+                f"Raw row of record {self.id} was dropped, load with raw_rows="
+                '"keep" or "refetch" to use filtered()'
+            )
+        return RDH.filter_row(raw)
 
     def as_dict(self) -> Dict[str, Any]:
         """
@@ -59,8 +91,12 @@ class Record:
 
         :return:
         """
-        original = asdict(self)
-        del original["_raw"]
-        del original["_ent"]
-        del original["_created_at"]
-        return original
+        return {
+            f.name: getattr(self, f.name)
+            for f in fields(self)
+            if f.name not in ("_raw", "_ent", "_created_at")
+        }
+
+
+def _unpickle_record(cls: type, values: Tuple[Any, ...]) -> Record:
+    return state_builder(cls)(values)
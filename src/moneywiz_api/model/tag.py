@@ -1,10 +1,11 @@
 from dataclasses import dataclass
 
+from moneywiz_api.model.decoder import Column
 from moneywiz_api.model.record import Record
 from moneywiz_api.types import ID
 
 
-@dataclass
+@dataclass(init=False, slots=True)
 class Tag(Record):
     """
     ENT: 35
@@ -13,13 +14,12 @@ class Tag(Record):
     name: str
     user: ID
 
-    def __init__(self, row):
-        super().__init__(row)
-        self.name = row["ZNAME6"]
-        self.user = row["ZUSER8"]
+    FIELDS = (
+        Column("name", "ZNAME6"),
+        Column("user", "ZUSER8"),
+    )
 
-        # Fixes
-
-        # Validate
+    def validate(self):
+        super(Tag, self).validate()
         assert self.name is not None, self.as_dict()
         assert self.user is not None, self.as_dict()
@@ -4,16 +4,16 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Optional
 
-import pytest
-
+from moneywiz_api.model.decoder import Column
 from moneywiz_api.model.raw_data_handler import RawDataHandler as RDH
 from moneywiz_api.model.record import Record
 from moneywiz_api.types import ID
+from moneywiz_api.utils import is_close
 
-ABS_TOLERANCE = 0.001
+ABS_TOLERANCE = Decimal("0.001")
 
 
-@dataclass
+@dataclass(init=False, slots=True)
 class Transaction(Record, ABC):
     """
     ENT: 36
@@ -26,17 +26,16 @@ class Transaction(Record, ABC):
     datetime: datetime
     notes: Optional[str]
 
-    def __init__(self, row):
-        super().__init__(row)
-        self.reconciled = row["ZRECONCILED"] == 1
-        self.amount = RDH.get_decimal(row, "ZAMOUNT1")
-        self.description = row["ZDESC2"]
-        self.datetime = RDH.get_datetime(row, "ZDATE1")
-        self.notes = row["ZNOTES1"]
-
-        # Fixes
+    FIELDS = (
+        Column("reconciled", "ZRECONCILED", RDH.to_bool),
+        Column("amount", "ZAMOUNT1", RDH.to_decimal),
+        Column("description", "ZDESC2"),
+        Column("datetime", "ZDATE1", RDH.to_datetime),
+        Column("notes", "ZNOTES1"),
+    )
 
-        # Validate
+    def validate(self):
+        super(Transaction, self).validate()
         assert self.reconciled is not None, self.as_dict()
         assert self.amount is not None, self.as_dict()
         assert self.description is not None, self.as_dict()
@@ -44,7 +43,7 @@ class Transaction(Record, ABC):
         # self.notes can be None
 
 
-@dataclass
+@dataclass(init=False, slots=True)
 class DepositTransaction(Transaction):
     """
     ENT: 37
@@ -59,25 +58,22 @@ class DepositTransaction(Transaction):
     original_amount: Decimal  # neg: expense, pos: income
     original_exchange_rate: Optional[Decimal]
 
-    def __init__(self, row):
-        super().__init__(row)
-        self.account = row["ZACCOUNT2"]
-        self.amount = RDH.get_decimal(row, "ZAMOUNT1")
-        self.payee = row["ZPAYEE2"]
-        self.original_currency = row["ZORIGINALCURRENCY"]
-        self.original_amount = RDH.get_decimal(row, "ZORIGINALAMOUNT")
-        self.original_exchange_rate = RDH.get_nullable_decimal(
-            row, "ZORIGINALEXCHANGERATE"
-        )
-
-        # Fixes
+    FIELDS = (
+        Column("account", "ZACCOUNT2"),
+        Column("payee", "ZPAYEE2"),
+        Column("original_currency", "ZORIGINALCURRENCY", intern=True),
+        Column("original_amount", "ZORIGINALAMOUNT", RDH.to_decimal),
+        Column(
+            "original_exchange_rate", "ZORIGINALEXCHANGERATE", RDH.to_nullable_decimal
+        ),
+    )
+
+    def _fix(self):
         if self.original_exchange_rate == Decimal(0):
             self.original_exchange_rate = None
 
-        # Validate
-        self.validate()
-
     def validate(self):
+        super(DepositTransaction, self).validate()
         assert self.account is not None, self.as_dict()
         assert self.amount is not None, self.as_dict()
         # self.payee can be None
@@ -86,12 +82,14 @@ class DepositTransaction(Transaction):
 
         assert self.amount * self.original_amount > 0, self.as_dict()  # Same sign
         if self.original_exchange_rate is not None:
-            assert self.amount == pytest.approx(
-                self.original_amount * self.original_exchange_rate, abs=ABS_TOLERANCE
+            assert is_close(
+                self.amount,
+                self.original_amount * self.original_exchange_rate,
+                ABS_TOLERANCE,
             ), self.as_dict()
 
 
-@dataclass
+@dataclass(init=False, slots=True)
 class InvestmentExchangeTransaction(Transaction):
     """
     ENT: 38
@@ -109,30 +107,26 @@ class InvestmentExchangeTransaction(Transaction):
     original_fee: Decimal  # pos: fee, neg: income?
     original_fee_currency: str
 
-    def __init__(self, row):
-        super().__init__(row)
-
-        self.account = row["ZACCOUNT2"]
-        self.from_investment_holding = row["ZFROMINVESTMENTHOLDING"]
-        self.from_symbol = row["ZFROMSYMBOL"]
-        self.to_investment_holding = row["ZTOINVESTMENTHOLDING"]
-        self.to_symbol = row["ZTOSYMBOL"]
-        self.from_number_of_shares = row["ZFROMNUMBEROFSHARES"]
-        self.to_number_of_shares = row["ZTONUMBEROFSHARES"]
-
-        self.original_fee = row["ZORIGINALFEE"]
-        self.original_fee_currency = row["ZORIGINALFEECURRENCY"]
-
-        # Fixes
+    FIELDS = (
+        Column("account", "ZACCOUNT2"),
+        Column("from_investment_holding", "ZFROMINVESTMENTHOLDING"),
+        Column("from_symbol", "ZFROMSYMBOL", intern=True),
+        Column("to_investment_holding", "ZTOINVESTMENTHOLDING"),
+        Column("to_symbol", "ZTOSYMBOL", intern=True),
+        Column("from_number_of_shares", "ZFROMNUMBEROFSHARES"),
+        Column("to_number_of_shares", "ZTONUMBEROFSHARES"),
+        Column("original_fee", "ZORIGINALFEE"),
+        Column("original_fee_currency", "ZORIGINALFEECURRENCY", intern=True),
+    )
+
+    def _fix(self):
         if self.original_fee_currency == self.from_symbol:
             self.from_number_of_shares += self.original_fee
         elif self.original_fee_currency == self.to_symbol:
             self.to_number_of_shares += self.original_fee
 
-        # Validate
-        self.validate()
-
     def validate(self):
+        super(InvestmentExchangeTransaction, self).validate()
         assert self.account is not None
         assert self.from_investment_holding is not None
         assert self.from_symbol
@@ -144,17 +138,14 @@ class InvestmentExchangeTransaction(Transaction):
         assert self.original_fee_currency in [self.from_symbol, self.to_symbol]
 
 
-@dataclass
+@dataclass(init=False, slots=True)
 class InvestmentTransaction(Transaction, ABC):
     """
     ENT: 39
     """
 
-    def __init__(self, row):
-        super().__init__(row)
-
 
-@dataclass
+@dataclass(init=False, slots=True)
 class InvestmentBuyTransaction(InvestmentTransaction):
     """
     ENT: 40
@@ -169,45 +160,39 @@ class InvestmentBuyTransaction(InvestmentTransaction):
     number_of_shares: Decimal
     price_per_share: Decimal
 
-    def __init__(self, row):
-        super().__init__(row)
-        self.account = row["ZACCOUNT2"]
-        self.amount = RDH.get_decimal(row, "ZAMOUNT1")
-
-        self.fee = RDH.get_decimal(row, "ZFEE2")
+    FIELDS = (
+        Column("account", "ZACCOUNT2"),
+        Column("fee", "ZFEE2", RDH.to_decimal),
+        Column("investment_holding", "ZINVESTMENTHOLDING"),
+        Column("number_of_shares", "ZNUMBEROFSHARES1", RDH.to_decimal),
+        Column("price_per_share", "ZPRICEPERSHARE1", RDH.to_decimal),
+    )
 
-        self.investment_holding = row["ZINVESTMENTHOLDING"]
-        self.number_of_shares = RDH.get_decimal(row, "ZNUMBEROFSHARES1")
-        self.price_per_share = RDH.get_decimal(row, "ZPRICEPERSHARE1")
-
-        # Fixes
+    def _fix(self):
         self.fee = max(self.fee, 0)
 
-        # Validate
-        self.validate()
-
     def validate(self):
+        super(InvestmentBuyTransaction, self).validate()
         assert self.account is not None
         assert self.amount is not None
         assert self.amount <= 0
         assert self.fee is not None
         assert self.fee >= 0
         # Either tiny (close to 0) or positive
-        assert (
-            abs(self.fee) == pytest.approx(0, abs=ABS_TOLERANCE)
-            or self.fee > ABS_TOLERANCE
-        )
+        assert is_close(self.fee, 0, ABS_TOLERANCE) or self.fee > ABS_TOLERANCE
         assert self.investment_holding is not None
         assert self.number_of_shares is not None
         assert self.number_of_shares > 0
         assert self.price_per_share is not None
         assert self.price_per_share >= 0
-        assert -(
-            self.number_of_shares * self.price_per_share + self.fee
-        ) == pytest.approx(self.amount, abs=ABS_TOLERANCE)
+        assert is_close(
+            -(self.number_of_shares * self.price_per_share + self.fee),
+            self.amount,
+            ABS_TOLERANCE,
+        )
 
 
-@dataclass
+@dataclass(init=False, slots=True)
 class InvestmentSellTransaction(InvestmentTransaction):
     """
     ENT: 41
@@ -222,46 +207,40 @@ class InvestmentSellTransaction(InvestmentTransaction):
     number_of_shares: Decimal
     price_per_share: Decimal
 
-    def __init__(self, row):
-        super().__init__(row)
-        self.account = row["ZACCOUNT2"]
-        self.amount = RDH.get_decimal(row, "ZAMOUNT1")
-
-        self.fee = RDH.get_decimal(row, "ZFEE2")
+    FIELDS = (
+        Column("account", "ZACCOUNT2"),
+        Column("fee", "ZFEE2", RDH.to_decimal),
+        Column("investment_holding", "ZINVESTMENTHOLDING"),
+        Column("number_of_shares", "ZNUMBEROFSHARES1", RDH.to_decimal),
+        Column("price_per_share", "ZPRICEPERSHARE1", RDH.to_decimal),
+    )
 
-        self.investment_holding = row["ZINVESTMENTHOLDING"]
-        self.number_of_shares = RDH.get_decimal(row, "ZNUMBEROFSHARES1")
-        self.price_per_share = RDH.get_decimal(row, "ZPRICEPERSHARE1")
-
-        # Fixes
+    def _fix(self):
         self.fee = max(self.fee, 0)
 
-        # Validate
-        self.validate()
-
     def validate(self):
+        super(InvestmentSellTransaction, self).validate()
         assert self.account is not None
         assert self.amount is not None
 
         assert self.fee is not None
         assert self.fee >= 0
         # Either tiny (close to 0) or positive
-        assert (
-            abs(self.fee) == pytest.approx(0, abs=ABS_TOLERANCE)
-            or self.fee > ABS_TOLERANCE
-        )
+        assert is_close(self.fee, 0, ABS_TOLERANCE) or self.fee > ABS_TOLERANCE
 
         assert self.investment_holding is not None
         assert self.number_of_shares is not None
         assert self.number_of_shares > 0
         assert self.price_per_share is not None
         assert self.price_per_share >= 0
-        assert (
-            self.number_of_shares * self.price_per_share - self.fee
-        ) == pytest.approx(self.amount, abs=ABS_TOLERANCE)
+        assert is_close(
+            self.number_of_shares * self.price_per_share - self.fee,
+            self.amount,
+            ABS_TOLERANCE,
+        )
 
 
-@dataclass
+@dataclass(init=False, slots=True)
 class ReconcileTransaction(Transaction):
     """
     ENT: 42
@@ -272,18 +251,18 @@ class ReconcileTransaction(Transaction):
     reconcile_amount: Decimal | None  # new balance
     reconcile_number_of_shares: Decimal | None  # new balance
 
-    def __init__(self, row):
-        super().__init__(row)
-        self.account = row["ZACCOUNT2"]
-        self.reconcile_amount = RDH.get_nullable_decimal(row, "ZRECONCILEAMOUNT")
-        self.reconcile_number_of_shares = RDH.get_nullable_decimal(
-            row, "ZRECONCILENUMBEROFSHARES"
-        )
-
-        # Validate
-        self.validate()
+    FIELDS = (
+        Column("account", "ZACCOUNT2"),
+        Column("reconcile_amount", "ZRECONCILEAMOUNT", RDH.to_nullable_decimal),
+        Column(
+            "reconcile_number_of_shares",
+            "ZRECONCILENUMBEROFSHARES",
+            RDH.to_nullable_decimal,
+        ),
+    )
 
     def validate(self):
+        super(ReconcileTransaction, self).validate()
         assert self.account is not None
         assert (
             self.reconcile_amount is not None
@@ -291,7 +270,7 @@ class ReconcileTransaction(Transaction):
         )
 
 
-@dataclass
+@dataclass(init=False, slots=True)
 class RefundTransaction(Transaction):
     """
     ENT: 43
@@ -306,26 +285,22 @@ class RefundTransaction(Transaction):
     original_amount: Decimal
     original_exchange_rate: Optional[Decimal]
 
-    def __init__(self, row):
-        super().__init__(row)
-        self.account = row["ZACCOUNT2"]
-        self.amount = RDH.get_decimal(row, "ZAMOUNT1")
-        self.payee = row["ZPAYEE2"]
-
-        self.original_currency = row["ZORIGINALCURRENCY"]
-        self.original_amount = RDH.get_decimal(row, "ZORIGINALAMOUNT")
-        self.original_exchange_rate = RDH.get_nullable_decimal(
-            row, "ZORIGINALEXCHANGERATE"
-        )
-
-        # Fixes
+    FIELDS = (
+        Column("account", "ZACCOUNT2"),
+        Column("payee", "ZPAYEE2"),
+        Column("original_currency", "ZORIGINALCURRENCY", intern=True),
+        Column("original_amount", "ZORIGINALAMOUNT", RDH.to_decimal),
+        Column(
+            "original_exchange_rate", "ZORIGINALEXCHANGERATE", RDH.to_nullable_decimal
+        ),
+    )
+
+    def _fix(self):
         if self.original_exchange_rate == Decimal(0):
             self.original_exchange_rate = None
 
-        # Validate
-        self.validate()
-
     def validate(self):
+        super(RefundTransaction, self).validate()
         assert self.account is not None
         assert self.amount is not None
         assert self.amount > 0
@@ -335,23 +310,23 @@ class RefundTransaction(Transaction):
         assert self.original_amount > 0
 
         if self.original_exchange_rate is not None:
-            assert self.amount == pytest.approx(
-                self.original_amount * self.original_exchange_rate, abs=ABS_TOLERANCE
+            assert is_close(
+                self.amount,
+                self.original_amount * self.original_exchange_rate,
+                ABS_TOLERANCE,
             )
 
 
-@dataclass
+@dataclass(init=False, slots=True)
 class TransferBudgetTransaction(Transaction):
     """
     ENT: 44
     """
 
-    def __init__(self, row):
-        super().__init__(row)
-        # TODO: Not Implemented
+    # TODO: Not Implemented
 
 
-@dataclass
+@dataclass(init=False, slots=True)
 class TransferDepositTransaction(Transaction):
     """
     ENT: 45
@@ -374,31 +349,24 @@ class TransferDepositTransaction(Transaction):
 
     original_exchange_rate: Decimal
 
-    def __init__(self, row):
-        super().__init__(row)
-        self.account = row["ZACCOUNT2"]
-        self.amount = RDH.get_decimal(row, "ZAMOUNT1")
-
-        self.sender_account = row["ZSENDERACCOUNT"]
-        self.sender_transaction = row["ZSENDERTRANSACTION"]
-
-        self.original_amount = RDH.get_decimal(row, "ZORIGINALAMOUNT")
-        self.original_currency = row["ZORIGINALCURRENCY"]
-        self.sender_amount = RDH.get_decimal(row, "ZORIGINALSENDERAMOUNT")
-        self.sender_currency = row["ZORIGINALSENDERCURRENCY"]
-
-        self.original_fee = RDH.get_nullable_decimal(row, "ZORIGINALFEE")
-        self.original_fee_currency = row["ZORIGINALFEECURRENCY"]
-
-        self.original_exchange_rate = RDH.get_decimal(row, "ZORIGINALEXCHANGERATE")
-
-        # Fixes
+    FIELDS = (
+        Column("account", "ZACCOUNT2"),
+        Column("sender_account", "ZSENDERACCOUNT"),
+        Column("sender_transaction", "ZSENDERTRANSACTION"),
+        Column("original_amount", "ZORIGINALAMOUNT", RDH.to_decimal),
+        Column("original_currency", "ZORIGINALCURRENCY", intern=True),
+        Column("sender_amount", "ZORIGINALSENDERAMOUNT", RDH.to_decimal),
+        Column("sender_currency", "ZORIGINALSENDERCURRENCY", intern=True),
+        Column("original_fee", "ZORIGINALFEE", RDH.to_nullable_decimal),
+        Column("original_fee_currency", "ZORIGINALFEECURRENCY", intern=True),
+        Column("original_exchange_rate", "ZORIGINALEXCHANGERATE", RDH.to_decimal),
+    )
+
+    def _fix(self):
         self.original_amount = abs(self.original_amount)
 
-        # Validate
-        self.validate()
-
     def validate(self):
+        super(TransferDepositTransaction, self).validate()
         assert self.account is not None
         assert self.amount is not None
         assert self.amount > 0
@@ -417,14 +385,15 @@ class TransferDepositTransaction(Transaction):
         assert self.original_exchange_rate is not None
 
         # assert self.amount ==  self.original_amount # original_amount could be different with amount ZCURRENCYEXCHANGERATE is playing up
-        assert self.original_amount == pytest.approx(
+        assert is_close(
+            self.original_amount,
             -self.sender_amount * self.original_exchange_rate
             - (self.original_fee or 0),
-            abs=ABS_TOLERANCE,
+            ABS_TOLERANCE,
         )
 
 
-@dataclass
+@dataclass(init=False, slots=True)
 class TransferWithdrawTransaction(Transaction):
     """
     ENT: 46
@@ -447,31 +416,24 @@ class TransferWithdrawTransaction(Transaction):
 
     original_exchange_rate: Decimal
 
-    def __init__(self, row):
-        super().__init__(row)
-        self.account = row["ZACCOUNT2"]
-        self.amount = RDH.get_decimal(row, "ZAMOUNT1")
-
-        self.recipient_account = row["ZRECIPIENTACCOUNT1"]
-        self.recipient_transaction = row["ZRECIPIENTTRANSACTION"]
-
-        self.original_amount = RDH.get_decimal(row, "ZORIGINALAMOUNT")
-        self.original_currency = row["ZORIGINALCURRENCY"]
-        self.recipient_amount = RDH.get_decimal(row, "ZORIGINALRECIPIENTAMOUNT")
-        self.recipient_currency = row["ZORIGINALRECIPIENTCURRENCY"]
-
-        self.original_fee = RDH.get_nullable_decimal(row, "ZORIGINALFEE")
-        self.original_fee_currency = row["ZORIGINALFEECURRENCY"]
-
-        self.original_exchange_rate = RDH.get_decimal(row, "ZORIGINALEXCHANGERATE")
-
-        # Fixes
+    FIELDS = (
+        Column("account", "ZACCOUNT2"),
+        Column("recipient_account", "ZRECIPIENTACCOUNT1"),
+        Column("recipient_transaction", "ZRECIPIENTTRANSACTION"),
+        Column("original_amount", "ZORIGINALAMOUNT", RDH.to_decimal),
+        Column("original_currency", "ZORIGINALCURRENCY", intern=True),
+        Column("recipient_amount", "ZORIGINALRECIPIENTAMOUNT", RDH.to_decimal),
+        Column("recipient_currency", "ZORIGINALRECIPIENTCURRENCY", intern=True),
+        Column("original_fee", "ZORIGINALFEE", RDH.to_nullable_decimal),
+        Column("original_fee_currency", "ZORIGINALFEECURRENCY", intern=True),
+        Column("original_exchange_rate", "ZORIGINALEXCHANGERATE", RDH.to_decimal),
+    )
+
+    def _fix(self):
         self.recipient_amount = abs(self.recipient_amount)
 
-        # Validate
-        self.validate()
-
     def validate(self):
+        super(TransferWithdrawTransaction, self).validate()
         assert self.account is not None
         assert self.amount is not None
         assert self.amount < 0
@@ -490,13 +452,14 @@ class TransferWithdrawTransaction(Transaction):
         assert self.original_exchange_rate is not None
 
         assert self.amount == self.original_amount
-        assert self.amount == pytest.approx(
+        assert is_close(
+            self.amount,
             -self.recipient_amount / self.original_exchange_rate,
-            abs=ABS_TOLERANCE,
+            ABS_TOLERANCE,
         )
 
 
-@dataclass
+@dataclass(init=False, slots=True)
 class WithdrawTransaction(Transaction):
     """
     ENT: 47
@@ -511,29 +474,25 @@ class WithdrawTransaction(Transaction):
     original_amount: Decimal  # neg: expense, pos: income ATTENTION: sign got fixed
     original_exchange_rate: Optional[Decimal]
 
-    def __init__(self, row):
-        super().__init__(row)
-        self.account = row["ZACCOUNT2"]
-        self.amount = RDH.get_decimal(row, "ZAMOUNT1")
-        self.payee = row["ZPAYEE2"]
-
-        self.original_currency = row["ZORIGINALCURRENCY"]
-        self.original_amount = RDH.get_decimal(row, "ZORIGINALAMOUNT")
-        self.original_exchange_rate = RDH.get_nullable_decimal(
-            row, "ZORIGINALEXCHANGERATE"
-        )
-
-        # Fixes
+    FIELDS = (
+        Column("account", "ZACCOUNT2"),
+        Column("payee", "ZPAYEE2"),
+        Column("original_currency", "ZORIGINALCURRENCY", intern=True),
+        Column("original_amount", "ZORIGINALAMOUNT", RDH.to_decimal),
+        Column(
+            "original_exchange_rate", "ZORIGINALEXCHANGERATE", RDH.to_nullable_decimal
+        ),
+    )
+
+    def _fix(self):
         if self.amount * self.original_amount < 0:
             self.original_amount = -self.original_amount
 
         if self.original_exchange_rate == Decimal(0):
             self.original_exchange_rate = None
 
-        # Validate
-        self.validate()
-
     def validate(self):
+        super(WithdrawTransaction, self).validate()
         assert self.account is not None
         assert self.amount is not None
         # self.payee can be None
@@ -543,6 +502,8 @@ class WithdrawTransaction(Transaction):
         assert self.amount * self.original_amount > 0
 
         if self.original_exchange_rate is not None:
-            assert self.amount == pytest.approx(
-                self.original_amount * self.original_exchange_rate, abs=ABS_TOLERANCE
+            assert is_close(
+                self.amount,
+                self.original_amount * self.original_exchange_rate,
+                ABS_TOLERANCE,
             )
@@ -1,35 +1,477 @@
+from datetime import date, datetime
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional, Set, Tuple
 import logging
+import time
+
+import numpy as np
+import pandas as pd
 
 from moneywiz_api.database_accessor import DatabaseAccessor
+from moneywiz_api.engines.balance_engine import BalanceEngine
+from moneywiz_api.engines.fx_engine import FxEngine
+from moneywiz_api.engines.position_engine import PositionEngine
+from moneywiz_api.engines.refund_index import RefundIndex
+from moneywiz_api.engines.tag_index import TagIndex
+from moneywiz_api.engines.transfer_graph import TransferGraph
+from moneywiz_api.frames import category_totals_frame, records_frame
 from moneywiz_api.managers.account_manager import AccountManager
 from moneywiz_api.managers.category_manager import CategoryManager
 from moneywiz_api.managers.investment_holding_manager import (
     InvestmentHoldingManager,
 )
 from moneywiz_api.managers.payee_manager import PayeeManager
+from moneywiz_api.managers.record_manager import RecordManager, RefreshResult
 from moneywiz_api.managers.transaction_manager import TransactionManager
+from moneywiz_api.model.account import InvestmentAccount
 from moneywiz_api.managers.tag_manager import TagManager
+from moneywiz_api.model.transaction import Transaction
+from moneywiz_api.snapshot import (
+    load_snapshot,
+    save_snapshot,
+    snapshot_key,
+    snapshot_path,
+)
+from moneywiz_api.stats import ManagerStats, Stats, estimate_memory, time_validation
+from moneywiz_api.types import ID
 
 logger = logging.getLogger(__name__)
 
 
 class MoneywizApi:
-    def __init__(self, db_file: Path):
-        self.accessor = DatabaseAccessor(db_file)
-        self.account_manager = AccountManager()
-        self.payee_manager = PayeeManager()
-        self.category_manager = CategoryManager()
-        self.transaction_manager = TransactionManager()
-        self.investment_holding_manager = InvestmentHoldingManager()
-        self.tag_manager = TagManager()
+    def __init__(
+        self,
+        db_file: Path,
+        lazy: bool = False,
+        full_rows: bool = False,
+        compact: bool = False,
+        raw_rows: Optional[str] = None,
+        validation: str = "strict",
+        profile: bool = False,
+        cache_dir: Optional[Path] = None,
+        workers: int = 1,
+        open_mode: str = "default",
+        processes: int = 1,
+    ):
+        """
+        :param db_file: path to the MoneyWiz sqlite file
+        :param lazy: when True, nothing is loaded up front; each manager (and each
+            auxiliary map of the transaction manager) is loaded on first access.
+            Use `preload` to load a chosen set of managers eagerly.
+        :param full_rows: keep every ZSYNCOBJECT column in `Record._raw` instead of
+            only the columns the models read (useful with `Record.filtered()`)
+        :param compact: trade some speed for memory: intern repeated strings and,
+            unless `raw_rows` says otherwise, do not keep the raw rows
+        :param raw_rows: what records keep of their row, "keep", "drop", or
+            "refetch" to read it again when `Record.filtered()` is called.
+            Defaults to "refetch" when compact, "keep" otherwise.
+        :param validation: consistency checks run on the loaded records, "strict"
+            (every record), "sampled" (a deterministic subset) or "off"
+        :param profile: also measure the validation time and the approximate memory
+            held by each manager as it loads (slower), see `stats`. The validation
+            is not timed when the raw rows are dropped.
+        :param cache_dir: keep a snapshot of the loaded managers in this directory,
+            and restore it instead of loading while the database is unchanged
+            (see `snapshot.py`)
+        :param workers: with more than one, `load` runs the manager loads and the
+            transaction map queries in that many threads, each on its own
+            read-only connection. Building the rows and records holds the GIL, so
+            only the time SQLite spends stepping through the tables overlaps;
+            measure with `benchmarks/suite.py --workers` before relying on it.
+        :param open_mode: how the database file is opened, "default", "ro" (read-only
+            and memory-mapped) or "immutable" (for copies nothing writes to), see
+            `DatabaseAccessor`
+        :param processes: decode the transactions in a pool of that many processes,
+            for very large databases on multi-core machines (see
+            `RecordManager.load`)
+        """
+        if raw_rows is None:
+            raw_rows = "refetch" if compact else "keep"
+        self.accessor = DatabaseAccessor(
+            db_file,
+            full_rows=full_rows,
+            raw_rows=raw_rows,
+            intern_strings=compact,
+            validation=validation,
+            open_mode=open_mode,
+        )
+        self._lazy = lazy
+        self._profile = profile
+        self._manager_stats: Dict[str, ManagerStats] = {}
+        self._managers: Dict[str, RecordManager] = {
+            "account_manager": AccountManager(),
+            "payee_manager": PayeeManager(),
+            "category_manager": CategoryManager(),
+            "transaction_manager": TransactionManager(),
+            "investment_holding_manager": InvestmentHoldingManager(),
+            "tag_manager": TagManager(),
+        }
+        self._loaded: Set[str] = set()
+        self._db_file = db_file
+        self._cache_dir = cache_dir
+        self._workers = workers
+        self._processes = processes
 
-        self.load()
+        if cache_dir is not None and self._restore_snapshot():
+            return
+        if not lazy:
+            self.load()
 
     def load(self):
-        self.account_manager.load(self.accessor)
-        self.payee_manager.load(self.accessor)
-        self.category_manager.load(self.accessor)
-        self.transaction_manager.load(self.accessor)
-        self.investment_holding_manager.load(self.accessor)
-        self.tag_manager.load(self.accessor)
+        key = self._snapshot_key() if self._cache_dir is not None else None
+        if self._workers > 1:
+            self._load_parallel()
+        else:
+            for name in self._managers:
+                self._load_manager(name)
+        if key is not None:
+            save_snapshot(
+                snapshot_path(self._cache_dir, self._db_file), key, self._managers
+            )
+
+    def _snapshot_key(self) -> Tuple[Any, ...]:
+        return snapshot_key(self._db_file, self.accessor, self._managers)
+
+    def _restore_snapshot(self) -> bool:
+        start = time.perf_counter()
+        managers = load_snapshot(
+            snapshot_path(self._cache_dir, self._db_file),
+            self._snapshot_key(),
+            self.accessor,
+        )
+        if managers is None or managers.keys() != self._managers.keys():
+            return False
+        self._managers = managers
+        self._loaded.update(managers)
+        for name, manager in managers.items():
+            self._manager_stats[name] = ManagerStats(objects=len(manager.records()))
+        logger.debug("Restored snapshot in %.3fs", time.perf_counter() - start)
+        return True
+
+    def preload(self, *names: str) -> None:
+        """
+        Eagerly load the given managers, e.g. `preload("account_manager")`.
+        Without arguments, every manager is loaded, including the auxiliary maps of
+        the transaction manager.
+        """
+        for name in names or self._managers.keys():
+            if name not in self._managers:
+                raise ValueError(f"Unknown manager {name}")
+            manager = self._manager(name)
+            if isinstance(manager, TransactionManager):
+                manager.load_maps()
+
+    def refresh(self) -> Dict[str, RefreshResult]:
+        """
+        Bring the loaded managers up to date with the database, applying only the
+        inserted, updated and deleted rows. Managers not loaded yet are skipped;
+        they will read the current data on first access.
+
+        :return: the changes applied, per manager
+        """
+        ret = {
+            name: manager.refresh(self.accessor)
+            for name, manager in self._managers.items()
+            if name in self._loaded
+        }
+        # Positions start from the opening shares of the holdings, balances and
+        # rates depend on the accounts
+        if "transaction_manager" in self._loaded and any(
+            ret[name].changed()
+            for name in ("account_manager", "investment_holding_manager")
+            if name in ret
+        ):
+            self._managers["transaction_manager"].invalidate_engines()
+        return ret
+
+    def iter_transactions(
+        self,
+        account: Optional[ID] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Iterator[Transaction]:
+        """
+        Stream transactions in date order without loading the transaction manager,
+        see `TransactionManager.iter_transactions`.
+        """
+        manager: TransactionManager = self._managers["transaction_manager"]
+        return manager.iter_transactions(self.accessor, account, since, until)
+
+    def transactions_frame(self, decimal_scale: Optional[int] = None) -> pd.DataFrame:
+        """
+        Every transaction as a row of a typed DataFrame, read column-wise from the
+        database without building records, see `frames.records_frame`.
+
+        Values are the stored ones, without the corrections the transaction records
+        get from their `_fix()`: e.g. `original_amount` keeps its stored sign on
+        withdraws and transfer deposits, as does `recipient_amount` on transfer
+        withdraws, a zero `original_exchange_rate` stays 0 rather than missing,
+        investment fees are not clamped at 0 and exchange shares do not include the
+        fee. Nothing is validated.
+        """
+        return records_frame(
+            self.accessor, self._managers["transaction_manager"].ents, decimal_scale
+        )
+
+    def accounts_frame(self, decimal_scale: Optional[int] = None) -> pd.DataFrame:
+        """
+        Every account as a row of a typed DataFrame, see `transactions_frame`.
+        Values are the stored ones, which the account records use as they are
+        (they have no `_fix()` corrections); nothing is validated.
+        """
+        return records_frame(
+            self.accessor, self._managers["account_manager"].ents, decimal_scale
+        )
+
+    def investment_holdings_frame(
+        self, decimal_scale: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Every investment holding as a row of a typed DataFrame, see
+        `transactions_frame`. Values are the stored ones, which the holding records
+        use as they are (they have no `_fix()` corrections); nothing is validated.
+        """
+        return records_frame(
+            self.accessor,
+            self._managers["investment_holding_manager"].ents,
+            decimal_scale,
+        )
+
+    def category_totals(
+        self,
+        user_id: Optional[ID] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        granularity: Optional[str] = "month",
+        rollup: bool = True,
+    ) -> pd.DataFrame:
+        """
+        Spending and income per category and period, e.g. per month, computed by
+        SQLite from the category assignments (split amounts counted apart) without
+        loading the transactions. With `rollup`, parent categories include their
+        subcategories. See `DatabaseAccessor.get_category_totals`.
+        """
+        return category_totals_frame(
+            self.accessor, user_id, since, until, granularity, rollup
+        )
+
+    def net_worth_series(
+        self,
+        user_id: ID,
+        start: date,
+        end: date,
+        freq: str = "D",
+        base_currency: Optional[str] = None,
+    ) -> pd.Series:
+        """
+        Net worth of a user at the end of each day of `pd.date_range(start, end,
+        freq)`: the balances of all their accounts, plus the shares of the holdings
+        of their investment accounts valued at their manual historical prices (a
+        holding counts from its first known price). Each account is one vectorised
+        lookup of all the points, see `BalanceEngine.balances_at`.
+
+        :param base_currency: convert every account at the rates of `fx_engine`;
+            needed when the accounts are not all in the same currency
+        :return: float64 values indexed by the points
+        """
+        points = pd.date_range(start, end, freq=freq)
+        # End of each day, inclusive
+        ends = (points + pd.Timedelta(days=1)).values.astype("datetime64[us]")
+        ends -= np.timedelta64(1, "us")
+
+        accounts = self.account_manager.get_accounts_for_user(user_id)
+        if base_currency is None:
+            currencies = {x.currency for x in accounts}
+            if len(currencies) > 1:
+                raise ValueError(
+                    f"Accounts of user {user_id} are in {sorted(currencies)}, "
+                    "pass a base_currency"
+                )
+
+        holding_manager = self.investment_holding_manager
+        holdings = {
+            x.id: holding_manager.get_holdings_for_account(x.id)
+            for x in accounts
+            if isinstance(x, InvestmentAccount)
+        }
+        # One query for the prices of every holding
+        prices = holding_manager.price_histories(
+            y.id for x in holdings.values() for y in x
+        )
+        balance_engine = self.balance_engine
+
+        total = np.zeros(len(points))
+        for account in accounts:
+            values = balance_engine.balances_at(account.id, ends)
+            for holding in holdings.get(account.id, []):
+                shares = self.position_engine.shares_at(holding.id, ends)
+                values += np.nan_to_num(shares * prices[holding.id].price_at(ends))
+            if base_currency is not None and account.currency != base_currency:
+                values = values * self.fx_engine.rates(
+                    account.currency, base_currency, ends
+                )
+            total += values
+        return pd.Series(total, index=points, name="net_worth")
+
+    def stats(self) -> Stats:
+        """
+        Wall time, rows fetched and records built by each loaded manager, and the
+        calls, rows and time of each kind of query so far. With `profile`, also the
+        validation time and approximate memory of each manager.
+        """
+        return Stats(
+            managers=dict(self._manager_stats),
+            queries=dict(self.accessor.query_stats),
+        )
+
+    def _load_manager(self, name: str) -> None:
+        self._manager_stats[name] = self._timed_load(name, self.accessor, self._lazy)
+        self._loaded.add(name)
+        if self._profile:
+            self._profile_manager(name)
+
+    def _timed_load(
+        self, name: str, accessor: DatabaseAccessor, lazy: bool
+    ) -> ManagerStats:
+        manager = self._managers[name]
+        logger.debug("Loading %s", name)
+        queries_before = list(accessor.query_stats.values())
+        query_seconds = -sum(x.seconds for x in queries_before)
+        rows = -sum(x.rows for x in queries_before)
+        start = time.perf_counter()
+        if isinstance(manager, TransactionManager):
+            manager.load(accessor, lazy=lazy, processes=self._processes)
+        else:
+            manager.load(accessor)
+        seconds = time.perf_counter() - start
+
+        queries_after = list(accessor.query_stats.values())
+        logger.debug("Loaded %s in %.3fs", name, seconds)
+        return ManagerStats(
+            seconds=seconds,
+            query_seconds=query_seconds + sum(x.seconds for x in queries_after),
+            rows=rows + sum(x.rows for x in queries_after),
+            objects=len(manager.records()),
+        )
+
+    def _profile_manager(self, name: str) -> None:
+        manager, stats = self._managers[name], self._manager_stats[name]
+        options = self.accessor.decode_options
+        # Without their raw row, the records cannot be validated as they were loaded
+        if options.raw_rows != "drop":
+            stats.validation_seconds = time_validation(manager, options.validation)
+        stats.memory = estimate_memory(manager, self.accessor)
+
+    def _load_parallel(self) -> None:
+        """
+        Every manager, and every map of the transaction manager, is loaded by a
+        worker on a connection of its own: SQLite runs queries without holding the
+        GIL, so they overlap with each other and with the decoding. The results are
+        merged in the usual order once all are done.
+        """
+
+        def in_reader(func: Callable[[DatabaseAccessor], Any]) -> Callable[[], Any]:
+            def run():
+                accessor = self.accessor.reader()
+                try:
+                    return func(accessor), accessor.query_stats
+                finally:
+                    accessor.close()
+
+            return run
+
+        # Longest first: the transactions, then their maps
+        names = ["transaction_manager"]
+        names += [x for x in self._managers if x not in names]
+        map_queries: Dict[str, Callable[[DatabaseAccessor], Any]] = {}
+        if not self._lazy:
+            map_queries = {
+                "category_assignment": DatabaseAccessor.get_category_assignment,
+                "refund_maps": DatabaseAccessor.get_refund_maps,
+                "tags_map": DatabaseAccessor.get_tags_map,
+            }
+        with ThreadPoolExecutor(self._workers) as pool:
+            loads = {
+                name: pool.submit(
+                    in_reader(lambda x, name=name: self._timed_load(name, x, True))
+                )
+                for name in names
+            }
+            maps = {
+                name: pool.submit(in_reader(query))
+                for name, query in map_queries.items()
+            }
+
+            results = {
+                **{name: loads[name].result() for name in self._managers},
+                **{name: future.result() for name, future in maps.items()},
+            }
+        for name, (_, query_stats) in results.items():
+            for query, stats in query_stats.items():
+                self.accessor.query_stats[query].merge(stats)
+
+        for name, manager in self._managers.items():
+            manager.attach(self.accessor)
+            self._manager_stats[name] = results[name][0]
+            self._loaded.add(name)
+        if map_queries:
+            self._managers["transaction_manager"].load_maps(
+                **{name: results[name][0] for name in map_queries}
+            )
+        if self._profile:
+            for name in self._managers:
+                self._profile_manager(name)
+
+    def _manager(self, name: str) -> RecordManager:
+        if name not in self._loaded:
+            self._load_manager(name)
+        return self._managers[name]
+
+    @property
+    def account_manager(self) -> AccountManager:
+        return self._manager("account_manager")
+
+    @property
+    def payee_manager(self) -> PayeeManager:
+        return self._manager("payee_manager")
+
+    @property
+    def category_manager(self) -> CategoryManager:
+        return self._manager("category_manager")
+
+    @property
+    def transaction_manager(self) -> TransactionManager:
+        return self._manager("transaction_manager")
+
+    @property
+    def investment_holding_manager(self) -> InvestmentHoldingManager:
+        return self._manager("investment_holding_manager")
+
+    @property
+    def tag_manager(self) -> TagManager:
+        return self._manager("tag_manager")
+
+    @property
+    def balance_engine(self) -> BalanceEngine:
+        return self.transaction_manager.balance_engine(self.account_manager)
+
+    @property
+    def position_engine(self) -> PositionEngine:
+        return self.transaction_manager.position_engine(self.investment_holding_manager)
+
+    @property
+    def fx_engine(self) -> FxEngine:
+        return self.transaction_manager.fx_engine(self.account_manager)
+
+    @property
+    def transfer_graph(self) -> TransferGraph:
+        return self.transaction_manager.transfer_graph()
+
+    @property
+    def refund_index(self) -> RefundIndex:
+        return self.transaction_manager.refund_index()
+
+    @property
+    def tag_index(self) -> TagIndex:
+        return self.transaction_manager.tag_index()
@@ -0,0 +1,149 @@
+"""
+On-disk snapshots of the loaded managers, see `MoneywizApi(..., cache_dir=...)`.
+
+A snapshot is the pickled state of every manager (records, gid lookups, versions,
+transaction maps and indexes) behind a small header and a key. The key identifies
+the database file (path, size, modification time, and those of its write-ahead
+log), its Z_PRIMARYKEY maxima, the decode options, and the field plans of the
+models, so a snapshot is only used for the exact data and code that produced it.
+Any mismatch, or an unreadable file, falls back to a full load.
+
+Raw rows cannot be pickled: records restored from a snapshot read their row again
+from the database when `Record.filtered()` needs it, unless it was dropped.
+
+Snapshots are pickles, keep the cache directory private.
+"""
+
+import gc
+import hashlib
+import logging
+import os
+import pickle
+import struct
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from moneywiz_api.database_accessor import DatabaseAccessor
+from moneywiz_api.managers.record_manager import RecordManager
+from moneywiz_api.model.decoder import field_plan
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of the snapshot or of the managers changes
+SNAPSHOT_VERSION = 4
+_MAGIC = b"MWSNAP"
+_HEADER = struct.Struct(f"<{len(_MAGIC)}sH")
+
+
+def snapshot_path(cache_dir: Path, db_path: Path) -> Path:
+    """
+    :return: the snapshot file of a database in `cache_dir`
+    """
+    digest = hashlib.sha256(str(Path(db_path).resolve()).encode()).hexdigest()
+    return Path(cache_dir) / f"{digest[:24]}.snapshot"
+
+
+def _file_state(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _models_fingerprint(managers: Dict[str, RecordManager]) -> str:
+    plans = [
+        (
+            name,
+            typename,
+            f"{constructor.__module__}.{constructor.__qualname__}",
+            [
+                (
+                    column.attr,
+                    column.column,
+                    getattr(column.convert, "__qualname__", None),
+                    column.intern,
+                )
+                for column in field_plan(constructor)
+            ],
+        )
+        for name, manager in managers.items()
+        for typename, constructor in manager.ents.items()
+    ]
+    return hashlib.sha256(repr(plans).encode()).hexdigest()
+
+
+def snapshot_key(
+    db_path: Path, db_accessor: DatabaseAccessor, managers: Dict[str, RecordManager]
+) -> Tuple[Any, ...]:
+    options = db_accessor.decode_options
+    db_path = Path(db_path).resolve()
+    return (
+        str(db_path),
+        _file_state(db_path),
+        _file_state(db_path.with_name(db_path.name + "-wal")),
+        sorted(db_accessor.get_primarykey_max().items()),
+        options.raw_rows,
+        options.intern_strings,
+        options.validation,
+        _models_fingerprint(managers),
+    )
+
+
+def save_snapshot(
+    path: Path, key: Tuple[Any, ...], managers: Dict[str, RecordManager]
+) -> None:
+    """
+    Write the snapshot atomically: readers see the previous file or the new one.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, SNAPSHOT_VERSION))
+            pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+            # Records are pickled without their raw row, see `Record.__reduce__`
+            pickle.dump(managers, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def load_snapshot(
+    path: Path, key: Tuple[Any, ...], db_accessor: DatabaseAccessor
+) -> Optional[Dict[str, RecordManager]]:
+    """
+    :return: the managers of the snapshot, attached to `db_accessor`, or None when
+        there is no usable snapshot for `key`
+    """
+    try:
+        with open(path, "rb") as f:
+            magic, version = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC or version != SNAPSHOT_VERSION:
+                logger.debug("Ignoring snapshot %s of version %s", path, version)
+                return None
+            if pickle.load(f) != key:
+                logger.debug("Snapshot %s is out of date", path)
+                return None
+            # Collections would keep walking the objects being rebuilt, for nothing
+            gc.disable()
+            try:
+                managers: Dict[str, RecordManager] = pickle.load(f)
+            finally:
+                gc.enable()
+    except FileNotFoundError:
+        return None
+    except Exception:  # pylint: disable=broad-except
+        # A truncated or foreign file is not worth failing the load for
+        logger.warning("Ignoring unreadable snapshot %s", path, exc_info=True)
+        return None
+
+    raw = db_accessor.detached_raw()
+    for manager in managers.values():
+        if raw is not None:
+            for record in manager.records().values():
+                record._raw = raw
+        manager.attach(db_accessor)
+    return managers
@@ -0,0 +1,142 @@
+"""
+Load and query statistics, see `MoneywizApi.stats`.
+"""
+
+import random
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, NamedTuple, Optional, Sequence, TYPE_CHECKING
+
+from moneywiz_api.model.decoder import SAMPLE_EVERY
+
+if TYPE_CHECKING:
+    from moneywiz_api.database_accessor import DatabaseAccessor
+    from moneywiz_api.managers.record_manager import RecordManager
+
+
+class QueryEvent(NamedTuple):
+    """
+    Passed to the `after` query hooks of `DatabaseAccessor.add_query_hook`.
+    """
+
+    name: str
+    sql: str
+    params: Sequence[Any]
+    seconds: float
+    rows: int
+
+
+@dataclass
+class QueryStats:
+    calls: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+
+    def add(self, event: QueryEvent) -> None:
+        self.calls += 1
+        self.rows += event.rows
+        self.seconds += event.seconds
+
+    def merge(self, other: "QueryStats") -> None:
+        self.calls += other.calls
+        self.rows += other.rows
+        self.seconds += other.seconds
+
+
+@dataclass
+class ManagerStats:
+    # Wall time of the load, of which `query_seconds` was spent in SQLite
+    seconds: float = 0.0
+    query_seconds: float = 0.0
+    rows: int = 0
+    objects: int = 0
+    # Only measured when profiling
+    validation_seconds: Optional[float] = None
+    memory: Optional[int] = None
+
+    @property
+    def decode_seconds(self) -> float:
+        """
+        Time building the records: the load minus the queries and validation.
+        """
+        return self.seconds - self.query_seconds - (self.validation_seconds or 0)
+
+
+@dataclass
+class Stats:
+    managers: Dict[str, ManagerStats] = field(default_factory=dict)
+    queries: Dict[str, QueryStats] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        ret = asdict(self)
+        for name, manager in self.managers.items():
+            ret["managers"][name]["decode_seconds"] = manager.decode_seconds
+        return ret
+
+    def __str__(self) -> str:
+        def optional(value: Optional[float], spec: str) -> str:
+            return "-" if value is None else format(value, spec)
+
+        lines = [
+            f"{'manager':28}{'seconds':>9}{'query':>9}{'decode':>9}{'validate':>9}"
+            f"{'rows':>10}{'objects':>10}{'memory MB':>11}"
+        ]
+        for name, x in self.managers.items():
+            memory = None if x.memory is None else x.memory / 1e6
+            lines.append(
+                f"{name:28}{x.seconds:9.3f}{x.query_seconds:9.3f}"
+                f"{x.decode_seconds:9.3f}{optional(x.validation_seconds, '9.3f'):>9}"
+                f"{x.rows:10}{x.objects:10}{optional(memory, '11.1f'):>11}"
+            )
+        lines += ["", f"{'query':28}{'calls':>9}{'seconds':>9}{'rows':>10}"]
+        for name, x in self.queries.items():
+            lines.append(f"{name:28}{x.calls:9}{x.seconds:9.3f}{x.rows:10}")
+        return "\n".join(lines)
+
+
+def time_validation(manager: "RecordManager", validation: str) -> float:
+    """
+    :param validation: the level the records were loaded with
+    :return: seconds taken to run the same validation again on the records
+    """
+    records = manager.records().values()
+    if validation == "off":
+        return 0.0
+    if validation == "sampled":
+        records = [x for x in records if x.id % SAMPLE_EVERY == 0]
+    start = time.perf_counter()
+    for record in records:
+        record.validate()
+    return time.perf_counter() - start
+
+
+def estimate_memory(
+    manager: "RecordManager", db_accessor: "DatabaseAccessor", sample: int = 500
+) -> int:
+    """
+    Approximate memory held by the records of a manager: a random sample of them is
+    fetched and decoded again under tracemalloc, and what they retain is scaled up
+    to all the records.
+
+    :return: bytes, 0 without records (or rows left in the database)
+    """
+    ids = list(manager.records())
+    if not ids:
+        return 0
+    ids = random.sample(ids, min(sample, len(ids)))
+    tracemalloc.start()
+    try:
+        rows = db_accessor.query_objects_by_ids(
+            manager.ents.keys(), ids, manager.columns()
+        )
+        # Deleted from the database since the load
+        if not rows:
+            return 0
+        decoders = manager._decoders(db_accessor, tuple(rows[0].keys()))
+        records = [decoders[row["Z_ENT"]](row) for row in rows]
+        del rows
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return int(size / len(records) * len(manager.records()))
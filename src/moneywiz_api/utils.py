@@ -1,15 +1,64 @@
 from datetime import datetime
+from decimal import Decimal
+
+import numpy as np
 
 _CUTOFF = datetime(2001, 1, 1, 0, 0, 0).timestamp()
+_EPOCH = datetime(1970, 1, 1)
 
 
 def get_datetime(date: float) -> datetime:
     return datetime.fromtimestamp(date + _CUTOFF)
 
 
+def get_datetime64(dates: np.ndarray) -> np.ndarray:
+    """
+    Vectorised `get_datetime`: float dates (NaN for missing) to naive local
+    datetime64[us]. The UTC offset is resolved once per distinct hour.
+    """
+    timestamps = np.asarray(dates, dtype="float64") + _CUTOFF
+    known = ~np.isnan(timestamps)
+    hours, inverse = np.unique(np.floor(timestamps[known] / 3600), return_inverse=True)
+    offsets = np.array(
+        [
+            (datetime.fromtimestamp(hour * 3600) - _EPOCH).total_seconds() - hour * 3600
+            for hour in hours
+        ],
+        dtype="float64",
+    )
+    # Whole seconds and microseconds apart, rounded like datetime.fromtimestamp
+    local = timestamps[known] + offsets[inverse]
+    seconds = np.floor(local)
+    micros = np.round((local - seconds) * 1e6)
+    ret = np.full(timestamps.shape, np.datetime64("NaT"), dtype="datetime64[us]")
+    ret[known] = (seconds.astype("int64") * 1_000_000 + micros.astype("int64")).astype(
+        "datetime64[us]"
+    )
+    return ret
+
+
 def get_date_iso(date: float) -> str:
     return get_datetime(date).date().isoformat()
 
 
 def get_date(dt: datetime) -> float:
     return dt.timestamp() - _CUTOFF
+
+
+def get_date_offset() -> float:
+    """
+    :return: what to add to a stored date to get a Unix timestamp, as `get_datetime`
+    """
+    return _CUTOFF
+
+
+def is_close(
+    a: Decimal | float, b: Decimal | float, abs_tolerance: Decimal | float
+) -> bool:
+    """
+    Whether two amounts differ by at most `abs_tolerance` (no relative tolerance).
+    Decimal amounts are compared exactly; with a float among them, as floats.
+    """
+    if isinstance(a, float) or isinstance(b, float):
+        return abs(float(a) - float(b)) <= abs_tolerance
+    return abs(a - b) <= abs_tolerance
@@ -35,6 +35,18 @@ def test_cash_balance(test_account: int, expected_balance: Decimal):
     assert balance == pytest.approx(expected_balance, abs=0.01), f"balance={balance}"
 
 
+@pytest.mark.parametrize(
+    "test_account,expected_balance",
+    CASH_BALANCES,
+)
+def test_cash_balance_engine(test_account: int, expected_balance: Decimal):
+    balance = transaction_manager.balance_engine(account_manager).balance(
+        test_account, at=BALANCE_AS_OF_DATE
+    )
+
+    assert balance == pytest.approx(expected_balance, abs=0.01), f"balance={balance}"
+
+
 @pytest.mark.parametrize(
     "test_account,expected_holding_balance",
     HOLDINGS_BALANCES,
@@ -11,10 +11,13 @@ from moneywiz_api.model.transaction import (
     TransferWithdrawTransaction,
     TransferBudgetTransaction,
 )
+from moneywiz_api.database_accessor import DatabaseAccessor
+from moneywiz_api.managers.transaction_manager import TransactionManager
 from moneywiz_api.model.account import ForexAccount
 
 
-from conftest import transaction_manager, account_manager
+from conftest import moneywizApi, transaction_manager, account_manager
+from tests.integration.test_config import TEST_DB_PATH
 
 
 @pytest.mark.parametrize(
@@ -178,3 +181,69 @@ def test_all_transfer_withdraw_transaction(
 )
 def test_all_withdraw_transactions(withdraw_transaction: WithdrawTransaction):
     withdraw_transaction.validate()
+
+
+@pytest.mark.parametrize(
+    "account_id",
+    {
+        x.account
+        for _, x in transaction_manager.records().items()
+        if not isinstance(x, TransferBudgetTransaction)
+    },
+)
+def test_account_index(account_id):
+    scanned = [
+        x
+        for _, x in transaction_manager.records().items()
+        if not isinstance(x, TransferBudgetTransaction) and x.account == account_id
+    ]
+    indexed = transaction_manager.get_all_for_account(account_id)
+    assert indexed == sorted(scanned, key=lambda x: x.datetime)
+
+
+@pytest.mark.parametrize(
+    "transaction_type",
+    [WithdrawTransaction, DepositTransaction, TransferBudgetTransaction],
+)
+def test_type_index(transaction_type):
+    scanned = {
+        x.id
+        for _, x in transaction_manager.records().items()
+        if isinstance(x, transaction_type)
+    }
+    indexed = transaction_manager.get_all_of_type(transaction_type)
+    assert {x.id for x in indexed} == scanned
+    assert all(a.datetime <= b.datetime for a, b in zip(indexed, indexed[1:]))
+
+
+def test_iter_transactions():
+    streamed = list(
+        transaction_manager.iter_transactions(transaction_manager._db_accessor)
+    )
+    assert sorted(x.id for x in streamed) == sorted(
+        x.id for x in transaction_manager.get_all()
+    )
+    assert all(a.datetime <= b.datetime for a, b in zip(streamed, streamed[1:]))
+
+
+def test_compact_transactions():
+    compact = TransactionManager()
+    compact.load(
+        DatabaseAccessor(TEST_DB_PATH, raw_rows="refetch", intern_strings=True),
+        lazy=True,
+    )
+    assert compact.records().keys() == transaction_manager.records().keys()
+    for record_id, record in list(compact.records().items())[:100]:
+        expected = transaction_manager.get(record_id)
+        assert record.as_dict() == expected.as_dict()
+        assert record.filtered().items() >= expected.filtered().items()
+
+
+def test_transactions_frame():
+    frame = moneywizApi.transactions_frame().set_index("id")
+    assert set(frame.index) == transaction_manager.records().keys()
+    for record_id, record in transaction_manager.records().items():
+        row = frame.loc[record_id]
+        assert row["type"] == type(record).__name__
+        assert row["datetime"] == record.datetime
+        assert row["amount"] == pytest.approx(float(record.amount))
@@ -0,0 +1,8 @@
+import pytest
+
+from benchmarks.synthetic_db import generate
+
+
+@pytest.fixture(scope="session")
+def synthetic_db(tmp_path_factory):
+    return generate(tmp_path_factory.mktemp("db") / "synthetic.db", transactions=2000)
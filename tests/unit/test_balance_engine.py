@@ -0,0 +1,72 @@
+from datetime import date, datetime, time
+
+import numpy as np
+import pytest
+
+from moneywiz_api import MoneywizApi
+from moneywiz_api.model.transaction import TransferBudgetTransaction
+
+DATES = [datetime(2013, 1, 1), datetime(2016, 6, 30, 12), datetime(2023, 12, 31)]
+
+
+def _scanned_balance(moneywiz_api: MoneywizApi, account_id, at=None):
+    balance = moneywiz_api.account_manager.get(account_id).opening_balance
+    for transaction in moneywiz_api.transaction_manager.records().values():
+        if isinstance(transaction, TransferBudgetTransaction):
+            continue
+        if transaction.account == account_id and (
+            at is None or transaction.datetime <= at
+        ):
+            balance += transaction.amount
+    return balance
+
+
+def test_balance(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db)
+    balance_engine = moneywiz_api.balance_engine
+    assert moneywiz_api.balance_engine is balance_engine
+
+    for account_id in moneywiz_api.account_manager.records():
+        assert balance_engine.balance(account_id) == _scanned_balance(
+            moneywiz_api, account_id
+        )
+        for at in DATES:
+            assert balance_engine.balance(account_id, at) == _scanned_balance(
+                moneywiz_api, account_id, at
+            )
+        points = np.array(DATES, dtype="datetime64[us]")
+        assert balance_engine.balances_at(account_id, points) == pytest.approx(
+            [float(balance_engine.balance(account_id, x)) for x in DATES]
+        )
+
+
+def test_daily_balances(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db)
+    balance_engine = moneywiz_api.balance_engine
+    user_id = next(iter(moneywiz_api.account_manager.records().values())).user
+
+    days, series = balance_engine.daily_balances_for_user(
+        user_id, date(2018, 1, 1), date(2018, 12, 31)
+    )
+    assert len(days) == 365
+    assert series.keys() == {
+        x.id for x in moneywiz_api.account_manager.get_accounts_for_user(user_id)
+    }
+    for account_id, balances in series.items():
+        assert len(balances) == len(days)
+        for day, balance in list(zip(days, balances))[::30]:
+            at = datetime.combine(day, time.max)
+            assert balance == balance_engine.balance(account_id, at)
+
+
+def test_balance_engine_invalidated(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db)
+    transaction_manager = moneywiz_api.transaction_manager
+    balance_engine = moneywiz_api.balance_engine
+
+    transaction = transaction_manager.get_all()[-1]
+    transaction_manager.remove(transaction.id)
+    assert moneywiz_api.balance_engine is not balance_engine
+    assert moneywiz_api.balance_engine.balance(transaction.account) == (
+        balance_engine.balance(transaction.account) - transaction.amount
+    )
@@ -0,0 +1,62 @@
+import logging
+import shutil
+import sqlite3
+
+from moneywiz_api import MoneywizApi
+
+
+def _walk_names(category_manager, category_id):
+    ret = []
+    current = category_manager.get(category_id)
+    while current:
+        ret.insert(0, current.name)
+        current = category_manager.get(current.parent_id)
+    return ret
+
+
+def test_category_tree(synthetic_db):
+    category_manager = MoneywizApi(synthetic_db).category_manager
+    categories = category_manager.records()
+
+    assert any(x.parent_id for x in categories.values())
+    for category_id, category in categories.items():
+        names = _walk_names(category_manager, category_id)
+        assert category_manager.get_name_chain(category_id) == names
+        assert category_manager.get_depth(category_id) == len(names) - 1
+        for ancestor_id in category_manager.get_ancestors(category_id):
+            assert category_manager.is_descendant(category_id, ancestor_id)
+            assert category_id in category_manager.descendants(ancestor_id)
+        assert not category_manager.is_descendant(category_id, category_id)
+    for category_id in categories:
+        assert category_manager.descendants(category_id) == {
+            x for x in categories if category_id in category_manager.get_ancestors(x)
+        }
+    assert category_manager.get_name_chain(-1) == []
+
+
+def test_category_parent_cycle(synthetic_db, tmp_path, caplog):
+    db_path = tmp_path / "copy.db"
+    shutil.copy(synthetic_db, db_path)
+    category_manager = MoneywizApi(db_path).category_manager
+    first, second = [x.id for x in category_manager.records().values()][:2]
+    con = sqlite3.connect(db_path)
+    with con:
+        for category_id, parent_id in ((first, second), (second, first)):
+            con.execute(
+                "UPDATE ZSYNCOBJECT SET ZPARENTCATEGORY = ? WHERE Z_PK = ?",
+                (parent_id, category_id),
+            )
+    con.close()
+
+    with caplog.at_level(logging.WARNING):
+        moneywiz_api = MoneywizApi(db_path)
+    assert "Cycle in the parents of category" in caplog.text
+    category_manager = moneywiz_api.category_manager
+    # The chains stop before repeating a category
+    chains = {x: category_manager.get_name_chain(x) for x in (first, second)}
+    assert sorted(len(x) for x in chains.values()) == [1, 2]
+    child = first if len(chains[first]) == 2 else second
+    parent = second if child == first else first
+    assert list(category_manager.get_ancestors(child)) == [parent]
+    assert category_manager.is_descendant(child, parent)
+    assert not category_manager.is_descendant(parent, child)
@@ -0,0 +1,46 @@
+from collections import defaultdict
+from datetime import datetime
+
+import pytest
+
+from moneywiz_api import MoneywizApi
+
+
+@pytest.mark.parametrize("rollup", [True, False])
+def test_category_totals(synthetic_db, rollup):
+    moneywiz_api = MoneywizApi(synthetic_db)
+    transaction_manager = moneywiz_api.transaction_manager
+    category_manager = moneywiz_api.category_manager
+    since, until = datetime(2020, 3, 1), datetime(2022, 6, 30, 23, 59, 59)
+
+    expected = defaultdict(float)
+    for transaction_id, assignments in transaction_manager.category_assignment.items():
+        transaction = transaction_manager.get(transaction_id)
+        if transaction is None or not since <= transaction.datetime <= until:
+            continue
+        month = transaction.datetime.date().replace(day=1)
+        for category_id, amount in assignments:
+            targets = [category_id]
+            if rollup:
+                targets += category_manager.get_ancestors(category_id)
+            for target in targets:
+                expected[(target, month)] += float(amount)
+
+    totals = moneywiz_api.category_totals(since=since, until=until, rollup=rollup)
+    actual = {(x.category, x.period.date()): x.amount for x in totals.itertuples()}
+    assert actual and actual.keys() == expected.keys()
+    for key, amount in actual.items():
+        assert amount == pytest.approx(expected[key])
+
+
+def test_category_totals_for_user(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db)
+    user_id = max(moneywiz_api.accessor.get_users())
+    totals = moneywiz_api.category_totals(user_id=user_id, granularity=None)
+
+    assert totals["period"].isna().all()
+    assert set(totals["category"]) <= {
+        x.id for x in moneywiz_api.category_manager.get_categories_for_user(user_id)
+    }
+    with pytest.raises(ValueError):
+        moneywiz_api.category_totals(granularity="quarter")
@@ -0,0 +1,29 @@
+import pytest
+
+from moneywiz_api import MoneywizApi
+
+
+@pytest.mark.parametrize("raw_rows", ["refetch", "drop"])
+def test_compact_transactions(synthetic_db, raw_rows):
+    default = MoneywizApi(synthetic_db).transaction_manager
+    compact = MoneywizApi(synthetic_db, compact=True, raw_rows=raw_rows)
+    transaction_manager = compact.transaction_manager
+
+    assert transaction_manager.records().keys() == default.records().keys()
+    for record_id, record in transaction_manager.records().items():
+        expected = default.get(record_id)
+        assert record.as_dict() == expected.as_dict()
+        record.validate()
+        if raw_rows == "refetch":
+            assert record.filtered() == expected.filtered()
+        else:
+            with pytest.raises(RuntimeError):
+                record.filtered()
+
+    # Interned: one string object per currency code
+    currencies = [
+        x.original_currency
+        for x in transaction_manager.records().values()
+        if getattr(x, "original_currency", None) is not None
+    ]
+    assert len({id(x) for x in currencies}) == len(set(currencies))
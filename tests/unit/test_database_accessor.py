@@ -0,0 +1,41 @@
+import sqlite3
+
+import pytest
+
+from moneywiz_api.database_accessor import DatabaseAccessor
+from moneywiz_api.model.record import Record
+
+
+@pytest.mark.parametrize("open_mode", ["ro", "immutable"])
+def test_read_only_open_modes(synthetic_db, open_mode):
+    accessor = DatabaseAccessor(synthetic_db, open_mode=open_mode)
+
+    assert accessor.get_users()
+    assert accessor._con.execute("PRAGMA query_only").fetchone()[0] == 1
+    assert accessor._con.execute("PRAGMA mmap_size").fetchone()[0] > 0
+    with pytest.raises(sqlite3.OperationalError):
+        accessor._con.execute("DELETE FROM ZUSER")
+    reader = accessor.reader()
+    assert reader.get_users() == accessor.get_users()
+    reader.close()
+
+
+def test_invalid_open_mode(synthetic_db):
+    with pytest.raises(ValueError):
+        DatabaseAccessor(synthetic_db, open_mode="rw")
+
+
+def test_get_record_full_row(synthetic_db):
+    accessor = DatabaseAccessor(synthetic_db)
+    columns = [x[1] for x in accessor._con.execute("PRAGMA table_info(ZSYNCOBJECT)")]
+    record_id = accessor._con.execute("SELECT MAX(Z_PK) FROM ZSYNCOBJECT").fetchone()[0]
+
+    record = accessor.get_record(record_id)
+    assert list(record._raw.keys()) == columns
+    assert record.filtered()["Z_PK"] == record_id
+    by_gid = accessor.get_record_by_gid(record.gid)
+    assert list(by_gid._raw.keys()) == columns
+
+    assert list(accessor.get_record(record_id, full_row=False)._raw.keys()) == list(
+        Record.columns()
+    )
@@ -0,0 +1,149 @@
+from datetime import datetime
+
+import pytest
+
+from moneywiz_api import MoneywizApi
+from moneywiz_api.engines.date_index import DateIndex
+from moneywiz_api.managers.transaction_manager import TransactionManager
+from moneywiz_api.model.transaction import (
+    DepositTransaction,
+    InvestmentTransaction,
+    Transaction,
+    TransferBudgetTransaction,
+    WithdrawTransaction,
+)
+
+SINCE, UNTIL = datetime(2016, 1, 1), datetime(2019, 6, 30)
+
+
+@pytest.fixture(scope="module")
+def transaction_manager(synthetic_db):
+    return MoneywizApi(synthetic_db).transaction_manager
+
+
+def _scanned(transaction_manager, match, since=None, until=None):
+    ret = [
+        x
+        for x in transaction_manager.records().values()
+        if not isinstance(x, TransferBudgetTransaction)
+        and match(x)
+        and (since is None or x.datetime >= since)
+        and (until is None or x.datetime <= until)
+    ]
+    # Stable on the load order, like the index
+    return sorted(ret, key=lambda x: x.datetime)
+
+
+def test_account_index(transaction_manager):
+    for account_id in transaction_manager.account_ids():
+        assert transaction_manager.get_all_for_account(account_id) == _scanned(
+            transaction_manager, lambda x: x.account == account_id
+        )
+        assert transaction_manager.get_all_for_account(
+            account_id, until=UNTIL
+        ) == _scanned(
+            transaction_manager, lambda x: x.account == account_id, None, UNTIL
+        )
+
+
+def test_date_index(transaction_manager):
+    assert transaction_manager.get_all() == _scanned(transaction_manager, bool)
+    assert transaction_manager.get_all(until=UNTIL) == _scanned(
+        transaction_manager, bool, None, UNTIL
+    )
+
+
+def test_payee_index(transaction_manager):
+    payees = {getattr(x, "payee", None) for x in transaction_manager.get_all()}
+    payees.discard(None)
+    assert payees
+    for payee_id in payees:
+        assert transaction_manager.get_all_for_payee(payee_id, SINCE, UNTIL) == (
+            _scanned(
+                transaction_manager,
+                lambda x: getattr(x, "payee", None) == payee_id,
+                SINCE,
+                UNTIL,
+            )
+        )
+
+
+def test_investment_holding_index(transaction_manager):
+    holdings = {
+        x.investment_holding
+        for x in transaction_manager.get_all_of_type(InvestmentTransaction)
+    }
+    assert holdings
+    for holding_id in holdings:
+        indexed = transaction_manager.get_all_for_investment_holding(holding_id)
+        assert indexed == _scanned(
+            transaction_manager,
+            lambda x: (
+                holding_id
+                in (
+                    getattr(x, "investment_holding", None),
+                    getattr(x, "from_investment_holding", None),
+                    getattr(x, "to_investment_holding", None),
+                )
+            ),
+        )
+
+
+@pytest.mark.parametrize(
+    "transaction_type",
+    [WithdrawTransaction, DepositTransaction, InvestmentTransaction, Transaction],
+)
+def test_type_index(transaction_manager, transaction_type):
+    scanned = {
+        x.id
+        for x in transaction_manager.records().values()
+        if isinstance(x, transaction_type)
+    }
+    indexed = transaction_manager.get_all_of_type(transaction_type)
+    assert {x.id for x in indexed} == scanned
+    assert all(a.datetime <= b.datetime for a, b in zip(indexed, indexed[1:]))
+    assert all(
+        SINCE <= x.datetime <= UNTIL
+        for x in transaction_manager.get_all_of_type(transaction_type, SINCE, UNTIL)
+    )
+
+
+def test_date_index_updates(transaction_manager):
+    # Distinct datetimes: ties keep the order they were added in
+    transactions = list(
+        {x.datetime: x for x in transaction_manager.get_all()[:60]}.values()
+    )
+    index = DateIndex()
+    index.bulk = True
+    for transaction in reversed(transactions):
+        index.add("key", transaction)
+    index.end_bulk()
+    assert index.get("key") == transactions
+
+    # Boundaries are inclusive
+    since, until = transactions[10].datetime, transactions[20].datetime
+    assert index.get("key", since, until) == [
+        x for x in transactions if since <= x.datetime <= until
+    ]
+
+    index.remove("key", transactions[5])
+    index.add("key", transactions[5])
+    assert index.get("key") == transactions
+    for transaction in transactions:
+        index.remove("key", transaction)
+    assert index.get("key") == [] and list(index.keys()) == []
+
+
+def test_bulk_load_matches_add(transaction_manager):
+    added = TransactionManager()
+    for transaction in transaction_manager.records().values():
+        added.add(transaction)
+    for name in ("_by_date", "_by_account", "_by_payee", "_by_investment_holding"):
+        loaded, expected = getattr(transaction_manager, name), getattr(added, name)
+        assert set(loaded.keys()) == set(expected.keys()), name
+        for key in expected.keys():
+            assert loaded.get(key) == expected.get(key), (name, key)
+    for transaction_type in added._by_type.keys():
+        assert transaction_manager.get_all_of_type(transaction_type) == (
+            added.get_all_of_type(transaction_type)
+        )
@@ -0,0 +1,22 @@
+from moneywiz_api.database_accessor import DatabaseAccessor
+from moneywiz_api.managers.transaction_manager import TransactionManager
+from moneywiz_api.model.decoder import DecodeOptions, row_decoder
+
+
+def test_row_decoder_matches_constructor(synthetic_db):
+    accessor = DatabaseAccessor(synthetic_db)
+    transaction_manager = TransactionManager()
+
+    for typename, constructor in transaction_manager.ents.items():
+        rows = accessor.query_objects([typename], transaction_manager.columns())
+        assert rows, typename
+        full_rows = {x["Z_PK"]: x for x in accessor.query_objects([typename])}
+        for options in (DecodeOptions(), DecodeOptions(validation="sampled")):
+            decoder = row_decoder(constructor, tuple(rows[0].keys()), options)
+            for row in rows:
+                record = decoder(row)
+                # Built by name from the full row, as before the decoders
+                expected = constructor(dict(full_rows[record.id]))
+                assert type(record) is type(expected) is constructor
+                assert record.as_dict() == expected.as_dict()
+                assert record._raw is row
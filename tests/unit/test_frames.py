@@ -0,0 +1,114 @@
+import shutil
+import sqlite3
+from datetime import datetime
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+from moneywiz_api import MoneywizApi
+from moneywiz_api.model.decoder import field_plan
+from moneywiz_api.model.raw_data_handler import RawDataHandler as RDH
+from moneywiz_api.model.transaction import (
+    InvestmentExchangeTransaction,
+    WithdrawTransaction,
+)
+
+
+def _assert_same(value, expected):
+    if expected is None:
+        assert pd.isna(value)
+    elif isinstance(expected, Decimal):
+        assert value == pytest.approx(float(expected))
+    elif isinstance(expected, datetime):
+        assert value == pd.Timestamp(expected)
+    else:
+        assert value == expected
+
+
+def _assert_stored_values(frame: pd.DataFrame, records: dict):
+    """
+    Every public attribute of the records is in the frame, as stored
+    """
+    frame = frame.set_index("id")
+    assert list(frame.index) == sorted(records)
+    for record_id, record in records.items():
+        row = frame.loc[record_id]
+        assert row["type"] == type(record).__name__
+        # The raw row, kept by the default load
+        stored = record._raw
+        for column in field_plan(type(record)):
+            if column.attr.startswith("_") or column.attr == "id":
+                continue
+            value = stored[column.column]
+            if column.convert is not None:
+                value = column.convert(value)
+            _assert_same(row[column.attr], value)
+
+
+def test_transactions_frame(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db)
+    transaction_manager = moneywiz_api.transaction_manager
+    frame = moneywiz_api.transactions_frame()
+    _assert_stored_values(frame, transaction_manager.records())
+
+    # Stored values, not the corrected ones of the records
+    frame = frame.set_index("id")
+    flipped = [
+        x
+        for x in transaction_manager.get_all_of_type(WithdrawTransaction)
+        if x.original_amount != RDH.to_decimal(x._raw["ZORIGINALAMOUNT"])
+    ]
+    assert flipped
+    for withdraw in flipped:
+        assert frame.loc[withdraw.id, "original_amount"] == pytest.approx(
+            -float(withdraw.original_amount)
+        )
+
+    scaled = moneywiz_api.transactions_frame(decimal_scale=2).set_index("id")
+    assert scaled["amount"].dtype == "int64"
+    assert (scaled["amount"] == (frame["amount"] * 100).round().astype("int64")).all()
+
+
+def test_accounts_frame(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db)
+    frame = moneywiz_api.accounts_frame()
+    _assert_stored_values(frame, moneywiz_api.account_manager.records())
+    assert frame["currency"].dtype == "category"
+
+
+def test_investment_holdings_frame(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db)
+    _assert_stored_values(
+        moneywiz_api.investment_holdings_frame(),
+        moneywiz_api.investment_holding_manager.records(),
+    )
+
+
+def test_mixed_int_float_column(synthetic_db, tmp_path):
+    db_path = tmp_path / "copy.db"
+    shutil.copy(synthetic_db, db_path)
+    exchanges = sorted(
+        MoneywizApi(db_path).transaction_manager.get_all_of_type(
+            InvestmentExchangeTransaction
+        ),
+        key=lambda x: x.id,
+    )
+    con = sqlite3.connect(db_path)
+    with con:
+        # Untyped column: an integer first, then fractional shares
+        con.execute(
+            "UPDATE ZSYNCOBJECT SET ZTONUMBEROFSHARES = 3 WHERE Z_PK = ?",
+            (exchanges[0].id,),
+        )
+        con.execute(
+            "UPDATE ZSYNCOBJECT SET ZTONUMBEROFSHARES = 2.5 WHERE Z_PK = ?",
+            (exchanges[1].id,),
+        )
+    con.close()
+
+    frame = MoneywizApi(db_path).transactions_frame().set_index("id")
+    shares = frame["to_number_of_shares"]
+    assert shares.dtype == "float64"
+    assert shares[exchanges[0].id] == 3
+    assert shares[exchanges[1].id] == 2.5
@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from moneywiz_api import MoneywizApi
+from moneywiz_api.model.transaction import (
+    TransferWithdrawTransaction,
+    WithdrawTransaction,
+)
+
+
+def test_fx_engine(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db)
+    account_manager = moneywiz_api.account_manager
+    transaction_manager = moneywiz_api.transaction_manager
+    fx_engine = moneywiz_api.fx_engine
+    assert moneywiz_api.fx_engine is fx_engine
+
+    for transaction in transaction_manager.get_all_of_type(WithdrawTransaction):
+        currency = account_manager.get(transaction.account).currency
+        rate = transaction.original_exchange_rate
+        if rate and transaction.original_currency != currency:
+            at = transaction.datetime
+            assert fx_engine.rate(transaction.original_currency, currency, at) == (
+                pytest.approx(float(rate))
+            )
+            assert fx_engine.rate(currency, transaction.original_currency, at) == (
+                pytest.approx(1 / float(rate))
+            )
+    for transaction in transaction_manager.get_all_of_type(TransferWithdrawTransaction):
+        converted = fx_engine.convert(
+            [transaction.amount],
+            [transaction.original_currency],
+            [transaction.datetime],
+            transaction.recipient_currency,
+        )
+        assert converted[0] == pytest.approx(-float(transaction.recipient_amount))
+
+    assert fx_engine.rate("USD", "USD") == 1
+    assert fx_engine.rate("USD", "XXX") is None
+    converted = fx_engine.convert([1, 2], ["XXX", "USD"], [datetime.now()] * 2, "USD")
+    assert np.isnan(converted[0]) and converted[1] == 2
+
+
+def test_triangulation(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db)
+    fx_engine = moneywiz_api.fx_engine
+    base, quote = sorted(fx_engine.currencies() - {fx_engine.pivot})[:2]
+    dates = [datetime(2015, 1, 1), datetime(2023, 1, 1)]
+    expected = fx_engine.rates(base, fx_engine.pivot, dates) * fx_engine.rates(
+        fx_engine.pivot, quote, dates
+    )
+    # Forget the direct rates, the pivot must stand in for them
+    del fx_engine._pairs[(base, quote)]
+    assert fx_engine.rates(base, quote, dates) == pytest.approx(expected)
+    moneywiz_api.transaction_manager.invalidate_engines()
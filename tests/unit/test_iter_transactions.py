@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from moneywiz_api import MoneywizApi
+
+
+def _in_date_order(transactions) -> bool:
+    return all(a.datetime <= b.datetime for a, b in zip(transactions, transactions[1:]))
+
+
+def test_iter_transactions(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db, lazy=True)
+    streamed = list(moneywiz_api.iter_transactions())
+    # Streamed without loading the transaction manager
+    assert "transaction_manager" not in moneywiz_api.stats().managers
+    assert _in_date_order(streamed)
+
+    transaction_manager = moneywiz_api.transaction_manager
+    assert sorted(x.id for x in streamed) == sorted(
+        x.id for x in transaction_manager.get_all()
+    )
+    for transaction in streamed[::50]:
+        expected = transaction_manager.get(transaction.id)
+        assert transaction.as_dict() == expected.as_dict()
+
+
+def test_iter_transactions_filtered(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db)
+    transaction_manager = moneywiz_api.transaction_manager
+    account_id = transaction_manager.account_ids()[0]
+    expected = transaction_manager.get_all_for_account(account_id)
+    # Bounds are inclusive
+    since, until = expected[10].datetime, expected[-10].datetime
+    expected = [x for x in expected if since <= x.datetime <= until]
+
+    streamed = list(moneywiz_api.iter_transactions(account_id, since, until))
+    assert _in_date_order(streamed)
+    assert sorted(x.id for x in streamed) == sorted(x.id for x in expected)
+
+    assert list(moneywiz_api.iter_transactions(since=datetime(2030, 1, 1))) == []
+    small_batches = transaction_manager.iter_transactions(
+        moneywiz_api.accessor, account_id, batch_size=7
+    )
+    assert [x.id for x in small_batches] == [
+        x.id for x in moneywiz_api.iter_transactions(account_id)
+    ]
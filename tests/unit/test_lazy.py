@@ -0,0 +1,61 @@
+import pytest
+
+from moneywiz_api import MoneywizApi
+
+MANAGERS = (
+    "account_manager",
+    "payee_manager",
+    "category_manager",
+    "transaction_manager",
+    "investment_holding_manager",
+    "tag_manager",
+)
+
+
+def _state(moneywiz_api: MoneywizApi) -> dict:
+    ret = {
+        name: [x.as_dict() for x in getattr(moneywiz_api, name).records().values()]
+        for name in MANAGERS
+    }
+    transaction_manager = moneywiz_api.transaction_manager
+    ret["maps"] = (
+        transaction_manager.category_assignment,
+        transaction_manager.refund_maps,
+        transaction_manager.tags_map,
+    )
+    return ret
+
+
+def test_lazy_load(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db, lazy=True)
+    assert not moneywiz_api.stats().managers
+    assert "query_objects" not in moneywiz_api.stats().queries
+
+    assert moneywiz_api.account_manager.records()
+    queries = moneywiz_api.stats().queries
+    assert queries["query_objects"].calls == 1
+    assert moneywiz_api.stats().managers.keys() == {"account_manager"}
+
+    transaction_manager = moneywiz_api.transaction_manager
+    assert transaction_manager.records()
+    assert "get_category_assignment" not in moneywiz_api.stats().queries
+    assert transaction_manager.category_assignment
+    assert moneywiz_api.stats().queries["get_category_assignment"].calls == 1
+    assert "get_tags_map" not in moneywiz_api.stats().queries
+
+
+def test_preload(synthetic_db):
+    eager = MoneywizApi(synthetic_db)
+    lazy = MoneywizApi(synthetic_db, lazy=True)
+    lazy.preload("account_manager")
+    assert lazy.stats().managers.keys() == {"account_manager"}
+
+    lazy.preload()
+    queries = dict(lazy.stats().queries)
+    assert queries["get_tags_map"].calls == 1
+    assert _state(lazy) == _state(eager)
+    # Everything was loaded by preload
+    assert lazy.stats().queries == queries
+
+    with pytest.raises(ValueError):
+        lazy.preload("unknown_manager")
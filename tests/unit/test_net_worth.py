@@ -0,0 +1,35 @@
+from datetime import date, datetime, time
+
+import numpy as np
+import pytest
+
+from moneywiz_api import MoneywizApi
+
+
+def test_net_worth_series(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db)
+    account_manager = moneywiz_api.account_manager
+    holding_manager = moneywiz_api.investment_holding_manager
+    user_id = next(iter(account_manager.records().values())).user
+
+    series = moneywiz_api.net_worth_series(
+        user_id, date(2014, 1, 1), date(2023, 12, 31), base_currency="USD"
+    )
+    assert len(series) == 3652
+
+    for day in series.index[::365]:
+        at = datetime.combine(day.date(), time.max)
+        expected = 0.0
+        for account in account_manager.get_accounts_for_user(user_id):
+            value = float(moneywiz_api.balance_engine.balance(account.id, at))
+            for holding in holding_manager.get_holdings_for_account(account.id):
+                shares = moneywiz_api.position_engine.position(holding.id, at)
+                price = holding_manager.price_at(holding.id, at)[0]
+                if not np.isnan(price):
+                    value += float(shares.number_of_shares) * price
+            expected += value * moneywiz_api.fx_engine.rate(account.currency, "USD", at)
+        assert series[day] == pytest.approx(expected)
+
+    if len({x.currency for x in account_manager.get_accounts_for_user(user_id)}) > 1:
+        with pytest.raises(ValueError):
+            moneywiz_api.net_worth_series(user_id, date(2020, 1, 1), date(2020, 2, 1))
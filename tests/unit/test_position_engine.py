@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+
+from moneywiz_api import MoneywizApi
+from moneywiz_api.model.transaction import (
+    InvestmentBuyTransaction,
+    InvestmentSellTransaction,
+)
+
+
+def test_positions(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db)
+    transaction_manager = moneywiz_api.transaction_manager
+    position_engine = moneywiz_api.position_engine
+
+    for holding in moneywiz_api.investment_holding_manager.records().values():
+        shares = holding.opening_number_of_shares or Decimal(0)
+        transactions = transaction_manager.get_all_for_investment_holding(holding.id)
+        for transaction in transactions:
+            if isinstance(transaction, InvestmentBuyTransaction):
+                shares += transaction.number_of_shares
+            elif isinstance(transaction, InvestmentSellTransaction):
+                shares -= transaction.number_of_shares
+            elif transaction.from_investment_holding == holding.id:
+                shares += Decimal(str(transaction.from_number_of_shares))
+            else:
+                shares += Decimal(str(transaction.to_number_of_shares))
+            position = position_engine.position(holding.id, transaction.datetime)
+            assert position.number_of_shares == shares
+            # Exchanges from a holding without shares bring no cost basis
+            assert position.cost_basis >= 0
+            assert position.fifo_cost_basis >= 0
+        assert position_engine.position(holding.id) == position
+
+        if transactions:
+            before = transactions[0].datetime - timedelta(seconds=1)
+            opening = position_engine.position(holding.id, before)
+            assert opening.number_of_shares == (
+                holding.opening_number_of_shares or Decimal(0)
+            )
+
+    assert position_engine.position(-1, datetime.now()).number_of_shares == 0
+
+
+def test_shares_at(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db)
+    position_engine = moneywiz_api.position_engine
+    points = np.array(
+        [datetime(2013, 1, 1), datetime(2017, 3, 1), datetime(2024, 1, 1)],
+        dtype="datetime64[us]",
+    )
+
+    for holding_id in moneywiz_api.investment_holding_manager.records():
+        expected = [
+            float(position_engine.position(holding_id, x.item()).number_of_shares)
+            for x in points
+        ]
+        assert position_engine.shares_at(holding_id, points).tolist() == expected
+        # Again, from the arrays kept for the holding
+        assert position_engine.shares_at(holding_id, points).tolist() == expected
+    assert position_engine._arrays
+
+    # Dropped with the engine when the transactions change
+    transaction_manager = moneywiz_api.transaction_manager
+    transaction_manager.remove(transaction_manager.get_all()[-1].id)
+    assert not moneywiz_api.position_engine._arrays
@@ -0,0 +1,47 @@
+import plistlib
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from moneywiz_api import MoneywizApi
+from moneywiz_api.engines.price_history import decode_price_history
+
+
+def test_price_histories(synthetic_db):
+    investment_holding_manager = MoneywizApi(synthetic_db).investment_holding_manager
+    histories = investment_holding_manager.price_histories(
+        investment_holding_manager.records()
+    )
+    assert histories.keys() == investment_holding_manager.records().keys()
+
+    dates = [datetime(2013, 1, 1) + timedelta(days=3 * i) for i in range(1300)]
+    for holding_id, history in histories.items():
+        assert len(history) > 0
+        assert (np.diff(history.dates) > np.timedelta64(0)).all()
+        assert investment_holding_manager.price_history(holding_id) is history
+
+        prices = investment_holding_manager.price_at(holding_id, dates)
+        known = history.dates.astype(datetime).tolist()
+        for date, price in zip(dates, prices):
+            idx = bisect_right(known, date)
+            if idx:
+                assert price == history.prices[idx - 1]
+            else:
+                assert np.isnan(price)
+
+
+def test_decode_price_history():
+    blob = plistlib.dumps(
+        [
+            {"date": datetime(2020, 1, 8), "price": 11.5},
+            {"date": datetime(2020, 1, 1), "price": 10.0},
+        ],
+        fmt=plistlib.FMT_BINARY,
+    )
+    history = decode_price_history(blob)
+    assert history.prices.tolist() == [10.0, 11.5]
+    assert np.isnan(history.price_at(datetime(2019, 1, 1))[0])
+
+    assert len(decode_price_history(None)) == 0
+    assert len(decode_price_history(b"not a plist")) == 0
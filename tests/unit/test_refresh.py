@@ -0,0 +1,154 @@
+import shutil
+import sqlite3
+
+import pytest
+
+from moneywiz_api import MoneywizApi
+from moneywiz_api.model.transaction import DepositTransaction
+
+
+@pytest.fixture
+def db_copy(synthetic_db, tmp_path):
+    db_path = tmp_path / "copy.db"
+    shutil.copy(synthetic_db, db_path)
+    return db_path
+
+
+def _state(moneywiz_api: MoneywizApi) -> tuple:
+    transaction_manager = moneywiz_api.transaction_manager
+    return (
+        {k: x.as_dict() for k, x in transaction_manager.records().items()},
+        {k: sorted(x) for k, x in transaction_manager.category_assignment.items()},
+        transaction_manager.refund_maps,
+        {k: sorted(x) for k, x in transaction_manager.tags_map.items()},
+    )
+
+
+def _insert_copy(con: sqlite3.Connection, record_id: int) -> int:
+    """
+    Append a copy of a ZSYNCOBJECT row, with a new Z_PK and GID.
+    """
+    con.row_factory = sqlite3.Row
+    row = dict(
+        con.execute("SELECT * FROM ZSYNCOBJECT WHERE Z_PK = ?", (record_id,)).fetchone()
+    )
+    con.row_factory = None
+    (new_id,) = con.execute("SELECT MAX(Z_PK) + 1 FROM ZSYNCOBJECT").fetchone()
+    row.update(Z_PK=new_id, ZGID=f"REFRESH-{new_id}")
+    con.execute(
+        "INSERT INTO ZSYNCOBJECT (%s) VALUES (%s)"
+        % (",".join(f'"{x}"' for x in row), ",".join("?" * len(row))),
+        list(row.values()),
+    )
+    con.execute(
+        "UPDATE Z_PRIMARYKEY SET Z_MAX = ? WHERE Z_NAME = 'SyncObject'", (new_id,)
+    )
+    return new_id
+
+
+def _assign_category(con: sqlite3.Connection, transaction_id: int) -> None:
+    (pk, category) = con.execute(
+        "SELECT MAX(Z_PK) + 1, MIN(ZCATEGORY) FROM ZCATEGORYASSIGMENT"
+    ).fetchone()
+    con.execute(
+        "INSERT INTO ZCATEGORYASSIGMENT VALUES (?, 20, 1, ?, ?, 12.5)",
+        (pk, category, transaction_id),
+    )
+    con.execute(
+        "UPDATE Z_PRIMARYKEY SET Z_MAX = ? WHERE Z_NAME = 'CategoryAssigment'", (pk,)
+    )
+
+
+def test_refresh_unchanged(db_copy):
+    moneywiz_api = MoneywizApi(db_copy)
+    before = _state(moneywiz_api)
+    queries = moneywiz_api.stats().queries["query_objects"].calls
+
+    ret = moneywiz_api.refresh()["transaction_manager"]
+    assert not ret.changed()
+    assert _state(moneywiz_api) == before
+    # Short-circuited by the fingerprint
+    stats = moneywiz_api.stats().queries
+    assert "get_versions" not in stats
+    assert stats["query_objects"].calls == queries
+
+
+def test_refresh_appended(db_copy):
+    moneywiz_api = MoneywizApi(db_copy)
+    transaction_manager = moneywiz_api.transaction_manager
+    deposit = transaction_manager.get_all_of_type(DepositTransaction)[0]
+    # Unchanged transaction with a new category assignment
+    other = transaction_manager.get_all_of_type(DepositTransaction)[1]
+
+    con = sqlite3.connect(db_copy)
+    with con:
+        new_id = _insert_copy(con, deposit.id)
+        _assign_category(con, new_id)
+        _assign_category(con, other.id)
+    con.close()
+
+    ret = moneywiz_api.refresh()["transaction_manager"]
+    assert (ret.inserted, ret.updated, ret.deleted) == ({new_id}, set(), set())
+    # Only the new rows were read
+    assert "get_versions" not in moneywiz_api.stats().queries
+    assert _state(moneywiz_api) == _state(MoneywizApi(db_copy))
+
+
+def test_refresh_matches_fresh_load(db_copy):
+    moneywiz_api = MoneywizApi(db_copy)
+    moneywiz_api.preload()
+    transaction_manager = moneywiz_api.transaction_manager
+    balance_engine = moneywiz_api.balance_engine
+    tag_index = moneywiz_api.tag_index
+    deposits = [
+        x
+        for x in transaction_manager.get_all_of_type(DepositTransaction)
+        if x.id in transaction_manager.category_assignment
+    ]
+    inserted, updated, deleted = deposits[:3]
+
+    con = sqlite3.connect(db_copy)
+    with con:
+        new_id = _insert_copy(con, inserted.id)
+        _assign_category(con, new_id)
+        (tag_id,) = con.execute("SELECT MIN(Z_35TAGS) FROM Z_36TAGS").fetchone()
+        con.execute("INSERT INTO Z_36TAGS VALUES (?, ?)", (new_id, tag_id))
+        con.execute(
+            "UPDATE ZSYNCOBJECT SET ZAMOUNT1 = ZAMOUNT1 + 1, Z_OPT = Z_OPT + 1"
+            " WHERE Z_PK = ?",
+            (updated.id,),
+        )
+        con.execute(
+            "UPDATE ZCATEGORYASSIGMENT SET ZAMOUNT = ZAMOUNT + 1 WHERE ZTRANSACTION = ?",
+            (updated.id,),
+        )
+        con.execute("DELETE FROM ZSYNCOBJECT WHERE Z_PK = ?", (deleted.id,))
+        con.execute(
+            "DELETE FROM ZCATEGORYASSIGMENT WHERE ZTRANSACTION = ?", (deleted.id,)
+        )
+        con.execute("DELETE FROM Z_36TAGS WHERE Z_36TRANSACTIONS = ?", (deleted.id,))
+    con.close()
+
+    ret = moneywiz_api.refresh()["transaction_manager"]
+    assert ret.inserted == {new_id}
+    assert ret.updated == {updated.id}
+    assert ret.deleted == {deleted.id}
+
+    fresh = MoneywizApi(db_copy)
+    assert _state(moneywiz_api) == _state(fresh)
+    assert transaction_manager.get(new_id).amount == inserted.amount
+    assert transaction_manager.get(updated.id).amount == updated.amount + 1
+    assert transaction_manager.get(deleted.id) is None
+    assert transaction_manager.category_for_transaction(deleted.id) is None
+
+    # The engines were dropped and rebuilt from the refreshed transactions
+    assert moneywiz_api.balance_engine is not balance_engine
+    assert moneywiz_api.tag_index is not tag_index
+    for account_id in {inserted.account, updated.account, deleted.account}:
+        assert moneywiz_api.balance_engine.balance(account_id) == (
+            fresh.balance_engine.balance(account_id)
+        )
+    assert new_id in moneywiz_api.tag_index.ids_for(tag_id)
+    assert list(moneywiz_api.tag_index.ids_for(tag_id)) == list(
+        fresh.tag_index.ids_for(tag_id)
+    )
@@ -0,0 +1,44 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from moneywiz_api import MoneywizApi
+
+
+def test_refund_index(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db)
+    transaction_manager = moneywiz_api.transaction_manager
+    refund_index = moneywiz_api.refund_index
+
+    refunded = defaultdict(Decimal)
+    for refund_id, withdraw_id in transaction_manager.refund_maps.items():
+        assert refund_index.withdraw_for(refund_id) == withdraw_id
+        assert refund_id in refund_index.refunds_for(withdraw_id)
+        refunded[withdraw_id] += transaction_manager.get(refund_id).amount
+    assert refunded
+    for withdraw_id, amount in refunded.items():
+        assert refund_index.refunded_amount(withdraw_id) == amount
+        refunds = [
+            transaction_manager.get(x) for x in refund_index.refunds_for(withdraw_id)
+        ]
+        assert refunds == sorted(refunds, key=lambda x: x.datetime)
+
+
+def test_net_of_refund_totals(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db)
+    transaction_manager = moneywiz_api.transaction_manager
+    refunds = transaction_manager.refund_maps
+
+    expected = defaultdict(Decimal)
+    for transaction in transaction_manager.get_all():
+        payee = getattr(transaction, "payee", None)
+        if transaction.id in refunds:
+            payee = transaction_manager.get(refunds[transaction.id]).payee
+        if payee is not None:
+            expected[payee] += transaction.amount
+    assert transaction_manager.totals_by_payee(net_of_refunds=True) == expected
+
+    gross = transaction_manager.totals_by_category()
+    net = transaction_manager.totals_by_category(net_of_refunds=True)
+    assert gross.keys() >= net.keys()
+    # Refunds are assigned to categories too: they move, the total stays
+    assert abs(sum(gross.values()) - sum(net.values())) < Decimal("0.01")
@@ -0,0 +1,57 @@
+import shutil
+import sqlite3
+
+from moneywiz_api import MoneywizApi
+from moneywiz_api.snapshot import snapshot_path
+
+
+def _restored(moneywiz_api: MoneywizApi) -> bool:
+    return "query_objects" not in moneywiz_api.stats().queries
+
+
+def test_snapshot_restore(synthetic_db, tmp_path):
+    loaded = MoneywizApi(synthetic_db, cache_dir=tmp_path)
+    restored = MoneywizApi(synthetic_db, cache_dir=tmp_path)
+
+    assert not _restored(loaded)
+    assert _restored(restored)
+    for name in ("account_manager", "category_manager", "transaction_manager"):
+        before = getattr(loaded, name).records()
+        after = getattr(restored, name).records()
+        assert [x.as_dict() for x in before.values()] == [
+            x.as_dict() for x in after.values()
+        ]
+    transaction_manager = restored.transaction_manager
+    assert transaction_manager.category_assignment == (
+        loaded.transaction_manager.category_assignment
+    )
+    account_id = next(iter(transaction_manager.account_ids()))
+    assert [x.id for x in transaction_manager.get_all_for_account(account_id)] == [
+        x.id for x in loaded.transaction_manager.get_all_for_account(account_id)
+    ]
+    transaction = next(iter(transaction_manager.records().values()))
+    assert transaction.filtered()["Z_PK"] == transaction.id
+
+
+def test_snapshot_invalidated(synthetic_db, tmp_path):
+    db_path = tmp_path / "copy.db"
+    shutil.copy(synthetic_db, db_path)
+    cache_dir = tmp_path / "cache"
+    MoneywizApi(db_path, cache_dir=cache_dir)
+
+    # Changed database
+    con = sqlite3.connect(db_path)
+    with con:
+        con.execute("UPDATE ZSYNCOBJECT SET ZNAME = 'Renamed' WHERE ZNAME IS NOT NULL")
+    con.close()
+    assert not _restored(MoneywizApi(db_path, cache_dir=cache_dir))
+    assert _restored(MoneywizApi(db_path, cache_dir=cache_dir))
+
+    # Other decode options
+    assert not _restored(MoneywizApi(db_path, cache_dir=cache_dir, compact=True))
+
+    # Unreadable snapshot
+    snapshot_path(cache_dir, db_path).write_bytes(b"garbage")
+    moneywiz_api = MoneywizApi(db_path, cache_dir=cache_dir)
+    assert not _restored(moneywiz_api)
+    assert moneywiz_api.transaction_manager.records()
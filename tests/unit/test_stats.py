@@ -0,0 +1,72 @@
+import shutil
+import sqlite3
+
+from moneywiz_api import MoneywizApi
+from moneywiz_api.stats import estimate_memory
+
+
+def test_stats(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db, profile=True)
+    stats = moneywiz_api.stats()
+
+    transactions = stats.managers["transaction_manager"]
+    assert transactions.objects == len(moneywiz_api.transaction_manager.records())
+    assert transactions.rows >= transactions.objects
+    assert 0 < transactions.query_seconds <= transactions.seconds
+    assert transactions.validation_seconds is not None
+    assert transactions.memory > 0
+    assert stats.queries["query_objects"].calls == len(stats.managers)
+    assert stats.as_dict()["managers"]["transaction_manager"]["decode_seconds"]
+
+
+def test_query_hooks(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db)
+    started, events = [], []
+    moneywiz_api.accessor.add_query_hook(
+        before=lambda name, sql, params: started.append(name), after=events.append
+    )
+
+    account_id = next(iter(moneywiz_api.account_manager.records()))
+    transactions = list(moneywiz_api.iter_transactions(account=account_id))
+
+    assert started == [x.name for x in events] == ["iter_transactions"]
+    assert events[0].rows == len(transactions)
+    assert moneywiz_api.stats().queries["iter_transactions"].calls == 1
+
+
+def test_stats_without_raw_rows(synthetic_db, tmp_path):
+    for options in (dict(compact=True), dict(processes=2), dict(cache_dir=tmp_path)):
+        moneywiz_api = MoneywizApi(
+            synthetic_db, raw_rows="drop", profile=True, **options
+        )
+        transactions = moneywiz_api.stats().managers["transaction_manager"]
+        assert transactions.validation_seconds is None
+        assert transactions.memory > 0
+
+    # Restored from the snapshot
+    moneywiz_api = MoneywizApi(
+        synthetic_db, raw_rows="drop", profile=True, cache_dir=tmp_path
+    )
+    assert moneywiz_api.stats().managers["transaction_manager"].objects
+
+
+def test_stats_empty_manager(synthetic_db, tmp_path):
+    db_path = tmp_path / "copy.db"
+    shutil.copy(synthetic_db, db_path)
+    moneywiz_api = MoneywizApi(db_path)
+    tag_manager = moneywiz_api.tag_manager
+    assert tag_manager.records()
+    con = sqlite3.connect(db_path)
+    with con:
+        con.execute(
+            "DELETE FROM ZSYNCOBJECT WHERE Z_ENT = ?",
+            (moneywiz_api.accessor.ent_for("Tag"),),
+        )
+    con.close()
+    # Loaded records whose rows are gone
+    assert estimate_memory(tag_manager, moneywiz_api.accessor) == 0
+
+    moneywiz_api = MoneywizApi(db_path, profile=True)
+    tags = moneywiz_api.stats().managers["tag_manager"]
+    assert tags.objects == 0
+    assert tags.memory == 0
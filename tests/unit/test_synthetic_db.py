@@ -0,0 +1,79 @@
+from collections import Counter
+
+from moneywiz_api import MoneywizApi
+from moneywiz_api.model.transaction import TransferBudgetTransaction
+
+
+def test_all_managers_load(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db)
+
+    assert moneywiz_api.account_manager.records()
+    assert moneywiz_api.payee_manager.records()
+    assert moneywiz_api.category_manager.records()
+    assert moneywiz_api.investment_holding_manager.records()
+    assert moneywiz_api.tag_manager.records()
+
+    transaction_types = Counter(
+        type(x).__name__ for x in moneywiz_api.transaction_manager.records().values()
+    )
+    assert transaction_types.keys() == moneywiz_api.transaction_manager.ents.keys()
+
+
+def test_maps(synthetic_db):
+    transaction_manager = MoneywizApi(synthetic_db).transaction_manager
+
+    assert transaction_manager.category_assignment
+    assert transaction_manager.tags_map
+    for refund, withdraw in transaction_manager.refund_maps.items():
+        assert transaction_manager.get(refund) is not None
+        assert transaction_manager.get(withdraw) is not None
+
+
+def test_get_all_for_account(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db)
+    transaction_manager = moneywiz_api.transaction_manager
+
+    for account_id in moneywiz_api.account_manager.records():
+        scanned = sorted(
+            [
+                x
+                for x in transaction_manager.records().values()
+                if not isinstance(x, TransferBudgetTransaction)
+                and x.account == account_id
+            ],
+            key=lambda x: x.datetime,
+        )
+        assert transaction_manager.get_all_for_account(account_id) == scanned
+
+
+def test_parallel_load(synthetic_db):
+    sequential = MoneywizApi(synthetic_db)
+    parallel = MoneywizApi(synthetic_db, workers=4)
+
+    for name in ("account_manager", "payee_manager", "transaction_manager"):
+        assert [x.as_dict() for x in getattr(parallel, name).records().values()] == [
+            x.as_dict() for x in getattr(sequential, name).records().values()
+        ]
+    transaction_manager = parallel.transaction_manager
+    assert transaction_manager.category_assignment == (
+        sequential.transaction_manager.category_assignment
+    )
+    assert transaction_manager.tags_map == sequential.transaction_manager.tags_map
+    assert transaction_manager.refund_maps == sequential.transaction_manager.refund_maps
+    assert all(not x.changed() for x in parallel.refresh().values())
+
+
+def test_process_load(synthetic_db):
+    sequential = MoneywizApi(synthetic_db).transaction_manager
+    transaction_manager = MoneywizApi(synthetic_db, processes=2).transaction_manager
+
+    assert list(transaction_manager.records()) == list(sequential.records())
+    assert [x.as_dict() for x in transaction_manager.records().values()] == [
+        x.as_dict() for x in sequential.records().values()
+    ]
+    for account_id in sequential.account_ids():
+        assert [x.id for x in transaction_manager.get_all_for_account(account_id)] == [
+            x.id for x in sequential.get_all_for_account(account_id)
+        ]
+    transaction = next(iter(transaction_manager.records().values()))
+    assert transaction.filtered()["Z_PK"] == transaction.id
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+import numpy as np
+
+from moneywiz_api import MoneywizApi
+
+
+def test_tag_queries(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db)
+    transaction_manager = moneywiz_api.transaction_manager
+    tag_index = moneywiz_api.tag_index
+    a, b, c = sorted(tag_index.tag_ids())[:3]
+    since, until = datetime(2018, 1, 1), datetime(2021, 12, 31)
+
+    def tags(transaction):
+        return set(transaction_manager.tags_for_transaction(transaction.id) or [])
+
+    transactions = transaction_manager.get_all()
+    expected = [
+        x
+        for x in transactions
+        if {a, b} <= tags(x) and c not in tags(x) and since <= x.datetime <= until
+    ]
+    assert expected
+    assert (
+        transaction_manager.get_all_with_tags(
+            all_of=[a, b], none_of=[c], since=since, until=until
+        )
+        == expected
+    )
+
+    any_of = tag_index.query(any_of=[a, c])
+    assert any_of.tolist() == sorted(x.id for x in transactions if tags(x) & {a, c})
+    none_of = tag_index.query(none_of=[a])
+    assert none_of.tolist() == sorted(x.id for x in transactions if a not in tags(x))
+
+    frame = moneywiz_api.transactions_frame()
+    mask = tag_index.isin(frame["id"], all_of=[a, b])
+    assert np.array_equal(
+        np.sort(frame["id"][mask].to_numpy()), tag_index.query(all_of=[a, b])
+    )
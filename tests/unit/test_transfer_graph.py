@@ -0,0 +1,51 @@
+import pytest
+
+from moneywiz_api import MoneywizApi
+from moneywiz_api.model.transaction import (
+    TransferDepositTransaction,
+    TransferWithdrawTransaction,
+)
+
+
+def test_transfer_graph(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db)
+    transaction_manager = moneywiz_api.transaction_manager
+    transfer_graph = moneywiz_api.transfer_graph
+    assert moneywiz_api.transfer_graph is transfer_graph
+
+    withdraws = transaction_manager.get_all_of_type(TransferWithdrawTransaction)
+    deposits = transaction_manager.get_all_of_type(TransferDepositTransaction)
+    pairs = transfer_graph.pairs()
+    assert len(pairs) == len(withdraws) == len(deposits)
+    assert transfer_graph.unmatched() == []
+    for pair in pairs:
+        assert pair.withdraw.recipient_transaction == pair.deposit.id
+        assert pair.deposit.sender_transaction == pair.withdraw.id
+        assert transfer_graph.pair_for(pair.withdraw.id) is pair
+        assert transfer_graph.pair_for(pair.deposit.id) is pair
+        assert pair in transfer_graph.outbound(pair.sender_account)
+        assert pair in transfer_graph.inbound(pair.recipient_account)
+        assert pair.sent == -pair.deposit.sender_amount
+
+    external = transfer_graph.external(transaction_manager.records().values())
+    assert len(external) == len(transaction_manager.records()) - 2 * len(pairs)
+
+    flows = transfer_graph.flows("month")
+    assert flows["transfers"].sum() == len(pairs)
+    assert flows["sent"].sum() == pytest.approx(sum(float(x.sent) for x in pairs))
+    assert len(transfer_graph.flows(None)) == len(
+        {(x.sender_account, x.recipient_account) for x in pairs}
+    )
+    with pytest.raises(ValueError):
+        transfer_graph.flows("quarter")
+
+
+def test_unmatched_transfer(synthetic_db):
+    moneywiz_api = MoneywizApi(synthetic_db)
+    transaction_manager = moneywiz_api.transaction_manager
+    withdraw = transaction_manager.get_all_of_type(TransferWithdrawTransaction)[0]
+    transaction_manager.remove(withdraw.recipient_transaction)
+
+    (pair,) = moneywiz_api.transfer_graph.unmatched()
+    assert pair.withdraw is withdraw and pair.deposit is None
+    assert pair.received == withdraw.recipient_amount
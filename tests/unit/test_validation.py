@@ -0,0 +1,65 @@
+from decimal import Decimal
+
+import pytest
+
+from moneywiz_api import MoneywizApi
+from moneywiz_api.model.decoder import SAMPLE_EVERY
+from moneywiz_api.model.record import Record
+from moneywiz_api.utils import is_close
+
+
+@pytest.fixture
+def validated(monkeypatch):
+    """
+    Ids of the records validated, every validate() chain ending in Record's
+    """
+    ret = []
+    validate = Record.validate
+
+    def counting(self):
+        ret.append(self.id)
+        validate(self)
+
+    monkeypatch.setattr(Record, "validate", counting)
+    return ret
+
+
+@pytest.mark.parametrize("validation", ["strict", "sampled", "off"])
+def test_validation_levels(synthetic_db, validated, validation):
+    moneywiz_api = MoneywizApi(synthetic_db, lazy=True, validation=validation)
+    ids = list(moneywiz_api.transaction_manager.records())
+
+    if validation == "strict":
+        assert sorted(validated) == sorted(ids)
+    elif validation == "sampled":
+        assert sorted(validated) == sorted(x for x in ids if x % SAMPLE_EVERY == 0)
+        assert 0 < len(validated) < len(ids)
+    else:
+        assert validated == []
+
+
+def test_invalid_validation(synthetic_db):
+    with pytest.raises(ValueError):
+        MoneywizApi(synthetic_db, validation="sometimes").transaction_manager
+
+
+@pytest.mark.parametrize(
+    "a, b, tolerance, expected",
+    [
+        (Decimal("1.000"), Decimal("1.001"), Decimal("0.001"), True),
+        (Decimal("1.000"), Decimal("1.0011"), Decimal("0.001"), False),
+        (Decimal("-5.25"), Decimal("-5.2505"), Decimal("0.001"), True),
+        (Decimal("0.001"), Decimal("-0.001"), Decimal("0.001"), False),
+        (Decimal("2"), Decimal("2.000"), Decimal("0"), True),
+        (Decimal("10.5"), 0, Decimal("0.001"), False),
+        (Decimal("0.0004"), 0, Decimal("0.001"), True),
+        (0.1 + 0.2, 0.3, 0.0, False),
+        (0.1 + 0.2, 0.3, 1e-9, True),
+        (Decimal("0.3"), 0.1 + 0.2, Decimal("0.001"), True),
+        (1.5, Decimal("1.502"), Decimal("0.001"), False),
+        (Decimal("100.0001"), Decimal("100"), 0.001, True),
+    ],
+)
+def test_is_close(a, b, tolerance, expected):
+    assert is_close(a, b, tolerance) is expected
+    assert is_close(b, a, tolerance) is expected